@@ -0,0 +1,207 @@
+"""
+Admission control and graceful degradation.
+
+Each limited route gets a concurrency limit, a bounded wait queue and a
+queue-time SLO. Instead of letting work pile up until clients time out,
+requests are admitted at a degradation level chosen from the current
+pressure (smoothed queue wait relative to the SLO, and queue occupancy):
+
+    normal        full processing
+    reduced       inference on a downscaled frame
+    status_only   no annotated image, just the detection result
+    shed          429 Too Many Requests with Retry-After
+
+Routes only use the levels they list (audio routes have nothing to
+downscale, so they go from normal straight to shed). A request is also
+shed when the queue is full on arrival or when it has waited longer than
+`max_wait_ms` for a slot; a stale frame isn't worth processing.
+
+The chosen level is sent as the X-Degradation response header, and
+endpoints read it with current_level() to adapt their work and report it in
+the response body. Decisions are counted in
+admission_decisions_total{route, level}.
+"""
+import asyncio
+import json
+import math
+import time
+from contextvars import ContextVar
+
+try:
+    from .metrics import REGISTRY, Counter, Gauge
+except ImportError:
+    try:
+        from games.metrics import REGISTRY, Counter, Gauge
+    except ImportError:
+        from metrics import REGISTRY, Counter, Gauge
+
+NORMAL = "normal"
+REDUCED = "reduced"
+STATUS_ONLY = "status_only"
+SHED = "shed"
+LEVELS = (NORMAL, REDUCED, STATUS_ONLY, SHED)
+
+# Smoothing for queue wait and service time
+EWMA_ALPHA = 0.2
+
+ADMISSION_DECISIONS = REGISTRY.register(Counter(
+    "admission_decisions_total", "Admission decisions by route and degradation level.", ("route", "level")))
+ADMISSION_QUEUE = REGISTRY.register(Gauge(
+    "admission_queue_depth", "Requests waiting for a slot, by limited route.", ("route",)))
+
+_level = ContextVar("degradation_level", default=NORMAL)
+
+
+def current_level():
+    """Degradation level the current request was admitted at."""
+    return _level.get()
+
+
+def at_least(level, threshold):
+    return LEVELS.index(level) >= LEVELS.index(threshold)
+
+
+class RouteLimit:
+    def __init__(self, max_concurrent, max_queue, queue_slo_ms, max_wait_ms=None, levels=(REDUCED, STATUS_ONLY)):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_slo = queue_slo_ms / 1000
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else 4 * queue_slo_ms) / 1000
+        self.levels = tuple(levels)
+
+
+class RouteGate:
+    """Concurrency slots, wait queue and pressure estimate for one route."""
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.inflight = 0   # admitted or waiting (updated synchronously on arrival)
+        self.active = 0     # holding a slot
+        self.wait_ewma = 0.0
+        self.service_ewma = 0.0
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Created on first use, inside the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit.max_concurrent)
+        return self._semaphore
+
+    @property
+    def waiting(self):
+        return max(0, self.inflight - self.active)
+
+    def pressure(self):
+        """Max of smoothed queue wait / SLO and queue occupancy (0 = idle, >=1 = over)."""
+        by_wait = self.wait_ewma / self.limit.queue_slo if self.limit.queue_slo > 0 else 0.0
+        by_queue = self.waiting / self.limit.max_queue if self.limit.max_queue > 0 else 0.0
+        return max(by_wait, by_queue)
+
+    def level_for(self, pressure):
+        """Degradation level for a pressure value, limited to the route's levels."""
+        if pressure < 0.5:
+            wanted = NORMAL
+        elif pressure < 1.0:
+            wanted = REDUCED
+        else:
+            wanted = STATUS_ONLY
+        # Deepest allowed level not beyond the wanted one
+        level = NORMAL
+        for candidate in self.limit.levels:
+            if at_least(wanted, candidate):
+                level = candidate
+        return level
+
+    def retry_after(self):
+        """Seconds until a retry is likely to be admitted (at least 1)."""
+        backlog = (self.waiting + self.active) / max(1, self.limit.max_concurrent)
+        return max(1, math.ceil(backlog * max(self.service_ewma, self.wait_ewma)))
+
+    def observe(self, wait, service=None):
+        self.wait_ewma += EWMA_ALPHA * (wait - self.wait_ewma)
+        if service is not None:
+            self.service_ewma += EWMA_ALPHA * (service - self.service_ewma)
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware applying RouteLimits by path prefix
+    ({"/process-frame": RouteLimit(...), ...}). Other paths pass through.
+    """
+
+    def __init__(self, app, limits=None, enabled=True):
+        self.app = app
+        self.enabled = enabled
+        self.gates = [(prefix, RouteGate(prefix, limit)) for prefix, limit in (limits or {}).items()]
+        # Longest prefix first
+        self.gates.sort(key=lambda item: len(item[0]), reverse=True)
+        ADMISSION_QUEUE.set_function(lambda: {(gate.name,): gate.waiting for _, gate in self.gates})
+
+    def gate_for(self, path):
+        for prefix, gate in self.gates:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return gate
+        return None
+
+    async def _shed(self, gate, send, reason):
+        ADMISSION_DECISIONS.inc(gate.name, SHED)
+        body = json.dumps({"detail": f"Server overloaded ({reason}), retry later", "degradation": SHED}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(gate.retry_after()).encode()),
+                (b"x-degradation", SHED.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        gate = self.gate_for(scope.get("path", "")) if self.enabled and scope["type"] == "http" else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        if gate.inflight >= gate.limit.max_concurrent + gate.limit.max_queue:
+            await self._shed(gate, send, "queue full")
+            return
+
+        arrived = time.perf_counter()
+        gate.inflight += 1
+        try:
+            await asyncio.wait_for(gate.semaphore.acquire(), gate.limit.max_wait)
+        except asyncio.TimeoutError:
+            gate.inflight -= 1
+            gate.observe(time.perf_counter() - arrived)
+            await self._shed(gate, send, "queue wait over SLO")
+            return
+        except BaseException:
+            gate.inflight -= 1
+            raise
+
+        started = time.perf_counter()
+        wait = started - arrived
+        gate.active += 1
+        # Pressure includes the requests queued behind this one
+        level = gate.level_for(max(gate.pressure(), wait / gate.limit.queue_slo if gate.limit.queue_slo else 0.0))
+        ADMISSION_DECISIONS.inc(gate.name, level)
+        token = _level.set(level)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-degradation", level.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _level.reset(token)
+            gate.active -= 1
+            gate.inflight -= 1
+            gate.observe(wait, time.perf_counter() - started)
+            gate.semaphore.release()
@@ -0,0 +1,211 @@
+"""
+Audio decoding layer for the SER path.
+
+Browsers record webm/opus (or ogg, mp4/aac), which soundfile can't parse.
+This module decodes any container ffmpeg understands to mono float32 at the
+model's sample rate:
+
+- decode_audio(): whole-buffer decode. WAV/FLAC/OGG go through soundfile
+  (no subprocess); anything else goes through ffmpeg.
+- StreamingDecoder: an ffmpeg process fed chunk by chunk while the upload is
+  still arriving, so decoding overlaps the network transfer and the PCM is
+  ready (almost) as soon as the last byte lands.
+
+ffmpeg is located via FFMPEG_BINARY or PATH (the Dockerfile installs it).
+"""
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+import soundfile as sf
+import librosa
+
+try:
+    from .ser_features import to_mono
+except ImportError:
+    try:
+        from games.ser_features import to_mono
+    except ImportError:
+        from ser_features import to_mono
+
+# Chunk size used when reading uploads / pipes
+CHUNK_SIZE = 64 * 1024
+
+
+class AudioDecodeError(Exception):
+    """Raised when an audio buffer can't be decoded."""
+
+
+def find_ffmpeg():
+    """Path to the ffmpeg binary, or None if unavailable."""
+    binary = os.environ.get("FFMPEG_BINARY")
+    if binary and os.path.exists(binary):
+        return binary
+    return shutil.which("ffmpeg")
+
+
+def _ffmpeg_command(ffmpeg, source, sample_rate):
+    return [
+        ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin",
+        "-i", source,
+        "-vn", "-ac", "1", "-ar", str(int(sample_rate)),
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "pipe:1",
+    ]
+
+
+def resample(X, orig_sr, target_sr):
+    """Resample mono float32 audio if the rates differ."""
+    if target_sr is None or orig_sr == target_sr:
+        return X, orig_sr
+    return librosa.resample(X, orig_sr=orig_sr, target_sr=target_sr).astype(np.float32), target_sr
+
+
+class StreamingDecoder:
+    """
+    Incremental decoder: feed() compressed bytes as they arrive, finish() to
+    get the PCM. ffmpeg decodes concurrently; its stdout is drained by a
+    background thread so the pipes never fill up.
+    """
+
+    def __init__(self, sample_rate, ffmpeg=None, max_input_bytes=None):
+        ffmpeg = ffmpeg or find_ffmpeg()
+        if ffmpeg is None:
+            raise AudioDecodeError("ffmpeg not found (set FFMPEG_BINARY or install ffmpeg)")
+
+        self.sample_rate = int(sample_rate)
+        self.max_input_bytes = max_input_bytes
+        self.bytes_in = 0
+
+        self._pcm = []
+        self._stderr = b""
+        self._proc = subprocess.Popen(
+            _ffmpeg_command(ffmpeg, "pipe:0", self.sample_rate),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self._stdout_thread = threading.Thread(target=self._drain_stdout, daemon=True)
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stdout_thread.start()
+        self._stderr_thread.start()
+
+    def _drain_stdout(self):
+        read = self._proc.stdout.read
+        while True:
+            chunk = read(CHUNK_SIZE)
+            if not chunk:
+                break
+            self._pcm.append(chunk)
+
+    def _drain_stderr(self):
+        self._stderr = self._proc.stderr.read()
+
+    def feed(self, chunk):
+        """Push the next piece of the compressed stream."""
+        if not chunk:
+            return
+        self.bytes_in += len(chunk)
+        if self.max_input_bytes is not None and self.bytes_in > self.max_input_bytes:
+            self.abort()
+            raise AudioDecodeError(f"Audio upload exceeds {self.max_input_bytes} bytes")
+        try:
+            self._proc.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            # ffmpeg gave up (bad data); finish() reports the error
+            pass
+
+    def finish(self, timeout=30.0):
+        """Close the input and return (samples, sample_rate)."""
+        try:
+            self._proc.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+        try:
+            self._proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.abort()
+            raise AudioDecodeError("ffmpeg timed out")
+        self._stdout_thread.join()
+        self._stderr_thread.join()
+
+        if self._proc.returncode != 0:
+            message = self._stderr.decode("utf-8", "replace").strip().splitlines()
+            raise AudioDecodeError(f"ffmpeg failed: {message[-1] if message else self._proc.returncode}")
+
+        pcm = b"".join(self._pcm)
+        self._pcm = []
+        if len(pcm) < 4:
+            raise AudioDecodeError("No audio samples decoded")
+        return np.frombuffer(pcm, dtype=np.float32), self.sample_rate
+
+    def abort(self):
+        """Kill ffmpeg if it's still running and wait for the drain threads."""
+        if self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+        try:
+            self._proc.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+        self._stdout_thread.join()
+        self._stderr_thread.join()
+
+
+def _decode_with_soundfile(data, sample_rate):
+    with sf.SoundFile(io.BytesIO(data)) as sound_file:
+        X = sound_file.read(dtype="float32")
+        orig_sr = sound_file.samplerate
+    return resample(to_mono(X), orig_sr, sample_rate)
+
+
+def _decode_with_ffmpeg_file(data, sample_rate, ffmpeg):
+    """Seekable decode for containers that keep their index at the end (mp4/m4a)."""
+    with tempfile.NamedTemporaryFile(suffix=".audio") as tmp:
+        tmp.write(data)
+        tmp.flush()
+        result = subprocess.run(
+            _ffmpeg_command(ffmpeg, tmp.name, sample_rate),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=60,
+        )
+    if result.returncode != 0 or len(result.stdout) < 4:
+        raise AudioDecodeError(result.stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+    return np.frombuffer(result.stdout, dtype=np.float32), sample_rate
+
+
+def decode_audio(data, sample_rate=None):
+    """
+    Decode a complete audio buffer (bytes or file-like) to (mono float32, sample_rate).
+    sample_rate=None keeps the native rate for soundfile formats.
+    """
+    if not isinstance(data, (bytes, bytearray)):
+        data = data.read()
+    data = bytes(data)
+    if not data:
+        raise AudioDecodeError("Empty audio buffer")
+
+    # Fast path: formats libsndfile reads natively
+    try:
+        return _decode_with_soundfile(data, sample_rate)
+    except Exception:
+        pass
+
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        raise AudioDecodeError("Unsupported audio format and ffmpeg is not available")
+
+    target_sr = sample_rate or 48000
+    decoder = StreamingDecoder(target_sr, ffmpeg=ffmpeg)
+    for start in range(0, len(data), CHUNK_SIZE):
+        decoder.feed(data[start:start + CHUNK_SIZE])
+    try:
+        return decoder.finish()
+    except AudioDecodeError:
+        # Non-streamable container: retry from a seekable temp file
+        return _decode_with_ffmpeg_file(data, target_sr, ffmpeg)
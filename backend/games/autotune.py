@@ -0,0 +1,152 @@
+"""
+Latency-aware model auto-tuning.
+
+HandGestureStream and the desktop GestureController used to hard-code
+model_complexity=1, which misses the frame budget on weaker machines.
+ModelTuner runs a MediaPipe graph picked from a ladder of configurations
+(heaviest first) and moves along it based on the smoothed inference time:
+
+- step to a lighter configuration when the EWMA stays above the budget
+  for `patience_down` frames;
+- step back to a heavier one when it stays below `low_water` x budget for
+  `patience_up` frames;
+- anything in between holds the current level (hysteresis band).
+
+Graphs are built on first use and kept, so switching back is a swap, not a
+rebuild. The first `settle` frames at start and after a switch aren't counted
+(re-detection is slower than tracking). If an upgrade has to be undone
+before it has held for `patience_up` frames, the next upgrade waits twice
+as long (up to MAX_BACKOFF x), so a level that doesn't fit stops flapping.
+
+Environment: HAND_AUTOTUNE=0 pins the heaviest level,
+HAND_FRAME_BUDGET_MS=33 sets the budget.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_MS = float(os.environ.get("HAND_FRAME_BUDGET_MS", "33"))
+AUTOTUNE_ENABLED = os.environ.get("HAND_AUTOTUNE", "1").lower() not in ("0", "false", "no", "off")
+
+EWMA_ALPHA = 0.1
+MAX_BACKOFF = 16
+
+# Heaviest first. The web stream keeps both hands at every level: swipes
+# are tracked per hand, and dropping one under load would silently ignore
+# whichever hand MediaPipe didn't pick.
+HAND_LEVELS = (
+    {"model_complexity": 1, "max_num_hands": 2},
+    {"model_complexity": 0, "max_num_hands": 2},
+)
+SINGLE_HAND_LEVELS = (
+    {"model_complexity": 1, "max_num_hands": 1},
+    {"model_complexity": 0, "max_num_hands": 1},
+)
+
+
+class ModelTuner:
+    def __init__(self, levels, factory, budget_ms=DEFAULT_BUDGET_MS, enabled=AUTOTUNE_ENABLED,
+                 low_water=0.6, patience_down=10, patience_up=90, settle=5, name="model"):
+        if not levels:
+            raise ValueError("ModelTuner needs at least one level")
+        self.levels = [dict(level) for level in levels]
+        self.factory = factory
+        self.budget_ms = budget_ms
+        self.enabled = enabled
+        self.low_water = low_water
+        self.patience_down = patience_down
+        self.base_patience_up = patience_up
+        self.patience_up = patience_up
+        self.settle = settle
+        self.name = name
+
+        self.level = 0
+        self.ewma_ms = None
+        self.switches = 0
+        self._models = {}
+        self._lock = threading.Lock()
+        self._over = 0
+        self._under = 0
+        # The first frames include graph start-up
+        self._settling = settle
+        self._frames_at_level = 0
+        self._upgraded = False
+
+    @property
+    def model(self):
+        """Graph for the current level (built on first use, then cached)."""
+        level = self.level
+        model = self._models.get(level)
+        if model is None:
+            with self._lock:
+                model = self._models.get(level)
+                if model is None:
+                    model = self._models[level] = self.factory(**self.levels[level])
+        return model
+
+    @property
+    def config(self):
+        """Active configuration, as reported in the stream status."""
+        return dict(self.levels[self.level], auto=self.enabled, budget_ms=self.budget_ms)
+
+    def use(self, config):
+        """
+        Switch to `config` (added to the ladder if it isn't on it), e.g. to
+        replay frames with the configuration they were recorded with.
+        """
+        config = dict(config)
+        if config not in self.levels:
+            self.levels.append(config)
+        self.level = self.levels.index(config)
+
+    def process(self, image):
+        """Run the current graph on an RGB image and feed its latency to the tuner."""
+        model = self.model
+        start = time.perf_counter()
+        results = model.process(image)
+        self.observe(time.perf_counter() - start)
+        return results
+
+    def observe(self, seconds):
+        if not self.enabled:
+            return
+        self._frames_at_level += 1
+        if self._settling > 0:
+            self._settling -= 1
+            return
+        ms = seconds * 1000
+        self.ewma_ms = ms if self.ewma_ms is None else self.ewma_ms + EWMA_ALPHA * (ms - self.ewma_ms)
+
+        if self.ewma_ms > self.budget_ms:
+            self._over, self._under = self._over + 1, 0
+        elif self.ewma_ms < self.budget_ms * self.low_water:
+            self._over, self._under = 0, self._under + 1
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.patience_down and self.level < len(self.levels) - 1:
+            self._switch(self.level + 1)
+        elif self._under >= self.patience_up and self.level > 0:
+            self._switch(self.level - 1)
+        elif self._upgraded and self._frames_at_level >= self.patience_up:
+            # The upgrade held: later upgrades don't need to wait longer
+            self._upgraded = False
+            self.patience_up = self.base_patience_up
+
+    def _switch(self, level):
+        lighter = level > self.level
+        if lighter and self._upgraded and self._frames_at_level < self.patience_up:
+            self.patience_up = min(self.patience_up * 2, self.base_patience_up * MAX_BACKOFF)
+        logger.info("Switching %s configuration", self.name, extra={
+            "from_config": self.levels[self.level], "to_config": self.levels[level],
+            "ewma_ms": round(self.ewma_ms, 2), "budget_ms": self.budget_ms})
+        self.level = level
+        self._upgraded = not lighter
+        self.switches += 1
+        self.ewma_ms = None
+        self._over = self._under = 0
+        self._frames_at_level = 0
+        self._settling = self.settle
@@ -0,0 +1,106 @@
+"""
+Micro-batching for async endpoints.
+
+Concurrent requests submit one item each; the batcher groups whatever
+arrives within a short window (or until the batch is full) and hands the
+whole list to a synchronous handler running in a worker thread. Used by
+/predict-emotion so concurrent clips share one predict_proba call.
+"""
+import asyncio
+import time
+
+
+class MicroBatcher:
+    def __init__(self, handler, max_batch_size=16, max_wait_ms=10.0, executor=None):
+        """
+        :param handler: Callable taking a list of items and returning a list of results (same order)
+        :param max_batch_size: Largest batch handed to the handler
+        :param max_wait_ms: How long the first item of a batch waits for company
+        :param executor: Executor for the handler (None = asyncio default thread pool)
+        """
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+
+        self._loop = None
+        self._queue = None
+        self._worker = None
+
+        # Counters for monitoring
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # First use, or the event loop changed (e.g. test clients)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_seconds": self.last_batch_seconds,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def _collect(self):
+        """Wait for one item, then gather more until full or the window closes."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Anything already queued rides along for free
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests cancelled while waiting don't need work done
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            items = [item for item, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self.handler, items)
+                if len(results) != len(items):
+                    # zip() would leave the unmatched requests waiting forever
+                    raise RuntimeError(f"Batch handler returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            self.last_batch_size = len(items)
+            self.last_batch_seconds = time.perf_counter() - start
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
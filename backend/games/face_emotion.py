@@ -0,0 +1,266 @@
+"""
+Facial emotion recognition with DeepFace's emotion model, for the API.
+
+emotion_game.py calls DeepFace.analyze every 0.5 s on the desktop. Every call
+re-runs face detection (detector_backend='opencv') and DeepFace's generic
+preprocessing before a single-image predict; the API had no learned-model
+emotion path at all (/process-frame type=emotion uses FaceMesh heuristics).
+
+FaceEmotionEngine splits analyze() into its parts so each can be cheap:
+
+- the emotion CNN is built once (DeepFace.build_model) and kept warm;
+- faces are found with the same Haar cascade as detector_backend='opencv',
+  on a frame downscaled to DETECT_WIDTH;
+- a session's last face box is reused between keyframes (every
+  KEYFRAME_INTERVAL frames, or sooner once the box is lost), so most frames
+  skip detection. A reused box is checked against a small thumbnail taken
+  at the keyframe; if the region changed by more than REUSE_MAX_CHANGE
+  (the face moved away or left), the frame becomes a keyframe instead;
+- the face is cropped and preprocessed like DeepFace does (48x48 grayscale,
+  scaled to 0..1), and predict_batch() classifies a list of crops in one
+  model call. The API feeds it from a MicroBatcher, so crops from concurrent
+  requests share a forward pass.
+
+Environment: FACE_KEYFRAME_INTERVAL=5, FACE_DETECT_WIDTH=320,
+FACE_REUSE_MAX_CHANGE=20.
+"""
+import importlib.util
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# DeepFace's emotion model output order
+EMOTIONS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+INPUT_SIZE = 48
+KEYFRAME_INTERVAL = int(os.environ.get("FACE_KEYFRAME_INTERVAL", "5"))
+DETECT_WIDTH = int(os.environ.get("FACE_DETECT_WIDTH", "320"))
+# Reused boxes are widened so a face moving between keyframes stays inside
+BOX_MARGIN = 0.1
+# Mean absolute difference (gray levels, brightness-normalized) between a
+# reused box's thumbnail and the keyframe's above which detection runs again
+REUSE_MAX_CHANGE = float(os.environ.get("FACE_REUSE_MAX_CHANGE", "20"))
+THUMBNAIL_SIZE = 16
+
+
+class FaceEmotionUnavailable(Exception):
+    """DeepFace (and its TensorFlow backend) isn't installed or won't load."""
+
+
+def deepface_available():
+    return importlib.util.find_spec("deepface") is not None
+
+
+def load_emotion_model():
+    """DeepFace's emotion CNN (a Keras model taking (N, 48, 48, 1) in 0..1)."""
+    if not deepface_available():
+        raise FaceEmotionUnavailable("deepface is not installed")
+    from deepface import DeepFace
+    try:
+        # deepface >= 0.0.90
+        model = DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+    except TypeError:
+        model = DeepFace.build_model("Emotion")
+    # Newer versions wrap the Keras model in a client object
+    return getattr(model, "model", model)
+
+
+# ============== DETECTION ==============
+class FaceDetector:
+    """Largest frontal face via OpenCV's Haar cascade (DeepFace's 'opencv' backend)."""
+
+    def __init__(self, detect_width=DETECT_WIDTH):
+        self.detect_width = detect_width
+        path = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.cascade = cv2.CascadeClassifier(path)
+        if self.cascade.empty():
+            raise FaceEmotionUnavailable(f"Haar cascade not found at {path}")
+        # detectMultiScale isn't safe to call concurrently on one classifier
+        self._lock = threading.Lock()
+
+    def detect(self, gray):
+        """(x, y, w, h) of the largest face in a grayscale frame, or None."""
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.detect_width / width)
+        small = gray if scale == 1.0 else cv2.resize(gray, (int(width * scale), int(height * scale)),
+                                                     interpolation=cv2.INTER_AREA)
+        with self._lock:
+            faces = self.cascade.detectMultiScale(small, scaleFactor=1.1, minNeighbors=10)
+        if len(faces) == 0:
+            return None
+        x, y, w, h = max(faces, key=lambda face: face[2] * face[3])
+        return tuple(int(round(value / scale)) for value in (x, y, w, h))
+
+
+def thumbnail(gray, box):
+    """Brightness-normalized THUMBNAIL_SIZE^2 view of a box, to tell whether it still holds the same face."""
+    x, y, w, h = box
+    small = cv2.resize(gray[y:y + h, x:x + w], (THUMBNAIL_SIZE, THUMBNAIL_SIZE),
+                       interpolation=cv2.INTER_AREA).astype(np.float32)
+    return small - small.mean()
+
+
+def widen(box, width, height, margin=BOX_MARGIN):
+    x, y, w, h = box
+    dx, dy = int(w * margin), int(h * margin)
+    x0, y0 = max(0, x - dx), max(0, y - dy)
+    return x0, y0, min(width, x + w + dx) - x0, min(height, y + h + dy) - y0
+
+
+class FaceBoxCache:
+    """Last face box per session (LRU, idle timeout), with a keyframe countdown."""
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL, max_sessions=256, idle_seconds=30):
+        self.keyframe_interval = keyframe_interval
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._boxes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reusable(self, session):
+        """The session's box if this frame isn't a keyframe, else None (detect)."""
+        if not session or self.keyframe_interval <= 1:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._boxes.get(session)
+            if entry is None or now - entry["seen"] > self.idle_seconds:
+                return None
+            if entry["since_keyframe"] + 1 >= self.keyframe_interval:
+                return None
+            entry["since_keyframe"] += 1
+            entry["seen"] = now
+            self._boxes.move_to_end(session)
+            return entry["box"]
+
+    def update(self, session, box, reference=None):
+        """Record a keyframe's detection (None forgets the box) and its thumbnail."""
+        if not session:
+            return
+        with self._lock:
+            if box is None:
+                self._boxes.pop(session, None)
+                return
+            self._boxes[session] = {"box": box, "reference": reference, "since_keyframe": 0,
+                                    "seen": time.monotonic()}
+            self._boxes.move_to_end(session)
+            while len(self._boxes) > self.max_sessions:
+                self._boxes.popitem(last=False)
+
+    def reference(self, session):
+        """Thumbnail recorded with the session's box, or None."""
+        with self._lock:
+            entry = self._boxes.get(session)
+            return None if entry is None else entry["reference"]
+
+    def __len__(self):
+        return len(self._boxes)
+
+
+# ============== ENGINE ==============
+def preprocess(gray, box):
+    """Crop -> (48, 48, 1) float32 in 0..1, as DeepFace feeds its emotion model."""
+    x, y, w, h = box
+    face = cv2.resize(gray[y:y + h, x:x + w], (INPUT_SIZE, INPUT_SIZE), interpolation=cv2.INTER_AREA)
+    return (face.astype(np.float32) / 255.0)[:, :, None]
+
+
+class FaceEmotionEngine:
+    def __init__(self, model=None, detector=None, boxes=None):
+        """
+        :param model: Emotion model with predict((N, 48, 48, 1)) -> (N, 7) probabilities
+                      (None = DeepFace's, loaded on first use)
+        :param detector: FaceDetector (None = built on first use)
+        :param boxes: FaceBoxCache for per-session box reuse
+        """
+        self._model = model
+        self._detector = detector
+        self.boxes = FaceBoxCache() if boxes is None else boxes
+        self._lock = threading.Lock()
+        self.detections = 0
+        self.reused = 0
+        self.stale = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = load_emotion_model()
+        return self._model
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            with self._lock:
+                if self._detector is None:
+                    self._detector = FaceDetector()
+        return self._detector
+
+    def load(self):
+        """Build the emotion model and the face detector now rather than on first use."""
+        return self.model, self.detector
+
+    def locate(self, frame, session=None):
+        """
+        Face crop for a BGR frame: {"crop", "box", "keyframe"}, or None when
+        there's no face. Reuses the session's box between keyframes unless
+        the region no longer looks like the keyframe's.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        box = self.boxes.reusable(session)
+        if box is not None and not self._unchanged(gray, box, session):
+            self.stale += 1
+            box = None
+        keyframe = box is None
+        if keyframe:
+            self.detections += 1
+            box = self.detector.detect(gray)
+            self.boxes.update(session, box, None if box is None else thumbnail(gray, box))
+            if box is None:
+                return None
+        else:
+            self.reused += 1
+            box = widen(box, width, height)
+        if box[2] <= 0 or box[3] <= 0:
+            return None
+        return {"crop": preprocess(gray, box), "box": box, "keyframe": keyframe}
+
+    def _unchanged(self, gray, box, session):
+        reference = self.boxes.reference(session)
+        x, y, w, h = box
+        if reference is None or x + w > gray.shape[1] or y + h > gray.shape[0]:
+            return False
+        return float(np.abs(thumbnail(gray, box) - reference).mean()) <= REUSE_MAX_CHANGE
+
+    def predict_batch(self, crops):
+        """Emotion scores for a list of preprocessed crops, in one model call."""
+        probabilities = self.model.predict(np.stack(crops), verbose=0)
+        results = []
+        for row in np.asarray(probabilities, dtype=np.float64):
+            # Percentages, like DeepFace.analyze
+            scores = {emotion: round(float(p) * 100, 2) for emotion, p in zip(EMOTIONS, row)}
+            results.append({"emotion": EMOTIONS[int(np.argmax(row))], "scores": scores})
+        return results
+
+    def predict(self, frame, session=None):
+        """locate + predict for one frame (no batching)."""
+        face = self.locate(frame, session)
+        if face is None:
+            return {"face_detected": False}
+        result = self.predict_batch([face["crop"]])[0]
+        return dict(result, face_detected=True, box=list(face["box"]), keyframe=face["keyframe"])
+
+    def stats(self):
+        return {"detections": self.detections, "reused_boxes": self.reused, "stale_boxes": self.stale,
+                "sessions": len(self.boxes)}
+
+
+face_emotion_engine = FaceEmotionEngine()
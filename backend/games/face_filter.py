@@ -6,6 +6,13 @@ import cv2
 import numpy as np
 import mediapipe as mp
 import os
+try:
+    from .frame_buffers import to_rgb
+except ImportError:
+    try:
+        from games.frame_buffers import to_rgb
+    except ImportError:
+        from frame_buffers import to_rgb
 
 class FaceFilterProcessor:
     def __init__(self):
@@ -288,7 +295,7 @@ class FaceFilterProcessor:
         h, w, _ = frame.shape
         
         # Convert to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb_frame = to_rgb(frame)
         results = self.face_mesh.process(rgb_frame)
         
         face_detected = False
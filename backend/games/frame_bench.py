@@ -0,0 +1,371 @@
+"""
+Frame-processing benchmarks for the vision processors.
+
+Feeds frames at several resolutions through each processor's process_frame
+and through the /process-frame endpoint path (JPEG decode, process, JPEG
+encode, base64 JSON body), and reports frames/sec, p50/p99 latency, CPU time per frame
+(all threads, so MediaPipe's worker threads count) and peak Python memory
+(tracemalloc, measured in a separate pass so it doesn't skew timing).
+
+"pose" runs PoseStream's default engine (Holistic, see POSE_ENGINE);
+"pose-only" (the Pose solution alone) and "pose-lite" (Pose at
+model_complexity=0) are there for comparison.
+
+Frames come from a recorded video (--video) or synthetic scenes (--scenes,
+both by default, so the baseline covers both paths): moving shapes, which
+exercise the "nothing detected" path, and a drawn person that MediaPipe
+Pose and Holistic track, which exercises detection and landmark drawing.
+Results are keyed <processor>@<w>x<h> for shapes (and video) and
+<processor>+figure@<w>x<h> for the figure. A recording of a real person is
+still the most representative input.
+
+A stored baseline (benchmarks/frame_baseline.json) makes regressions fail:
+    python -m games.frame_bench run
+    python -m games.frame_bench check --threshold 0.3
+    python -m games.frame_bench update-baseline
+
+Baselines are machine-specific; regenerate them on the machine that checks,
+and in the same commit as any change to the code they measure.
+"""
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+try:
+    from .frame_buffers import FrameArena, encode_jpeg, json_image_body, use_arena
+except ImportError:
+    try:
+        from games.frame_buffers import FrameArena, encode_jpeg, json_image_body, use_arena
+    except ImportError:
+        from frame_buffers import FrameArena, encode_jpeg, json_image_body, use_arena
+
+RESOLUTIONS = ((320, 240), (640, 480), (1280, 720))
+DEFAULT_FRAMES = 60
+DEFAULT_WARMUP = 5
+DEFAULT_ROUNDS = 3
+DEFAULT_THRESHOLD = 0.3
+MEMORY_FRAMES = 10
+BASELINE_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "frame_baseline.json")
+)
+
+
+class BenchmarkUnavailable(Exception):
+    """Raised when a processor can't be built here (missing dependency or model)."""
+
+
+# ============== PROCESSORS ==============
+def _streaming(cls_name, **kwargs):
+    def factory():
+        from games import streaming
+        try:
+            processor = getattr(streaming, cls_name)(**kwargs)
+        except OSError as e:
+            # MediaPipe downloads the non-default model variants on first use
+            raise BenchmarkUnavailable(f"model not available: {e}")
+        return processor, processor.process_frame
+    return factory
+
+
+def _gaze():
+    try:
+        from games.gaze_tracker import GazeTracker
+    except ImportError as e:
+        raise BenchmarkUnavailable(f"dlib not available: {e}")
+    tracker = GazeTracker()
+    if tracker.predictor is None:
+        raise BenchmarkUnavailable("dlib shape predictor model not found")
+    return tracker, lambda frame: tracker.process_frame(frame)[0]
+
+
+def _filter():
+    from games.face_filter import FaceFilterProcessor
+    processor = FaceFilterProcessor()
+    return processor, lambda frame: processor.process_frame(frame, "sunglasses")[0]
+
+
+# name -> factory() returning (processor, fn(frame) -> annotated frame)
+PROCESSORS = {
+    "gesture": _streaming("HandGestureStream"),
+    "pose": _streaming("PoseStream"),
+    "pose-only": _streaming("PoseStream", engine="pose", model_complexity=1),
+    "pose-lite": _streaming("PoseStream", engine="pose", model_complexity=0),
+    "emotion": _streaming("EmotionStream"),
+    "gaze": _gaze,
+    "filter": _filter,
+}
+
+
+# ============== FRAMES ==============
+def synthetic_frames(width, height, count, seed=0):
+    """Deterministic frames with a textured background and moving shapes."""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 5)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        t = i / max(1, count - 1)
+        cx, cy = int(width * (0.3 + 0.4 * t)), int(height * 0.5)
+        r = max(8, min(width, height) // 6)
+        cv2.circle(frame, (cx, cy), r, (150, 170, 200), -1)
+        cv2.rectangle(frame, (cx - r // 2, cy + r), (cx + r // 2, min(height - 1, cy + 3 * r)), (90, 120, 160), -1)
+        frames.append(frame)
+    return frames
+
+
+def _draw_figure(frame, cx, scale):
+    """A flat standing person, arms out: enough for MediaPipe Pose to lock on."""
+    skin, shirt, pants = (150, 180, 230), (60, 60, 180), (90, 60, 40)
+
+    def p(x, y):
+        return int(cx + x * scale), int(y * scale)
+
+    cv2.ellipse(frame, p(0, 110), (int(38 * scale), int(48 * scale)), 0, 0, 360, skin, -1)
+    for x in (-14, 14):
+        cv2.circle(frame, p(x, 100), max(1, int(5 * scale)), (40, 40, 40), -1)
+    cv2.ellipse(frame, p(0, 130), (int(12 * scale), int(5 * scale)), 0, 0, 180, (50, 50, 150), -1)
+    cv2.rectangle(frame, p(-50, 165), p(50, 300), shirt, -1)
+    for side in (-1, 1):
+        cv2.line(frame, p(45 * side, 175), p(110 * side, 290), shirt, max(1, int(24 * scale)))
+        cv2.circle(frame, p(110 * side, 295), max(1, int(12 * scale)), skin, -1)
+        cv2.line(frame, p(25 * side, 300), p(35 * side, 460), pants, max(1, int(30 * scale)))
+
+
+def figure_frames(width, height, count):
+    """Deterministic frames of a drawn person stepping sideways on a plain wall."""
+    scale = height / 480
+    frames = []
+    for i in range(count):
+        frame = np.full((height, width, 3), 200, dtype=np.uint8)
+        t = i / max(1, count - 1)
+        _draw_figure(frame, width * (0.45 + 0.1 * t), scale)
+        frames.append(frame)
+    return frames
+
+
+SCENES = {"shapes": synthetic_frames, "figure": figure_frames}
+
+
+def video_frames(path, width, height, count):
+    """Up to `count` frames from a video, resized to width x height (looped if short)."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < count:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+    finally:
+        cap.release()
+    if not frames:
+        raise ValueError(f"No frames could be read from {path}")
+    while len(frames) < count:
+        frames.extend(frames[:count - len(frames)])
+    return frames
+
+
+# ============== MEASUREMENT ==============
+def endpoint_path(fn, jpeg_bytes, arena=None):
+    """
+    Mirror of /process-frame: decode, process (with a reused frame arena),
+    encode, JSON body with the base64 data URL.
+    """
+    img = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_COLOR)
+    with use_arena(arena if arena is not None else FrameArena()):
+        processed = fn(img)
+    jpeg = encode_jpeg(processed)
+    return json_image_body({"status": "active"}, jpeg) if jpeg is not None else None
+
+
+def _summarize(latencies, cpu_seconds):
+    latencies = np.asarray(latencies)
+    total = latencies.sum()
+    return {
+        "fps": float(len(latencies) / total) if total > 0 else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "cpu_ms": float(cpu_seconds / len(latencies) * 1000),
+    }
+
+
+def measure(fn, inputs, warmup=DEFAULT_WARMUP, prepare=None, rounds=DEFAULT_ROUNDS):
+    """
+    Time fn over inputs (after warmup calls) for several rounds and keep the
+    fastest round, then re-run a few under tracemalloc for the peak
+    allocation. prepare(input) runs untimed first (e.g. copying a frame the
+    processor will draw on).
+    """
+    prepare = prepare or (lambda x: x)
+    for item in inputs[:warmup]:
+        fn(prepare(item))
+
+    result = None
+    for _ in range(max(1, rounds)):
+        latencies = []
+        cpu = 0.0
+        for item in inputs:
+            arg = prepare(item)
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            fn(arg)
+            latencies.append(time.perf_counter() - start)
+            cpu += time.process_time() - cpu_start
+        summary = _summarize(latencies, cpu)
+        # Best round: the least disturbed by other load on the machine
+        if result is None or summary["p50_ms"] < result["p50_ms"]:
+            result = summary
+
+    tracemalloc.start()
+    try:
+        for item in inputs[:MEMORY_FRAMES]:
+            arg = prepare(item)
+            tracemalloc.reset_peak()
+            fn(arg)
+        # reset_peak() per frame: the peak is the worst single frame
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+    result["frames"] = len(inputs)
+    return result
+
+
+def run_benchmarks(processors=None, resolutions=RESOLUTIONS, frames=DEFAULT_FRAMES,
+                   warmup=DEFAULT_WARMUP, video=None, endpoint=True, rounds=DEFAULT_ROUNDS,
+                   scenes=tuple(SCENES)):
+    """
+    Benchmark each processor at each resolution, on the video or on each
+    synthetic scene. Returns {"<name>@<w>x<h>": {...}, "<name>/endpoint@<w>x<h>": {...}}
+    (names get a "+<scene>" suffix for scenes other than shapes); unavailable
+    processors are reported as {"skipped": reason}.
+    """
+    results = {}
+    for name in processors or PROCESSORS:
+        try:
+            _, fn = PROCESSORS[name]()
+        except BenchmarkUnavailable as e:
+            print(f"Skipping {name}: {e}")
+            results[name] = {"skipped": str(e)}
+            continue
+
+        for scene in ((None,) if video else scenes):
+            label = name if scene in (None, "shapes") else f"{name}+{scene}"
+            for width, height in resolutions:
+                if video:
+                    inputs = video_frames(video, width, height, frames)
+                else:
+                    inputs = SCENES[scene](width, height, frames)
+                results[f"{label}@{width}x{height}"] = measure(fn, inputs, warmup, prepare=np.copy, rounds=rounds)
+
+                if endpoint:
+                    encoded = [cv2.imencode(".jpg", frame)[1].tobytes() for frame in inputs]
+                    arena = FrameArena()
+                    results[f"{label}/endpoint@{width}x{height}"] = measure(
+                        lambda data: endpoint_path(fn, data, arena), encoded, warmup, rounds=rounds
+                    )
+    return results
+
+
+# ============== BASELINE ==============
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH, frames=DEFAULT_FRAMES):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    doc = {
+        "machine": {"platform": platform.platform(), "processor": platform.processor(),
+                    "cpu_count": os.cpu_count(), "python": platform.python_version()},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "frames": frames,
+        "results": {k: v for k, v in results.items() if "skipped" not in v},
+    }
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+    return doc
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Regressions beyond `threshold` (fractional) versus the baseline:
+    lower fps, higher p50 latency or higher peak memory. p99 is reported
+    but not gated (too noisy on shared machines).
+    Returns a list of human-readable failures.
+    """
+    failures = []
+    for key, base in baseline.get("results", {}).items():
+        current = results.get(key)
+        if current is None or "skipped" in current:
+            continue
+        if current["fps"] < base["fps"] * (1 - threshold):
+            failures.append(f"{key}: fps {current['fps']:.1f} < baseline {base['fps']:.1f}")
+        if current["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            failures.append(f"{key}: p50 {current['p50_ms']:.2f} ms > baseline {base['p50_ms']:.2f} ms")
+        # Small absolute slack so sub-MB noise can't fail the check
+        if current["peak_mb"] > base["peak_mb"] * (1 + threshold) + 0.5:
+            failures.append(f"{key}: peak {current['peak_mb']:.1f} MB > baseline {base['peak_mb']:.1f} MB")
+    return failures
+
+
+def print_results(results):
+    print(f"{'benchmark':<38} {'fps':>8} {'p50 ms':>8} {'p99 ms':>8} {'cpu ms':>8} {'peak MB':>8}")
+    for key, row in results.items():
+        if "skipped" in row:
+            print(f"{key:<38} skipped: {row['skipped']}")
+            continue
+        print(f"{key:<38} {row['fps']:>8.1f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+              f"{row.get('cpu_ms', float('nan')):>8.2f} {row['peak_mb']:>8.2f}")
+
+
+def _parse_resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vision processor benchmarks")
+    parser.add_argument("command", choices=["run", "check", "update-baseline"])
+    parser.add_argument("--processors", nargs="+", choices=list(PROCESSORS), default=None)
+    parser.add_argument("--resolutions", nargs="+", type=_parse_resolution, default=list(RESOLUTIONS),
+                        help="e.g. 640x480 1280x720")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Timed rounds (fastest is kept)")
+    parser.add_argument("--video", default=None, help="Recorded video to use instead of synthetic frames")
+    parser.add_argument("--scenes", nargs="+", choices=list(SCENES), default=list(SCENES),
+                        help="Synthetic scenes to run (ignored with --video)")
+    parser.add_argument("--no-endpoint", action="store_true", help="Skip the decode/encode endpoint path")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--json", default=None, help="Also write results here")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.processors, args.resolutions, args.frames, args.warmup,
+                             args.video, endpoint=not args.no_endpoint, rounds=args.rounds, scenes=args.scenes)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.command == "update-baseline":
+        save_baseline(results, args.baseline, args.frames)
+        print(f"Wrote baseline to {args.baseline}")
+    elif args.command == "check":
+        failures = compare(results, load_baseline(args.baseline), args.threshold)
+        if failures:
+            print(f"\n{len(failures)} regression(s) beyond {args.threshold:.0%}:")
+            for failure in failures:
+                print(f"  {failure}")
+            raise SystemExit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
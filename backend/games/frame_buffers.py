@@ -0,0 +1,167 @@
+"""
+Per-session frame buffer arenas.
+
+A frame used to be copied five or six times on its way through the API:
+cv2.flip and cv2.cvtColor each returned a new array, imencode a new buffer,
+then tobytes / base64 / str.decode / the f-string data URL / json.dumps
+each made another copy of the encoded image.
+
+A FrameArena keeps named, preallocated arrays that are reused while the
+frame size stays the same. Flips, colour conversion and resizes write into
+them with `dst=`, and MediaPipe gets a read-only view of the RGB buffer,
+which it references instead of copying. MediaPipe's process() blocks until
+the graph is idle, so the buffer is free again once it returns. Encoded
+JPEGs go from the imencode buffer straight into the response: base64 once,
+then spliced into a prebuilt JSON body (json_image_body) or yielded
+as a memoryview (MJPEG).
+
+Arenas are kept per session (X-Session-Id) in an LRU pool. The endpoint
+activates one for the request with session_arena(), and processors pick it up
+through to_rgb(). Without an active arena, to_rgb() allocates as before.
+
+cv2.imdecode can't decode into an existing array, so decoding still
+allocates one frame per request.
+"""
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import cv2
+import numpy as np
+
+DEFAULT_MAX_SESSIONS = 64
+DEFAULT_IDLE_SECONDS = 300
+
+_arena = ContextVar("frame_arena", default=None)
+
+
+class FrameArena:
+    """Reusable arrays by name; reallocated only when the shape changes."""
+
+    def __init__(self):
+        self._buffers = {}
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.allocations = 0
+
+    def buffer(self, name, shape, dtype=np.uint8):
+        array = self._buffers.get(name)
+        if array is None or array.shape != tuple(shape) or array.dtype != dtype:
+            array = self._buffers[name] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+        return array
+
+    def to_rgb(self, frame):
+        """BGR -> RGB into the arena; returns a read-only view."""
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.buffer("rgb", frame.shape))
+        return read_only(rgb)
+
+    def mirror(self, frame):
+        return cv2.flip(frame, 1, dst=self.buffer("mirror", frame.shape))
+
+    def resize(self, frame, width, height, interpolation=cv2.INTER_AREA):
+        out = self.buffer("resize", (height, width) + frame.shape[2:], frame.dtype)
+        return cv2.resize(frame, (width, height), dst=out, interpolation=interpolation)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._buffers.values())
+
+
+def read_only(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class ArenaPool:
+    """LRU of FrameArenas by session id, with an idle timeout."""
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, idle_seconds=DEFAULT_IDLE_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._arenas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session):
+        now = time.monotonic()
+        with self._lock:
+            arena = self._arenas.pop(session, None)
+            if arena is None or now - arena.last_used > self.idle_seconds:
+                arena = FrameArena()
+            arena.last_used = now
+            self._arenas[session] = arena
+            while len(self._arenas) > self.max_sessions:
+                self._arenas.popitem(last=False)
+            return arena
+
+    def __len__(self):
+        return len(self._arenas)
+
+
+arena_pool = ArenaPool()
+
+
+@contextmanager
+def use_arena(arena):
+    """Make `arena` the active one (for to_rgb) inside the block."""
+    token = _arena.set(arena)
+    try:
+        yield arena
+    finally:
+        _arena.reset(token)
+
+
+@contextmanager
+def session_arena(session=None, pool=None):
+    """
+    Activate the session's arena for the current request. A request that
+    finds its session's arena busy (concurrent frames from one client) gets
+    a throwaway arena instead of waiting.
+    """
+    arena = (pool or arena_pool).get(session or "")
+    if not arena.lock.acquire(blocking=False):
+        arena = FrameArena()
+        arena.lock.acquire()
+    try:
+        with use_arena(arena):
+            yield arena
+    finally:
+        arena.lock.release()
+
+
+def current_arena():
+    return _arena.get()
+
+
+def to_rgb(frame):
+    """RGB copy of a BGR frame for MediaPipe (into the active arena, if any)."""
+    arena = _arena.get()
+    if arena is None:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return arena.to_rgb(frame)
+
+
+def encode_jpeg(frame, params=()):
+    """JPEG-encode a frame; returns the encoded numpy buffer or None."""
+    ok, buffer = cv2.imencode(".jpg", frame, list(params))
+    return buffer if ok else None
+
+
+def json_image_body(fields, jpeg, key="image"):
+    """
+    JSON object bytes with `key` set to a JPEG data URL. The base64 text is
+    spliced in rather than passed through json.dumps (base64 needs no
+    escaping), so the image is copied twice: by b64encode and by the join.
+    """
+    head = json.dumps(fields, default=str)[:-1]
+    separator = ", " if fields else ""
+    return b"".join((
+        f'{head}{separator}"{key}": "data:image/jpeg;base64,'.encode(),
+        base64.b64encode(jpeg),
+        b'"}',
+    ))
@@ -0,0 +1,182 @@
+"""
+Supervised launcher for the desktop games (gesture, pose, emotion).
+
+Each game used to be started with `subprocess.run([python, script])` on a
+new thread per click: every launch re-imported mediapipe/DeepFace from
+scratch (several seconds) and nothing stopped a second copy from opening
+the same camera.
+
+Games are now forked from a multiprocessing fork server that has the heavy
+libraries already imported (PRELOAD_MODULES), so a launch only pays
+for the fork and the game's own setup. The manager keeps at most one
+process per game, tracks PIDs and exit codes, stops games on request and
+on API shutdown.
+
+Where fork servers aren't available (Windows), games are spawned instead;
+they work the same but don't start faster.
+"""
+import logging
+import multiprocessing
+import os
+import runpy
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+GAMES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (script, display name)
+GAMES = {
+    "gesture": ("gesture_game.py", "Gesture Game"),
+    "pose": ("pose_game.py", "Pose Estimation"),
+    "emotion": ("emotion_game.py", "Emotion Game"),
+}
+
+# Imported once in the fork server; modules that aren't installed are skipped.
+# DeepFace (TensorFlow) is left out: it costs hundreds of MB in the server and
+# only the emotion game uses it. GAME_PRELOAD_MODULES overrides the list.
+PRELOAD_MODULES = tuple(
+    name.strip() for name in os.environ.get("GAME_PRELOAD_MODULES", "numpy,cv2,mediapipe").split(",")
+    if name.strip()
+)
+
+STOP_TIMEOUT = 5.0
+
+
+class GameNotFound(KeyError):
+    """Unknown game name."""
+
+
+def _run_game(path):
+    """Child process entry point: run a game script as __main__."""
+    # The scripts import their helpers with plain `from utils import ...`
+    directory = os.path.dirname(path)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    runpy.run_path(path, run_name="__main__")
+
+
+def _noop():
+    pass
+
+
+class GameManager:
+    def __init__(self, games=None, preload=PRELOAD_MODULES, start_method=None, games_dir=GAMES_DIR):
+        self.games = dict(games or GAMES)
+        self.games_dir = games_dir
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.start_method = start_method
+        self.context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            available = [name for name in preload if self._importable(name)]
+            # "__main__" too (the default), so children don't re-import the API's main module
+            self.context.set_forkserver_preload(["__main__"] + available)
+            self.preload = available
+        else:
+            self.preload = []
+        self.prewarmed_ms = None
+        self._processes = {}  # name -> {"process", "started_at"}
+        self._exited = {}     # name -> {"pid", "exitcode", "started_at", "ended_at"}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _importable(name):
+        import importlib.util
+        try:
+            return importlib.util.find_spec(name) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def prewarm(self):
+        """
+        Start the fork server (importing the preload modules) by running one
+        empty process through it. Later launches fork from the warm server.
+        """
+        start = time.perf_counter()
+        process = self.context.Process(target=_noop, name="game-prewarm")
+        process.start()
+        process.join()
+        self.prewarmed_ms = round((time.perf_counter() - start) * 1000, 1)
+        return self
+
+    def _reap(self, name):
+        """Move a finished game to _exited (caller holds the lock)."""
+        entry = self._processes.get(name)
+        if entry is not None and not entry["process"].is_alive():
+            process = entry["process"]
+            process.join(0)
+            self._exited[name] = {"pid": process.pid, "exitcode": process.exitcode,
+                                  "started_at": entry["started_at"], "ended_at": time.time()}
+            del self._processes[name]
+
+    def launch(self, name):
+        """Start a game unless it's already running. Returns its status."""
+        if name not in self.games:
+            raise GameNotFound(name)
+        with self._lock:
+            self._reap(name)
+            if name in self._processes:
+                return dict(self._status(name), already_running=True)
+            path = os.path.join(self.games_dir, self.games[name][0])
+            start = time.perf_counter()
+            process = self.context.Process(target=_run_game, args=(path,), name=f"game-{name}")
+            process.start()
+            self._processes[name] = {"process": process, "started_at": time.time(),
+                                     "launch_ms": round((time.perf_counter() - start) * 1000, 1)}
+            self._exited.pop(name, None)
+            return dict(self._status(name), already_running=False)
+
+    def stop(self, name, timeout=STOP_TIMEOUT):
+        """Terminate a running game (SIGTERM, then SIGKILL after `timeout`)."""
+        if name not in self.games:
+            raise GameNotFound(name)
+        with self._lock:
+            entry = self._processes.get(name)
+            if entry is None:
+                return self._status(name)
+            process = entry["process"]
+            process.terminate()
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            self._reap(name)
+            return self._status(name)
+
+    def _status(self, name):
+        entry = self._processes.get(name)
+        if entry is not None:
+            return {"game": name, "name": self.games[name][1], "running": True,
+                    "pid": entry["process"].pid, "started_at": entry["started_at"],
+                    "launch_ms": entry["launch_ms"]}
+        exited = self._exited.get(name)
+        return {"game": name, "name": self.games[name][1], "running": False,
+                "pid": exited["pid"] if exited else None,
+                "exitcode": exited["exitcode"] if exited else None}
+
+    def status(self, name=None):
+        """Status of one game, or of all games plus the fork server settings."""
+        if name is not None and name not in self.games:
+            raise GameNotFound(name)
+        with self._lock:
+            for game in list(self._processes):
+                self._reap(game)
+            if name is not None:
+                return self._status(name)
+            return {
+                "start_method": self.start_method,
+                "preload": self.preload,
+                "prewarmed_ms": self.prewarmed_ms,
+                "games": {game: self._status(game) for game in self.games},
+            }
+
+    def shutdown(self, timeout=STOP_TIMEOUT):
+        """Stop every running game (API shutdown)."""
+        for name in list(self._processes):
+            try:
+                self.stop(name, timeout)
+            except Exception:
+                logger.exception("Games: failed to stop %s", name)
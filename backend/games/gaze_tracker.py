@@ -1,8 +1,11 @@
 import cv2
 import dlib
 import numpy as np
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 class GazeTracker:
     def __init__(self):
         self.detector = dlib.get_frontal_face_detector()
@@ -15,9 +18,9 @@ class GazeTracker:
         
         try:
             self.predictor = dlib.shape_predictor(model_path)
-            print(f"GazeTracker: Loaded model from {model_path}")
+            logger.info("GazeTracker: loaded model from %s", model_path)
         except Exception as e:
-            print(f"GazeTracker Error: Could not load model. {e}")
+            logger.error("GazeTracker: could not load model: %s", e)
             self.predictor = None
 
     def get_gaze_direction(self, eye_points, gray_frame):
@@ -10,9 +10,13 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 try:
     from utils import OneEuroFilter
+    from landmark_render import LandmarkRenderer
+    from autotune import ModelTuner, SINGLE_HAND_LEVELS
 except ImportError:
     # If run directly not as module
     from backend.games.utils import OneEuroFilter
+    from backend.games.landmark_render import LandmarkRenderer
+    from backend.games.autotune import ModelTuner, SINGLE_HAND_LEVELS
 
 class Button:
     def __init__(self, text, pos, size=(200, 60)):
@@ -51,11 +55,13 @@ class GestureController:
             self.mp_hands = mp.solutions.hands
             self.mp_draw = mp.solutions.drawing_utils
 
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5,
-            model_complexity=1
+        # Model complexity follows the frame budget (see autotune.py)
+        self.tuner = ModelTuner(SINGLE_HAND_LEVELS, self._build_hands, name="hand tracker")
+        # drawing_utils' default look: red points, light grey connections
+        self.hand_renderer = LandmarkRenderer(
+            self.mp_hands.HAND_CONNECTIONS,
+            self.mp_draw.DrawingSpec(),
+            self.mp_draw.DrawingSpec(color=(0, 0, 255))
         )
         # Smoothing Filter for cursor (x, y)
         self.cursor_filter = OneEuroFilter(time.time(), (0, 0), min_cutoff=0.5, beta=0.1)
@@ -65,9 +71,22 @@ class GestureController:
         self.required_click_frames = 3 # Must hold pinch for 3 frames
         self.is_clicking_stable = False
 
+    def _build_hands(self, model_complexity, max_num_hands):
+        return self.mp_hands.Hands(
+            max_num_hands=max_num_hands,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.5,
+            model_complexity=model_complexity
+        )
+
+    def tracker_label(self):
+        config = self.tuner.config
+        mode = "auto" if config["auto"] else "fixed"
+        return f"Tracker: complexity {config['model_complexity']} ({mode})"
+
     def process_hand(self, img):
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(img_rgb)
+        results = self.tuner.process(img_rgb)
         
         cursor = None
         is_clicking = False
@@ -106,7 +125,7 @@ class GestureController:
 
     def draw_hand(self, img, landmarks, cursor, is_clicking):
         if landmarks:
-            self.mp_draw.draw_landmarks(img, landmarks, self.mp_hands.HAND_CONNECTIONS)
+            self.hand_renderer.draw(img, landmarks)
             
         if cursor:
             cx, cy = cursor
@@ -166,6 +185,7 @@ def main():
         img = cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0)
         
         cv2.putText(img, "Gesture Menu", (80, 100), cv2.FONT_HERSHEY_PLAIN, 3, (0, 0, 0), 3)
+        cv2.putText(img, controller.tracker_label(), (80, 580), cv2.FONT_HERSHEY_PLAIN, 1.2, (60, 60, 60), 1)
         
         for btn in buttons:
             btn.draw(img)
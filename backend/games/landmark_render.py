@@ -0,0 +1,140 @@
+"""
+Vectorized landmark drawing, a drop-in for mediapipe's drawing_utils.
+
+mp.solutions.drawing_utils.draw_landmarks draws every connection with its
+own cv2.line call (plus two cv2.circle calls per point); the face mesh
+tesselation alone is ~2,500 Python-level calls per frame. LandmarkRenderer
+groups a topology's connections by drawing style once, converts all
+landmarks to pixels in one numpy pass, and draws each style's segments with
+a single cv2.polylines call. Output matches draw_landmarks: same pixel
+rounding, same visibility/presence thresholds, same line type, points drawn
+over the lines with a white border.
+
+    renderer = LandmarkRenderer(mp_hands.HAND_CONNECTIONS,
+                                styles.get_default_hand_connections_style(),
+                                styles.get_default_hand_landmarks_style())
+    renderer.draw(frame, hand_landmarks)
+
+Specs are DrawingSpec-like objects (color, thickness, circle_radius) or
+mappings from connection / landmark index to one, as in drawing_utils.
+"""
+from collections import defaultdict
+from collections.abc import Mapping
+
+import cv2
+import numpy as np
+
+# Same thresholds and defaults as mediapipe's drawing_utils
+VISIBILITY_THRESHOLD = 0.5
+PRESENCE_THRESHOLD = 0.5
+WHITE_COLOR = (224, 224, 224)
+RED_COLOR = (0, 0, 255)
+
+
+class DrawingSpec:
+    """Minimal stand-in for mediapipe's DrawingSpec (color is BGR)."""
+
+    def __init__(self, color=WHITE_COLOR, thickness=2, circle_radius=2):
+        self.color = color
+        self.thickness = thickness
+        self.circle_radius = circle_radius
+
+
+def _style_key(spec):
+    return tuple(spec.color), spec.thickness, spec.circle_radius
+
+
+def landmark_array(landmark_list):
+    """
+    (N, 2) normalized x/y and an (N,) mask of landmarks drawing_utils would
+    draw (visible, present, inside the image). Whether visibility/presence
+    are set is read from the first landmark; mediapipe sets them uniformly
+    per solution.
+    """
+    landmarks = landmark_list.landmark
+    if not len(landmarks):
+        return np.zeros((0, 2)), np.zeros(0, dtype=bool)
+    first = landmarks[0]
+    with_visibility = first.HasField("visibility")
+    with_presence = first.HasField("presence")
+    if with_visibility or with_presence:
+        values = np.array([(lm.x, lm.y, lm.visibility, lm.presence) for lm in landmarks], dtype=np.float64)
+    else:
+        values = np.array([(lm.x, lm.y) for lm in landmarks], dtype=np.float64)
+    xy = values[:, :2]
+    mask = np.all((xy >= 0) & (xy <= 1), axis=1)
+    if with_visibility:
+        mask &= values[:, 2] >= VISIBILITY_THRESHOLD
+    if with_presence:
+        mask &= values[:, 3] >= PRESENCE_THRESHOLD
+    return xy, mask
+
+
+def to_pixels(xy, width, height):
+    """Normalized -> integer pixel coordinates (floor, clamped like drawing_utils)."""
+    px = np.empty(xy.shape, dtype=np.int32)
+    np.minimum(np.floor(xy[:, 0] * width), width - 1, out=px[:, 0], casting="unsafe")
+    np.minimum(np.floor(xy[:, 1] * height), height - 1, out=px[:, 1], casting="unsafe")
+    return px
+
+
+class LandmarkRenderer:
+    """Draws one landmark topology with precomputed per-style index arrays."""
+
+    def __init__(self, connections=None, connection_spec=None, landmark_spec=None):
+        if connection_spec is None and connections:
+            connection_spec = DrawingSpec()
+        # style -> (M, 2) start/end landmark indices
+        groups = defaultdict(list)
+        for connection in sorted(connections or ()):
+            spec = connection_spec[connection] if isinstance(connection_spec, Mapping) else connection_spec
+            groups[(tuple(spec.color), spec.thickness)].append(connection)
+        self.connection_groups = [(color, thickness, np.array(pairs, dtype=np.intp))
+                                  for (color, thickness), pairs in groups.items()]
+        self.max_index = max((int(pairs.max()) for _, _, pairs in self.connection_groups), default=-1)
+
+        # style -> landmark indices; None = every landmark
+        self.landmark_spec = landmark_spec
+        self.landmark_groups = None
+        if isinstance(landmark_spec, Mapping):
+            by_style = defaultdict(list)
+            for index, spec in landmark_spec.items():
+                by_style[_style_key(spec)].append(int(index))
+            self.landmark_groups = [(key, np.array(sorted(indices), dtype=np.intp))
+                                    for key, indices in by_style.items()]
+
+    def draw(self, image, landmark_list, draw_points=True):
+        """Draw connections, then points, onto a BGR image in place."""
+        if not landmark_list:
+            return image
+        if image.shape[2] != 3:
+            raise ValueError("Input image must contain three channel bgr data.")
+        xy, mask = landmark_array(landmark_list)
+        if self.max_index >= len(xy):
+            raise ValueError(f"Landmark index is out of range ({self.max_index} >= {len(xy)} landmarks).")
+        height, width = image.shape[:2]
+        px = to_pixels(xy, width, height)
+
+        for color, thickness, pairs in self.connection_groups:
+            keep = mask[pairs[:, 0]] & mask[pairs[:, 1]]
+            if keep.any():
+                # (K, 2, 2): K two-point polylines in one call
+                cv2.polylines(image, px[pairs[keep]], False, color, thickness)
+
+        if draw_points and self.landmark_spec:
+            if self.landmark_groups is None:
+                self._draw_points(image, px[mask], _style_key(self.landmark_spec))
+            else:
+                for key, indices in self.landmark_groups:
+                    indices = indices[indices < len(mask)]
+                    self._draw_points(image, px[indices[mask[indices]]], key)
+        return image
+
+    @staticmethod
+    def _draw_points(image, points, key):
+        # A handful of points per topology (face mesh draws none), so a loop is fine
+        color, thickness, radius = key
+        border = max(radius + 1, int(radius * 1.2))
+        for x, y in points.tolist():
+            cv2.circle(image, (x, y), border, WHITE_COLOR, thickness)
+            cv2.circle(image, (x, y), radius, color, thickness)
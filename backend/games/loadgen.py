@@ -0,0 +1,445 @@
+"""
+Load generation and traffic replay for the API.
+
+Runs against a local instance of main.app, started in a subprocess with the
+Google recognizer replaced by a local stand-in (fixed text after a
+configurable delay), or against any --url.
+
+Synthetic traffic mirrors the frontend: each simulated camera user posts a
+JPEG to /process-frame open-loop at --fps (the browser uses setInterval,
+2.5 fps, 2 s timeout), and each audio user posts a clip to /transcribe or
+/predict-emotion every --audio-interval seconds. A ramp runs the mix at
+increasing user counts and reports, per step, throughput, latency
+percentiles, error rate and achieved frame rate, then the saturation point:
+the first step where throughput stops growing, the error rate or p99
+crosses its limit, or users no longer get their frame rate.
+
+    python -m games.loadgen ramp --users 1 2 4 8 --step-seconds 10
+    python -m games.loadgen ramp --url http://localhost:8000 --mix gesture=3 predict-emotion=1
+    python -m games.loadgen replay trace.jsonl --speed 2
+
+A trace is JSONL, one request per line, sorted by "t" (seconds from start):
+    {"t": 0.0, "path": "/process-frame", "form": {"type": "pose"},
+     "file": {"field": "frame", "path": "frames/0001.jpg"}}
+File paths are relative to the trace. "file": {"synthetic": "jpeg"} or
+{"synthetic": "wav"} uses generated payloads.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import wave
+
+import numpy as np
+
+BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+DEFAULT_FPS = 2.5
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_AUDIO_INTERVAL = 5.0
+DEFAULT_RECOGNIZER_LATENCY = 0.3
+STAND_IN_TRANSCRIPT = "the quick brown fox jumps over the lazy dog"
+
+# Saturation criteria
+MIN_THROUGHPUT_GAIN = 0.1
+MAX_ERROR_RATE = 0.01
+MIN_FPS_RATIO = 0.9
+
+# Traffic kinds: name -> (path, file field, payload, form)
+KINDS = {
+    "gesture": ("/process-frame", "frame", "jpeg", {"type": "gesture"}),
+    "pose": ("/process-frame", "frame", "jpeg", {"type": "pose"}),
+    "emotion": ("/process-frame", "frame", "jpeg", {"type": "emotion"}),
+    "transcribe": ("/transcribe", "audio", "wav", {"language": "en-US", "target_sentence": STAND_IN_TRANSCRIPT}),
+    "predict-emotion": ("/predict-emotion", "audio", "wav", {}),
+}
+FRAME_KINDS = ("gesture", "pose", "emotion")
+
+
+# ============== PAYLOADS ==============
+def synthetic_jpeg(width=640, height=480, quality=70, seed=0):
+    """A camera-like JPEG (the browser encodes at quality 0.7)."""
+    import cv2
+    rng = np.random.default_rng(seed)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 5)
+    cv2.circle(frame, (width // 2, height // 2), min(width, height) // 5, (150, 170, 200), -1)
+    return cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+def synthetic_wav(seconds=2.0, sample_rate=16000, seed=0):
+    """16-bit mono WAV with a voiced-like harmonic signal plus noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6))
+    signal = 0.3 * signal / np.abs(signal).max() + 0.02 * rng.normal(size=t.size)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes((np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+# ============== STAND-IN SERVER ==============
+class StandInRecognizer:
+    """Replaces Recognizer.recognize_google: fixed text after a delay, no network."""
+
+    def __init__(self, latency=DEFAULT_RECOGNIZER_LATENCY, text=STAND_IN_TRANSCRIPT):
+        self.latency = latency
+        self.text = text
+
+    def __call__(self, audio_data, language="en-US", **kwargs):
+        time.sleep(self.latency)
+        return self.text
+
+
+def serve(port, recognizer_latency=DEFAULT_RECOGNIZER_LATENCY, host="127.0.0.1"):
+    """Run main.app with the stand-in recognizer (used by start_server)."""
+    sys.path.insert(0, BACKEND_DIR)
+    import uvicorn
+    import main
+    main.get_recognizer().recognize_google = StandInRecognizer(recognizer_latency)
+    uvicorn.run(main.app, host=host, port=port, log_level="warning")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(recognizer_latency=DEFAULT_RECOGNIZER_LATENCY, timeout=120.0):
+    """Start main.app in a subprocess; returns (process, base_url) once /health answers."""
+    import httpx
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "games.loadgen", "serve", "--port", str(port),
+         "--recognizer-latency", str(recognizer_latency)],
+        cwd=BACKEND_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Server did not become healthy in time")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+# ============== RECORDING RESULTS ==============
+class Recorder:
+    """Collects (kind, start, latency, ok, status) per request."""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, kind, start, latency, ok, status):
+        self.rows.append((kind, start, latency, ok, status))
+
+    def summary(self, duration):
+        if not self.rows:
+            return {"requests": 0, "throughput": 0.0, "error_rate": 0.0,
+                    "p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "by_kind": {}}
+        latencies = np.array([row[2] for row in self.rows]) * 1000
+        errors = sum(1 for row in self.rows if not row[3])
+        by_kind = {}
+        for kind in sorted({row[0] for row in self.rows}):
+            rows = [row for row in self.rows if row[0] == kind]
+            lat = np.array([row[2] for row in rows]) * 1000
+            by_kind[kind] = {
+                "requests": len(rows),
+                "errors": sum(1 for row in rows if not row[3]),
+                "p50_ms": float(np.percentile(lat, 50)),
+                "p99_ms": float(np.percentile(lat, 99)),
+            }
+        return {
+            "requests": len(self.rows),
+            "throughput": len(self.rows) / duration if duration > 0 else 0.0,
+            "error_rate": errors / len(self.rows),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p90_ms": float(np.percentile(latencies, 90)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "by_kind": by_kind,
+        }
+
+
+async def send(client, recorder, kind, path, field, payload, form, timeout):
+    filename = "frame.jpg" if field == "frame" else "voice.wav"
+    content_type = "image/jpeg" if field == "frame" else "audio/wav"
+    start = time.perf_counter()
+    try:
+        response = await client.post(path, files={field: (filename, payload, content_type)},
+                                     data=form, timeout=timeout)
+        # Several endpoints report failures in a 200 body
+        ok = response.status_code == 200 and b'"status":"error"' not in response.content[:200]
+        status = response.status_code
+    except Exception as e:
+        ok, status = False, type(e).__name__
+    recorder.add(kind, start, time.perf_counter() - start, ok, status)
+
+
+# ============== SYNTHETIC TRAFFIC ==============
+async def _user(client, recorder, kind, payload, interval, timeout, stop_at, offset):
+    """One simulated user firing open-loop every `interval` seconds."""
+    path, field, _, form = KINDS[kind]
+    tasks = set()
+    next_at = time.perf_counter() + offset
+    while True:
+        now = time.perf_counter()
+        if next_at >= stop_at:
+            break
+        if next_at > now:
+            await asyncio.sleep(next_at - now)
+        task = asyncio.create_task(send(client, recorder, kind, path, field, payload, form, timeout))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        next_at += interval
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def warm_up(url, mix, payloads, timeout=30.0, transport=None):
+    """One untimed request per kind so lazy model loads don't land in the first step."""
+    import httpx
+    recorder = Recorder()
+    async with httpx.AsyncClient(base_url=url, transport=transport) as client:
+        for kind in mix:
+            path, field, payload_type, form = KINDS[kind]
+            await send(client, recorder, kind, path, field, payloads[payload_type], form, timeout)
+    return recorder.summary(1.0)
+
+
+async def run_step(url, mix, users, duration, fps=DEFAULT_FPS, audio_interval=DEFAULT_AUDIO_INTERVAL,
+                   timeout=DEFAULT_TIMEOUT, payloads=None, transport=None):
+    """
+    Run `users` simulated users for `duration` seconds. mix maps kind -> weight;
+    users are assigned to kinds in proportion. Returns the step summary.
+    """
+    import httpx
+    payloads = payloads or {"jpeg": synthetic_jpeg(), "wav": synthetic_wav()}
+    kinds = _assign_kinds(mix, users)
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=max(16, users * 4), max_keepalive_connections=max(16, users * 4))
+    async with httpx.AsyncClient(base_url=url, limits=limits, transport=transport) as client:
+        start = time.perf_counter()
+        stop_at = start + duration
+        coroutines = []
+        for i, kind in enumerate(kinds):
+            interval = 1.0 / fps if kind in FRAME_KINDS else audio_interval
+            payload = payloads[KINDS[kind][2]]
+            # Spread users across the interval so they don't fire in lockstep
+            offset = interval * i / max(1, len(kinds))
+            coroutines.append(_user(client, recorder, kind, payload, interval, timeout, stop_at, offset))
+        await asyncio.gather(*coroutines)
+        elapsed = time.perf_counter() - start
+
+    summary = recorder.summary(elapsed)
+    summary["users"] = users
+    frame_users = sum(1 for k in kinds if k in FRAME_KINDS)
+    frame_ok = sum(1 for row in recorder.rows if row[0] in FRAME_KINDS and row[3])
+    summary["target_fps"] = fps
+    summary["achieved_fps"] = frame_ok / elapsed / frame_users if frame_users else 0.0
+    return summary
+
+
+def _assign_kinds(mix, users):
+    """Spread users over kinds by weight (largest remainder)."""
+    total = sum(mix.values())
+    shares = {kind: users * weight / total for kind, weight in mix.items()}
+    counts = {kind: int(share) for kind, share in shares.items()}
+    for kind in sorted(shares, key=lambda k: shares[k] - counts[k], reverse=True)[:users - sum(counts.values())]:
+        counts[kind] += 1
+    return [kind for kind, count in counts.items() for _ in range(count)]
+
+
+def find_saturation(steps, max_error_rate=MAX_ERROR_RATE, max_p99_ms=None,
+                    min_gain=MIN_THROUGHPUT_GAIN, min_fps_ratio=MIN_FPS_RATIO):
+    """
+    First step showing saturation, as (index, reason), or (None, None).
+    Throughput gain is measured per added user, so uneven steps compare fairly.
+    """
+    for i, step in enumerate(steps):
+        if step["error_rate"] > max_error_rate:
+            return i, f"error rate {step['error_rate']:.1%} > {max_error_rate:.1%}"
+        if max_p99_ms is not None and step["p99_ms"] > max_p99_ms:
+            return i, f"p99 {step['p99_ms']:.0f} ms > {max_p99_ms:.0f} ms"
+        if step["achieved_fps"] and step["achieved_fps"] < step["target_fps"] * min_fps_ratio:
+            return i, f"users get {step['achieved_fps']:.2f} fps of {step['target_fps']:.2f}"
+        if i > 0:
+            previous = steps[i - 1]
+            expected = previous["throughput"] * step["users"] / previous["users"]
+            gained = step["throughput"] - previous["throughput"]
+            wanted = expected - previous["throughput"]
+            if wanted > 0 and gained < wanted * min_gain:
+                return i, f"throughput flat ({previous['throughput']:.1f} -> {step['throughput']:.1f} req/s)"
+    return None, None
+
+
+def print_steps(steps):
+    print(f"{'users':>5} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7} {'fps/user':>9}")
+    for step in steps:
+        print(f"{step['users']:>5} {step['throughput']:>7.1f} {step['p50_ms']:>8.1f} {step['p90_ms']:>8.1f} "
+              f"{step['p99_ms']:>8.1f} {step['error_rate']:>6.1%} {step['achieved_fps']:>9.2f}")
+
+
+# ============== REPLAY ==============
+def load_trace(path):
+    base = os.path.dirname(os.path.abspath(path))
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    cache = {}
+    for event in events:
+        spec = event.get("file") or {}
+        if "path" in spec:
+            full = os.path.join(base, spec["path"])
+            if full not in cache:
+                with open(full, "rb") as payload_file:
+                    cache[full] = payload_file.read()
+            event["_payload"] = cache[full]
+        elif spec.get("synthetic") == "wav":
+            event["_payload"] = cache.setdefault("wav", synthetic_wav())
+        else:
+            event["_payload"] = cache.setdefault("jpeg", synthetic_jpeg())
+    events.sort(key=lambda e: e.get("t", 0.0))
+    return events
+
+
+async def replay(url, events, speed=1.0, timeout=DEFAULT_TIMEOUT, transport=None):
+    """Send trace events at their recorded offsets (divided by speed; 0 = as fast as possible)."""
+    import httpx
+    recorder = Recorder()
+    async with httpx.AsyncClient(base_url=url, transport=transport) as client:
+        start = time.perf_counter()
+        tasks = []
+        for event in events:
+            if speed > 0:
+                delay = start + event.get("t", 0.0) / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            field = (event.get("file") or {}).get("field", "frame")
+            path = event["path"]
+            kind = (event.get("form") or {}).get("type", path.strip("/")) if path == "/process-frame" else path.strip("/")
+            tasks.append(asyncio.create_task(
+                send(client, recorder, kind, path, field, event["_payload"], event.get("form") or {}, timeout)
+            ))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return recorder.summary(elapsed)
+
+
+# ============== CLI ==============
+def _parse_mix(items):
+    mix = {}
+    for item in items:
+        kind, _, weight = item.partition("=")
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"Unknown traffic kind '{kind}' (choose from {', '.join(KINDS)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load generator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--url", default=None, help="Target server (default: start main.app locally)")
+    common.add_argument("--recognizer-latency", type=float, default=DEFAULT_RECOGNIZER_LATENCY,
+                        help="Stand-in recognizer delay (local server only)")
+    common.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    common.add_argument("--json", default=None, help="Also write results here")
+
+    ramp_parser = sub.add_parser("ramp", parents=[common], help="Synthetic traffic at increasing user counts")
+    ramp_parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    ramp_parser.add_argument("--step-seconds", type=float, default=10.0)
+    ramp_parser.add_argument("--mix", nargs="+", default=["gesture=1"],
+                             help="kind=weight, kinds: " + ", ".join(KINDS))
+    ramp_parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="Frames/sec per camera user")
+    ramp_parser.add_argument("--audio-interval", type=float, default=DEFAULT_AUDIO_INTERVAL)
+    ramp_parser.add_argument("--resolution", default="640x480")
+    ramp_parser.add_argument("--max-p99-ms", type=float, default=None)
+    ramp_parser.add_argument("--max-error-rate", type=float, default=MAX_ERROR_RATE)
+
+    replay_parser = sub.add_parser("replay", parents=[common], help="Replay a JSONL trace")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Time scale (0 = as fast as possible)")
+
+    serve_parser = sub.add_parser("serve", help="Run main.app with the stand-in recognizer")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--recognizer-latency", type=float, default=DEFAULT_RECOGNIZER_LATENCY)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.port, args.recognizer_latency, args.host)
+        return
+
+    proc = None
+    url = args.url
+    if url is None:
+        print("Starting local server with stand-in recognizer...")
+        proc, url = start_server(args.recognizer_latency)
+    try:
+        if args.command == "ramp":
+            width, height = (int(v) for v in args.resolution.lower().split("x"))
+            payloads = {"jpeg": synthetic_jpeg(width, height), "wav": synthetic_wav()}
+            mix = _parse_mix(args.mix)
+            asyncio.run(warm_up(url, mix, payloads))
+            steps = []
+            for users in args.users:
+                steps.append(asyncio.run(run_step(url, mix, users, args.step_seconds, args.fps,
+                                                  args.audio_interval, args.timeout, payloads)))
+                print_steps(steps[-1:])
+            index, reason = find_saturation(steps, args.max_error_rate, args.max_p99_ms)
+            print()
+            print_steps(steps)
+            if index is None:
+                print(f"\nNo saturation up to {steps[-1]['users']} users")
+            else:
+                print(f"\nSaturates at {steps[index]['users']} users: {reason}")
+                if index > 0:
+                    print(f"Last healthy step: {steps[index - 1]['users']} users, "
+                          f"{steps[index - 1]['throughput']:.1f} req/s")
+            result = {"steps": steps, "saturation": {"index": index, "reason": reason}}
+        else:
+            events = load_trace(args.trace)
+            result = asyncio.run(replay(url, events, args.speed, args.timeout))
+            print_steps([{**result, "users": 0, "achieved_fps": 0.0}])
+            for kind, row in result["by_kind"].items():
+                print(f"  {kind:<20} {row['requests']:>6} req  p50 {row['p50_ms']:.1f} ms  "
+                      f"p99 {row['p99_ms']:.1f} ms  errors {row['errors']}")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(result, f, indent=2)
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+No external dependency: counters, gauges and fixed-bucket histograms guarded
+by one small lock each. An observation is a dict lookup, a bisect and a few
+additions, so it is cheap enough to leave on under production load.
+
+Exposed at GET /metrics (see main.py).
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Default latency buckets (seconds): 1 ms .. 10 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0.0)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge set directly, or computed at scrape time via set_function()."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._function = None
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount=1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set_function(self, function):
+        """function() -> {label tuple: value}, evaluated on every scrape."""
+        self._function = function
+
+    def value(self, *labels):
+        return self._values.get(labels, 0.0)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            values = dict(self._values)
+        if self._function is not None:
+            try:
+                values.update(self._function())
+            except Exception as e:
+                logger.warning("Metrics: gauge %s callback failed: %s", self.name, e)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), series[:-2]):
+                cumulative += n
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', _format_value(bound)))} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {repr(float(series[-2]))}")
+            lines.append(f"{self.name}_count{label_str} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class FpsMeter:
+    """Achieved frames/sec per stream, as an exponential moving average."""
+
+    def __init__(self, alpha=0.2, idle_after=2.0):
+        self.alpha = alpha
+        self.idle_after = idle_after
+        self._last = {}
+        self._fps = {}
+        self._lock = threading.Lock()
+
+    def tick(self, stream):
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(stream)
+            self._last[stream] = now
+            if last is None or now <= last:
+                return
+            instant = 1.0 / (now - last)
+            previous = self._fps.get(stream)
+            self._fps[stream] = instant if previous is None else self.alpha * instant + (1 - self.alpha) * previous
+
+    def values(self):
+        """{(stream,): fps}; streams idle for idle_after seconds report 0."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                (stream,): (fps if now - self._last[stream] < self.idle_after else 0.0)
+                for stream, fps in self._fps.items()
+            }
+
+    def active(self):
+        """Streams that received a frame within idle_after seconds."""
+        now = time.monotonic()
+        with self._lock:
+            return [s for s, last in self._last.items() if now - last < self.idle_after]
+
+
+# ============== APPLICATION METRICS ==============
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route, method and status code.", ("route", "method", "status")))
+REQUEST_ERRORS = REGISTRY.register(Counter(
+    "http_request_errors_total", "Requests that failed (5xx, unhandled or reported in the body).", ("route", "method")))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("route", "method")))
+
+# Stages: decode, inference, draw, encode, recognizer
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "stage_duration_seconds", "Per-stage processing latency.", ("stage", "processor")))
+
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    "active_sessions", "Live sessions (mjpeg: open camera streams, sse: status event streams, "
+    "frame: streams with a frame in the last 2 s).",
+    ("kind",)))
+POOL_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "pool_queue_depth", "Items waiting in worker pools and batchers.", ("pool",)))
+STREAM_FPS = REGISTRY.register(Gauge(
+    "stream_fps", "Achieved frames per second per stream.", ("stream",)))
+
+FPS = FpsMeter()
+STREAM_FPS.set_function(FPS.values)
+
+
+# ============== ASGI MIDDLEWARE ==============
+class _RequestState:
+    __slots__ = ("error",)
+
+    def __init__(self):
+        self.error = False
+
+
+# Mutable per-request state; the object is shared with the copied contexts
+# sync endpoints run in, so flags set there are visible to the middleware.
+_request_state = ContextVar("metrics_request_state", default=None)
+
+
+def mark_error():
+    """Flag the current request as failed even though it returns 200."""
+    state = _request_state.get()
+    if state is not None:
+        state.error = True
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording count, errors and latency per route
+    template (e.g. /stream/{stream_type}/status), so label cardinality is
+    bounded by the number of routes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = _RequestState()
+        token = _request_state.set(state)
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            state.error = True
+            raise
+        finally:
+            _request_state.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            status = status_holder[0]
+            REQUESTS.inc(route_path, method, str(status))
+            REQUEST_LATENCY.observe(elapsed, route_path, method)
+            if status >= 500 or state.error:
+                REQUEST_ERRORS.inc(route_path, method)
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,303 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when profiling is enabled (PROFILING_ENABLED=1) and it
+carries an `X-Profile` header or a `?profile=` query flag, or when it is
+picked by random sampling (PROFILE_SAMPLE_RATE=0.01 profiles ~1% of requests).
+The value selects the profiler:
+
+    cprofile (default)  deterministic, written as <id>.prof (pstats)
+    sample              stack sampler, written as <id>.speedscope.json
+
+Each profile gets a <id>.json sidecar with the route, method, query/path
+parameters, anything the endpoint attached with annotate(), status and
+duration. The id is returned in the X-Profile-Id response header.
+
+The profilers run on the event-loop thread, which is where async endpoints
+such as /process-frame and /transcribe do their work (MediaPipe, cv2.imencode,
+pydub). Only one request is profiled at a time; concurrent requests on the
+same loop can show up in its profile. When disabled, the middleware is a
+single attribute check per request.
+
+Inspect a profile:
+    python -m games.profiling show profiles/<id>.prof
+    (speedscope files open at https://www.speedscope.app)
+"""
+import argparse
+import cProfile
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from urllib.parse import parse_qsl
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cprofile", "sample")
+DEFAULT_MODE = "cprofile"
+HEADER = b"x-profile"
+QUERY_PARAM = "profile"
+
+# Keep at most this many profiles on disk (oldest are removed)
+DEFAULT_MAX_PROFILES = 200
+# Stack sampler period (seconds)
+DEFAULT_SAMPLE_INTERVAL = 0.001
+
+_TRUTHY = ("1", "true", "yes", "on")
+
+
+class ProfilingConfig:
+    def __init__(self, enabled=False, sample_rate=0.0, directory=None, mode=DEFAULT_MODE,
+                 max_profiles=DEFAULT_MAX_PROFILES, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.directory = directory or os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "profiles")
+        self.mode = mode if mode in MODES else DEFAULT_MODE
+        self.max_profiles = max_profiles
+        self.sample_interval = sample_interval
+
+    @property
+    def active(self):
+        return self.enabled or self.sample_rate > 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.environ.get("PROFILING_ENABLED", "").lower() in _TRUTHY,
+            sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0") or 0),
+            directory=os.environ.get("PROFILE_DIR") or None,
+            mode=os.environ.get("PROFILE_MODE", DEFAULT_MODE).lower(),
+            max_profiles=int(os.environ.get("PROFILE_MAX_FILES", DEFAULT_MAX_PROFILES)),
+        )
+
+
+# ============== ANNOTATIONS ==============
+# Extra parameters for the current profile (e.g. form fields), set by endpoints
+_annotations = ContextVar("profile_annotations", default=None)
+
+
+def annotate(**params):
+    """Attach parameters to the current request's profile (no-op if not profiling)."""
+    current = _annotations.get()
+    if current is not None:
+        current.update(params)
+
+
+# ============== STACK SAMPLER ==============
+class StackSampler:
+    """Samples one thread's Python stack from a background thread."""
+
+    def __init__(self, thread_id, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []  # (timestamp, ((file, name, line), ...) root -> leaf)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.end_time = time.perf_counter()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((time.perf_counter(), tuple(stack)))
+
+    def to_speedscope(self, name):
+        """Speedscope 'sampled' profile (https://www.speedscope.app/file-format-schema.json)."""
+        frame_index = {}
+        frames = []
+        samples = []
+        weights = []
+        previous = self.start_time
+        for timestamp, stack in self.samples:
+            indices = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": key[1], "file": key[0], "line": key[2]})
+                indices.append(frame_index[key])
+            samples.append(indices)
+            weights.append(timestamp - previous)
+            previous = timestamp
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "games.profiling",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": (self.end_time - self.start_time),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+# ============== MIDDLEWARE ==============
+def _requested_mode(scope, config):
+    """Profiler requested by header/query (only when enabled), else by sampling, else None."""
+    if config.enabled:
+        for key, value in scope.get("headers", ()):
+            if key == HEADER:
+                value = value.decode("latin-1").strip().lower()
+                if value and value not in ("0", "false", "off"):
+                    return value if value in MODES else config.mode
+        query = scope.get("query_string", b"")
+        if query and QUERY_PARAM.encode() in query:
+            value = dict(parse_qsl(query.decode("latin-1"))).get(QUERY_PARAM, "").lower()
+            if value and value not in ("0", "false", "off"):
+                return value if value in MODES else config.mode
+    if config.sample_rate > 0 and random.random() < config.sample_rate:
+        return config.mode
+    return None
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware wrapping selected requests in a profiler."""
+
+    def __init__(self, app, config=None):
+        self.app = app
+        self.config = config or ProfilingConfig.from_env()
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if not self.config.active or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = _requested_mode(scope, self.config)
+        # One profile at a time (cProfile is per-thread and the loop is shared)
+        if mode is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode())
+                ]
+            await send(message)
+
+        annotations = {}
+        token = _annotations.set(annotations)
+        if mode == "sample":
+            profiler = StackSampler(threading.get_ident(), self.config.sample_interval)
+        else:
+            profiler = cProfile.Profile()
+
+        start = time.perf_counter()
+        try:
+            if mode == "sample":
+                profiler.start()
+            else:
+                profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if mode == "sample":
+                    profiler.stop()
+                else:
+                    profiler.disable()
+        finally:
+            duration = time.perf_counter() - start
+            _annotations.reset(token)
+            try:
+                self._write(profile_id, mode, profiler, scope, annotations, status_holder[0], duration)
+            except Exception:
+                logger.exception("Profiling: failed to write profile %s", profile_id)
+            finally:
+                self._busy.release()
+
+    def _write(self, profile_id, mode, profiler, scope, annotations, status, duration):
+        directory = self.config.directory
+        os.makedirs(directory, exist_ok=True)
+
+        route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+        base = os.path.join(directory, profile_id)
+        if mode == "sample":
+            profile_file = base + ".speedscope.json"
+            with open(profile_file, "w") as f:
+                json.dump(profiler.to_speedscope(f"{scope.get('method')} {route}"), f)
+        else:
+            profile_file = base + ".prof"
+            profiler.dump_stats(profile_file)
+
+        meta = {
+            "id": profile_id,
+            "mode": mode,
+            "profile": os.path.basename(profile_file),
+            "route": route,
+            "path": scope.get("path"),
+            "method": scope.get("method"),
+            "query": dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"))),
+            "path_params": {k: str(v) for k, v in (scope.get("path_params") or {}).items()},
+            "params": annotations,
+            "status": status,
+            "duration_seconds": duration,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(base + ".json", "w") as f:
+            json.dump(meta, f, indent=2, default=str)
+        self._prune()
+
+    def _prune(self):
+        """Drop the oldest profiles beyond max_profiles."""
+        directory = self.config.directory
+        sidecars = sorted(
+            (name for name in os.listdir(directory)
+             if name.endswith(".json") and not name.endswith(".speedscope.json")),
+        )
+        for name in sidecars[:max(0, len(sidecars) - self.config.max_profiles)]:
+            stem = name[:-len(".json")]
+            for suffix in (".json", ".prof", ".speedscope.json"):
+                path = os.path.join(directory, stem + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+# ============== CLI ==============
+def main():
+    parser = argparse.ArgumentParser(description="Request profile tools")
+    parser.add_argument("command", choices=["show"])
+    parser.add_argument("profile", help="A .prof file written by the profiling middleware")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key")
+    parser.add_argument("--limit", type=int, default=30)
+    args = parser.parse_args()
+
+    import pstats
+    sidecar = args.profile[:-len(".prof")] + ".json" if args.profile.endswith(".prof") else None
+    if sidecar and os.path.exists(sidecar):
+        with open(sidecar) as f:
+            meta = json.load(f)
+        print(f"{meta['method']} {meta['route']} -> {meta['status']} in {meta['duration_seconds'] * 1000:.1f} ms")
+        print(f"params: {meta['params']} query: {meta['query']}")
+    pstats.Stats(args.profile).sort_stats(args.sort).print_stats(args.limit)
+
+
+if __name__ == "__main__":
+    main()
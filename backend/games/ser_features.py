@@ -0,0 +1,178 @@
+"""
+Shared-STFT feature pipeline for Speech Emotion Recognition.
+
+One clip gets exactly one STFT. The mel spectrogram, the MFCCs (DCT of the
+log-mel) and the chroma are all derived from that single spectrogram, and the
+filterbanks are cached per (sample rate, FFT size) so repeated requests don't
+rebuild them.
+
+The parameters below reproduce librosa's defaults, which is what
+ser_model.pkl was trained on:
+    mfcc(y, sr, n_mfcc=40) + chroma_stft(S=|stft|, sr) + melspectrogram(y, sr)
+"""
+from functools import lru_cache
+
+import numpy as np
+import librosa
+import scipy.fft
+
+# Rate audio is resampled to before feature extraction. RAVDESS (the corpus
+# behind the '01'..'08' emotion codes) is recorded at 48 kHz, and browser
+# opus recordings decode at 48 kHz too. Artifacts can override it.
+SAMPLE_RATE = 48000
+
+# STFT / filterbank settings (librosa defaults used at training time)
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 40
+N_CHROMA = 12
+N_MELS = 128
+
+# Layout of the flat feature vector: name -> (start, stop)
+FEATURE_LAYOUT = {
+    "mfcc": (0, N_MFCC),
+    "chroma": (N_MFCC, N_MFCC + N_CHROMA),
+    "mel": (N_MFCC + N_CHROMA, N_MFCC + N_CHROMA + N_MELS),
+}
+N_FEATURES = N_MFCC + N_CHROMA + N_MELS
+
+
+@lru_cache(maxsize=16)
+def mel_filterbank(sr, n_fft=N_FFT, n_mels=N_MELS):
+    """Slaney-normalised mel filterbank, shape (n_mels, 1 + n_fft // 2)."""
+    basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+    basis.flags.writeable = False
+    return basis
+
+
+@lru_cache(maxsize=256)
+def chroma_filterbank(sr, n_fft=N_FFT, tuning=0.0, n_chroma=N_CHROMA):
+    """Chroma filterbank, shape (n_chroma, 1 + n_fft // 2).
+
+    Tuning is estimated per clip but quantised to 0.01 bins by librosa,
+    so the cache stays small.
+    """
+    basis = librosa.filters.chroma(sr=sr, n_fft=n_fft, tuning=tuning, n_chroma=n_chroma)
+    basis.flags.writeable = False
+    return basis
+
+
+@lru_cache(maxsize=4)
+def dct_matrix(n_mels=N_MELS, n_mfcc=N_MFCC):
+    """Orthonormal DCT-II as a (n_mfcc, n_mels) matrix (same as librosa.feature.mfcc)."""
+    basis = scipy.fft.dct(np.eye(n_mels), type=2, norm="ortho", axis=0)[:n_mfcc]
+    basis.flags.writeable = False
+    return basis
+
+
+def to_mono(X):
+    """Down-mix (n_samples, n_channels) audio to a 1-D float32 signal."""
+    if X.ndim > 1:
+        X = X.mean(axis=1)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+class SpectralFrames:
+    """
+    Per-frame features derived from a single STFT.
+
+    mfcc, chroma and mel are (n_features, n_frames) matrices. Averaging them
+    over time gives the clip-level vector the classifier expects; averaging
+    over a sub-range of frames gives a window-level vector without touching
+    the raw audio again.
+    """
+
+    def __init__(self, mfcc, chroma, mel, sample_rate, hop_length=HOP_LENGTH):
+        self.mfcc = mfcc
+        self.chroma = chroma
+        self.mel = mel
+        self.sample_rate = sample_rate
+        self.hop_length = hop_length
+
+    @property
+    def n_frames(self):
+        return self.mel.shape[1]
+
+    def stack(self, mfcc=True, chroma=True, mel=True):
+        """(n_frames, n_features) matrix in the classifier's feature order."""
+        parts = []
+        if mfcc:
+            parts.append(self.mfcc)
+        if chroma:
+            parts.append(self.chroma)
+        if mel:
+            parts.append(self.mel)
+        return np.vstack(parts).T
+
+    def mean_vector(self, mfcc=True, chroma=True, mel=True):
+        """Clip-level feature vector (mean over all frames)."""
+        result = np.array([])
+        if mfcc:
+            result = np.hstack((result, self.mfcc.mean(axis=1)))
+        if chroma:
+            result = np.hstack((result, self.chroma.mean(axis=1)))
+        if mel:
+            result = np.hstack((result, self.mel.mean(axis=1)))
+        return result
+
+
+def compute_frames(X, sample_rate, mfcc=True, chroma=True, mel=True):
+    """
+    Compute per-frame MFCC / chroma / mel features from one STFT.
+    Skipped feature groups are returned as empty (0, n_frames) arrays.
+    """
+    X = to_mono(X)
+
+    magnitude = np.abs(librosa.stft(X, n_fft=N_FFT, hop_length=HOP_LENGTH))
+    n_frames = magnitude.shape[1]
+    empty = np.empty((0, n_frames), dtype=magnitude.dtype)
+
+    mel_spec = empty
+    mfccs = empty
+    if mel or mfcc:
+        power = magnitude ** 2
+        mel_spec = mel_filterbank(sample_rate) @ power
+        if mfcc:
+            mfccs = dct_matrix() @ librosa.power_to_db(mel_spec)
+
+    chroma_spec = empty
+    if chroma:
+        tuning = librosa.estimate_tuning(S=magnitude, sr=sample_rate, bins_per_octave=N_CHROMA)
+        raw_chroma = chroma_filterbank(sample_rate, N_FFT, float(tuning)) @ magnitude
+        chroma_spec = librosa.util.normalize(raw_chroma, norm=np.inf, axis=0)
+
+    return SpectralFrames(
+        mfccs,
+        chroma_spec,
+        mel_spec if mel else empty,
+        sample_rate,
+    )
+
+
+def window_vectors(frames, window_frames, hop_frames, mfcc=True, chroma=True, mel=True):
+    """
+    Window-level feature vectors by strided aggregation over the frame matrix.
+
+    Each window is the mean of `window_frames` consecutive frames, windows
+    start every `hop_frames` frames. Uses a cumulative sum, so the cost is
+    O(n_frames) regardless of window overlap. A clip shorter than one window
+    yields a single window over all frames.
+
+    Returns (vectors, starts): (n_windows, n_features) and the first frame
+    index of each window.
+    """
+    stacked = frames.stack(mfcc=mfcc, chroma=chroma, mel=mel)
+    n_frames = stacked.shape[0]
+    window_frames = max(1, min(int(window_frames), n_frames))
+    hop_frames = max(1, int(hop_frames))
+
+    starts = np.arange(0, n_frames - window_frames + 1, hop_frames)
+    cumulative = np.zeros((n_frames + 1, stacked.shape[1]), dtype=np.float64)
+    np.cumsum(stacked, axis=0, out=cumulative[1:])
+    vectors = (cumulative[starts + window_frames] - cumulative[starts]) / window_frames
+    return vectors, starts
+
+
+def seconds_to_frames(seconds, sample_rate, hop_length=HOP_LENGTH):
+    """Number of STFT frames covering `seconds` of audio (at least 1)."""
+    return max(1, int(round(seconds * sample_rate / hop_length)))
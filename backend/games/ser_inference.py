@@ -0,0 +1,201 @@
+"""
+Pure-NumPy inference for the SER classifier.
+
+Runs the trained MLP (or a multinomial logistic regression) as float32 matmuls with in-place
+activations and a softmax, skipping sklearn's per-call input validation and
+removing the runtime dependency on the sklearn version that trained it.
+
+Select the engine with SER_ENGINE=numpy (default) or SER_ENGINE=sklearn,
+or at runtime with ser_engine.set_engine(...).
+
+Validate and benchmark against the pickled estimator:
+    python -m games.ser_inference validate
+    python -m games.ser_inference bench --batch-sizes 1 16 64
+"""
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("numpy", "sklearn")
+DEFAULT_ENGINE = "numpy"
+
+# Max |p_numpy - p_sklearn| accepted by validate()
+DEFAULT_TOLERANCE = 1e-4
+
+
+def extract_layers(model):
+    """
+    Return (weights, biases, activation, out_activation) for an
+    MLPClassifier or a multinomial LogisticRegression. Other linear models
+    turn scores into probabilities differently (one-vs-rest sigmoids,
+    normalized), so a softmax over their coef_ would silently disagree with
+    their predict_proba: they raise ValueError.
+    """
+    name = type(model).__name__
+    if name == "MLPClassifier":
+        return (
+            list(model.coefs_),
+            list(model.intercepts_),
+            model.activation,
+            model.out_activation_,
+        )
+    if name == "LogisticRegression":
+        multinomial = (len(model.classes_) > 2 and getattr(model, "solver", "lbfgs") != "liblinear"
+                       and getattr(model, "multi_class", "auto") != "ovr")
+        if not multinomial:
+            raise ValueError("Only multinomial LogisticRegression (3+ classes, not one-vs-rest) is supported")
+        return [np.asarray(model.coef_).T], [np.asarray(model.intercept_)], "identity", "softmax"
+    raise ValueError(f"Unsupported estimator type: {name}")
+
+
+def _activate(a, name):
+    """Apply an activation in place where possible."""
+    if name == "relu":
+        return np.maximum(a, 0, out=a)
+    if name == "tanh":
+        return np.tanh(a, out=a)
+    if name == "logistic":
+        np.negative(a, out=a)
+        np.exp(a, out=a)
+        a += 1
+        return np.reciprocal(a, out=a)
+    if name == "softmax":
+        a -= a.max(axis=1, keepdims=True)
+        np.exp(a, out=a)
+        a /= a.sum(axis=1, keepdims=True)
+        return a
+    return a
+
+
+class NumpyMLPEngine:
+    """
+    Float32 forward pass with the sklearn classifier interface
+    (classes_, predict, predict_proba).
+    """
+
+    name = "numpy"
+
+    def __init__(self, weights, biases, activation, out_activation, classes):
+        # Contiguous float32; memory-mapped artifact arrays are used as-is (no copy)
+        self.weights = [np.asarray(W, dtype=np.float32, order="C") for W in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activation = activation
+        self.out_activation = out_activation
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = self.weights[0].shape[0]
+
+    @classmethod
+    def from_estimator(cls, model):
+        """Build from a fitted sklearn MLPClassifier / multinomial LogisticRegression."""
+        weights, biases, activation, out_activation = extract_layers(model)
+        return cls(weights, biases, activation, out_activation, model.classes_)
+
+    def predict_proba(self, X):
+        a = np.asarray(X, dtype=np.float32)
+        if a.ndim == 1:
+            a = a.reshape(1, -1)
+        last = len(self.weights) - 1
+        for i, (W, b) in enumerate(zip(self.weights, self.biases)):
+            a = a @ W
+            a += b
+            a = _activate(a, self.out_activation if i == last else self.activation)
+        if self.out_activation == "logistic" and a.shape[1] == 1:
+            # Binary model: sklearn stores only the positive-class column
+            a = np.hstack((1 - a, a))
+        return a
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def validate(self, reference, X, atol=DEFAULT_TOLERANCE):
+        """
+        Compare against a reference estimator's predict_proba.
+        Returns the max absolute difference; raises ValueError above atol
+        or if the class order differs.
+        """
+        if [str(c) for c in reference.classes_] != [str(c) for c in self.classes_]:
+            raise ValueError("Class order differs from the reference model")
+        diff = float(np.max(np.abs(self.predict_proba(X) - reference.predict_proba(X))))
+        if diff > atol:
+            raise ValueError(f"NumPy engine differs from reference by {diff:.2e} (> {atol:.0e})")
+        return diff
+
+
+def resolve_engine_name(name=None):
+    """Engine from the argument, else SER_ENGINE, else the default."""
+    name = (name or os.environ.get("SER_ENGINE") or DEFAULT_ENGINE).lower()
+    if name not in ENGINES:
+        logger.warning("Unknown SER engine '%s', using '%s'", name, DEFAULT_ENGINE)
+        name = DEFAULT_ENGINE
+    return name
+
+
+# ============== BENCHMARK ==============
+def _time_per_call(fn, X, repeat):
+    fn(X)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark(reference, engine, batch_sizes=(1, 16, 64), repeat=500, seed=0):
+    """Time predict_proba for both engines. Returns one row per batch size."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for batch in batch_sizes:
+        X = rng.normal(scale=10.0, size=(batch, engine.n_features_in_))
+        sklearn_s = _time_per_call(reference.predict_proba, X, repeat)
+        numpy_s = _time_per_call(engine.predict_proba, X, repeat)
+        rows.append({
+            "batch": batch,
+            "sklearn_us": sklearn_s * 1e6,
+            "numpy_us": numpy_s * 1e6,
+            "speedup": sklearn_s / numpy_s if numpy_s > 0 else float("inf"),
+            "max_abs_diff": float(np.max(np.abs(engine.predict_proba(X) - reference.predict_proba(X)))),
+        })
+    return rows
+
+
+def _load_reference(pkl_path):
+    try:
+        from .ser_model import read_pickle
+    except ImportError:
+        try:
+            from games.ser_model import read_pickle
+        except ImportError:
+            from ser_model import read_pickle
+    return read_pickle(pkl_path)
+
+
+def main():
+    models_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+    parser = argparse.ArgumentParser(description="SER NumPy inference engine tools")
+    parser.add_argument("command", choices=["validate", "bench"])
+    parser.add_argument("--pickle", default=os.path.join(models_dir, "ser_model.pkl"))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--atol", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    reference = _load_reference(args.pickle)
+    engine = NumpyMLPEngine.from_estimator(reference)
+
+    if args.command == "validate":
+        X = np.random.default_rng(0).normal(scale=10.0, size=(256, engine.n_features_in_))
+        diff = engine.validate(reference, X, atol=args.atol)
+        print(f"OK: max |p_numpy - p_sklearn| = {diff:.2e} over {len(X)} rows")
+    else:
+        print(f"{'batch':>6} {'sklearn us':>12} {'numpy us':>10} {'speedup':>8} {'max diff':>10}")
+        for row in benchmark(reference, engine, args.batch_sizes, args.repeat):
+            print(f"{row['batch']:>6} {row['sklearn_us']:>12.1f} {row['numpy_us']:>10.1f} "
+                  f"{row['speedup']:>7.1f}x {row['max_abs_diff']:>10.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Compact, versioned model artifact for Speech Emotion Recognition.
+
+An artifact is a directory holding a small JSON manifest (classes, feature
+layout, layer list) next to one raw .npy file per weight matrix and bias
+vector. Arrays are memory-mapped read-only, so loading takes milliseconds,
+doesn't depend on the sklearn / numpy version the model was trained with,
+and the pages are shared between worker processes through the OS page cache.
+
+Convert the existing pickle with:
+    python -m games.ser_model convert models/ser_model.pkl models/ser_model
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    from .ser_features import FEATURE_LAYOUT, N_FEATURES, N_FFT, HOP_LENGTH, SAMPLE_RATE
+    from .ser_inference import NumpyMLPEngine, extract_layers
+except ImportError:
+    try:
+        from games.ser_features import FEATURE_LAYOUT, N_FEATURES, N_FFT, HOP_LENGTH, SAMPLE_RATE
+        from games.ser_inference import NumpyMLPEngine, extract_layers
+    except ImportError:
+        from ser_features import FEATURE_LAYOUT, N_FEATURES, N_FFT, HOP_LENGTH, SAMPLE_RATE
+        from ser_inference import NumpyMLPEngine, extract_layers
+
+ARTIFACT_FORMAT = "ser-mlp"
+ARTIFACT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+ACTIVATIONS = ("identity", "logistic", "tanh", "relu", "softmax")
+
+# RAVDESS filename emotion codes (third field, e.g. 03-01-05-...wav -> angry)
+EMOTION_CODES = {
+    '01': 'neutral',
+    '02': 'calm',
+    '03': 'happy',
+    '04': 'sad',
+    '05': 'angry',
+    '06': 'fearful',
+    '07': 'disgust',
+    '08': 'surprised'
+}
+
+
+class ModelArtifactError(ValueError):
+    """Raised when an artifact is missing, malformed or incompatible."""
+
+
+# ============== LOADING ==============
+class SERModelArtifact:
+    """
+    Read-only view of a converted model.
+    Exposes the small part of the sklearn classifier API that
+    SpeechEmotionRecognizer uses (classes_, predict, predict_proba).
+    """
+
+    def __init__(self, path, manifest, weights, biases):
+        self.path = path
+        self.manifest = manifest
+        self.weights = weights
+        self.biases = biases
+        self.classes_ = np.array(manifest["classes"])
+        self.activation = manifest["activation"]
+        self.out_activation = manifest["out_activation"]
+        self.n_features_in_ = manifest["n_features"]
+        self.sample_rate = manifest.get("feature_params", {}).get("sample_rate", SAMPLE_RATE)
+        # Float32 forward pass straight over the memory-mapped arrays
+        self.engine = NumpyMLPEngine(weights, biases, self.activation, self.out_activation, self.classes_)
+
+    def predict_proba(self, X):
+        """Forward pass through the stored layers (NumPy engine)."""
+        return self.engine.predict_proba(X)
+
+    def predict(self, X):
+        return self.engine.predict(X)
+
+
+def load_artifact(path, mmap=True):
+    """
+    Load an artifact directory. With mmap=True (default) arrays are
+    memory-mapped read-only instead of read into private memory.
+    """
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ModelArtifactError(f"No {MANIFEST_NAME} in {path}")
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ModelArtifactError(f"Unknown artifact format: {manifest.get('format')}")
+    if manifest.get("version", 0) > ARTIFACT_VERSION:
+        raise ModelArtifactError(
+            f"Artifact version {manifest.get('version')} is newer than supported ({ARTIFACT_VERSION})"
+        )
+    if manifest.get("n_features") != N_FEATURES:
+        raise ModelArtifactError(
+            f"Artifact expects {manifest.get('n_features')} features, pipeline produces {N_FEATURES}"
+        )
+
+    mmap_mode = "r" if mmap else None
+    weights, biases = [], []
+    for layer in manifest["layers"]:
+        W = np.load(os.path.join(path, layer["weights"]), mmap_mode=mmap_mode)
+        b = np.load(os.path.join(path, layer["biases"]), mmap_mode=mmap_mode)
+        if list(W.shape) != layer["shape"] or b.shape != (W.shape[1],):
+            raise ModelArtifactError(f"Layer {layer['weights']} does not match manifest shape")
+        weights.append(W)
+        biases.append(b)
+
+    return SERModelArtifact(path, manifest, weights, biases)
+
+
+# ============== CONVERSION ==============
+class _CompatUnpickler(pickle.Unpickler):
+    """
+    Unpickler that tolerates pickles written under a different numpy major
+    version. numpy 2 moved numpy.core to numpy._core and changed the
+    BitGenerator pickle format; only the estimator's random state depends
+    on the latter, and inference never uses it.
+    """
+
+    def find_class(self, module, name):
+        if module.startswith("numpy._core") and not hasattr(np, "_core"):
+            module = module.replace("numpy._core", "numpy.core", 1)
+        if module == "numpy.random._pickle":
+            return _DiscardedRandomState
+        return super().find_class(module, name)
+
+
+class _DiscardedRandomState:
+    def __init__(self, *args):
+        pass
+
+    def __setstate__(self, state):
+        pass
+
+
+def write_artifact(model, out_dir, source=None, sample_rate=SAMPLE_RATE, training=None):
+    """
+    Write a fitted classifier as an artifact directory. Returns the manifest.
+
+    Running workers have the old weights memory-mapped, so files are never
+    rewritten in place: the artifact is built in a temporary directory next
+    to out_dir and swapped in (see _swap_in). Layer files of an earlier,
+    deeper model go away with the old directory.
+    """
+    try:
+        weights, biases, activation, out_activation = extract_layers(model)
+    except ValueError as e:
+        raise ModelArtifactError(str(e))
+    if activation not in ACTIVATIONS or out_activation not in ACTIVATIONS:
+        raise ModelArtifactError(f"Unsupported activation: {activation}/{out_activation}")
+
+    n_features = int(weights[0].shape[0])
+    if n_features != N_FEATURES:
+        raise ModelArtifactError(f"Model expects {n_features} features, pipeline produces {N_FEATURES}")
+
+    out_dir = os.path.abspath(out_dir)
+    parent = os.path.dirname(out_dir)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{os.path.basename(out_dir)}.", dir=parent)
+    os.chmod(staging, 0o755)  # mkdtemp creates it private
+    try:
+        manifest = _write_files(model, staging, weights, biases, activation, out_activation, n_features,
+                                source, sample_rate, training)
+        _swap_in(staging, out_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _swap_in(staging, out_dir):
+    """
+    Replace out_dir with the finished staging directory. A directory can't
+    be renamed over a non-empty one, so the old artifact is renamed aside
+    first (both renames are atomic; a loader starting between them sees no
+    artifact for that instant) and deleted afterwards; if the second rename
+    fails, the old artifact is moved back. Workers that still
+    map the old files keep reading them: unlinked files stay valid until
+    unmapped.
+    """
+    old = None
+    if os.path.exists(out_dir):
+        old = staging + ".old"
+        os.replace(out_dir, old)
+    try:
+        os.replace(staging, out_dir)
+    except BaseException:
+        if old is not None:
+            os.replace(old, out_dir)
+        raise
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _write_files(model, out_dir, weights, biases, activation, out_activation, n_features, source, sample_rate,
+                 training):
+    layers = []
+    for i, (W, b) in enumerate(zip(weights, biases)):
+        w_name = f"layer{i}_weights.npy"
+        b_name = f"layer{i}_biases.npy"
+        np.save(os.path.join(out_dir, w_name), np.ascontiguousarray(W, dtype=np.float32))
+        np.save(os.path.join(out_dir, b_name), np.ascontiguousarray(b, dtype=np.float32))
+        layers.append({"weights": w_name, "biases": b_name, "shape": [int(d) for d in W.shape]})
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "classes": [str(c) for c in model.classes_],
+        "activation": activation,
+        "out_activation": out_activation,
+        "n_features": n_features,
+        "feature_layout": {k: list(v) for k, v in FEATURE_LAYOUT.items()},
+        "feature_params": {"n_fft": N_FFT, "hop_length": HOP_LENGTH, "sample_rate": sample_rate},
+        "dtype": "float32",
+        "layers": layers,
+    }
+    if source:
+        manifest["source"] = source
+    if training:
+        manifest["training"] = training
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_pickle(pkl_path):
+    """Unpickle a sklearn classifier, tolerating numpy 1.x / 2.x pickles."""
+    with open(pkl_path, "rb") as f:
+        return _CompatUnpickler(f).load()
+
+
+def convert_pickle(pkl_path, out_dir):
+    """Convert a pickled sklearn classifier into an artifact directory."""
+    with open(pkl_path, "rb") as f:
+        data = f.read()
+    model = _CompatUnpickler(io.BytesIO(data)).load()
+    source = {
+        "file": os.path.basename(pkl_path),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "estimator": type(model).__name__,
+    }
+    return write_artifact(model, out_dir, source=source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SER model artifact tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser("convert", help="Convert a pickled sklearn model to an artifact")
+    convert.add_argument("pickle", help="Path to ser_model.pkl")
+    convert.add_argument("out_dir", help="Artifact directory to write")
+
+    inspect = sub.add_parser("inspect", help="Load an artifact and print its manifest")
+    inspect.add_argument("path", help="Artifact directory")
+
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        manifest = convert_pickle(args.pickle, args.out_dir)
+        print(f"Wrote {args.out_dir} ({len(manifest['layers'])} layers, classes={manifest['classes']})")
+    elif args.command == "inspect":
+        start = time.perf_counter()
+        artifact = load_artifact(args.path)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(json.dumps(artifact.manifest, indent=2))
+        print(f"Loaded in {elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
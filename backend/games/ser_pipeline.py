@@ -1,10 +1,30 @@
+import logging
 import os
+import time
 import numpy as np
-import pickle
-import librosa
-import soundfile as sf
-import io
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from .ser_features import compute_frames, window_vectors, seconds_to_frames, to_mono, SAMPLE_RATE
+    from .audio_decode import decode_audio, resample
+    from .ser_model import load_artifact, read_pickle, MANIFEST_NAME, EMOTION_CODES
+    from .ser_inference import NumpyMLPEngine, resolve_engine_name
+    from .metrics import STAGE_LATENCY
+except ImportError:
+    try:
+        from games.ser_features import compute_frames, window_vectors, seconds_to_frames, to_mono, SAMPLE_RATE
+        from games.audio_decode import decode_audio, resample
+        from games.ser_model import load_artifact, read_pickle, MANIFEST_NAME, EMOTION_CODES
+        from games.ser_inference import NumpyMLPEngine, resolve_engine_name
+        from games.metrics import STAGE_LATENCY
+    except ImportError:
+        from ser_features import compute_frames, window_vectors, seconds_to_frames, to_mono, SAMPLE_RATE
+        from audio_decode import decode_audio, resample
+        from ser_model import load_artifact, read_pickle, MANIFEST_NAME, EMOTION_CODES
+        from ser_inference import NumpyMLPEngine, resolve_engine_name
+        from metrics import STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
@@ -12,141 +32,237 @@ warnings.filterwarnings("ignore")
 class SpeechEmotionRecognizer:
     def __init__(self, model_path="model/ser_model.pkl"):
         self.model = None
+        self._feature_pool = None
+        # Rate features are computed at (inputs are resampled to it)
+        self.sample_rate = SAMPLE_RATE
         current_dir = os.path.dirname(os.path.abspath(__file__))
         # Go up one level to backend root, then to model folder? 
         # Or keep model in games/models? Let's use backend/models
         self.model_path = os.path.join(current_dir, "..", "models", "ser_model.pkl")
-        self.emotions = {
-            '01': 'neutral',
-            '02': 'calm',
-            '03': 'happy',
-            '04': 'sad',
-            '05': 'angry',
-            '06': 'fearful',
-            '07': 'disgust',
-            '08': 'surprised'
-        }
+        # Compact artifact (manifest + raw arrays), preferred over the pickle.
+        # Build it with: python -m games.ser_model convert models/ser_model.pkl models/ser_model
+        self.artifact_path = os.path.join(current_dir, "..", "models", "ser_model")
+        # RAVDESS emotion codes (shared with the trainer, see ser_train.py)
+        self.emotions = dict(EMOTION_CODES)
         # Emotions observed during training (must match model training!)
         self.observed_emotions = ['calm', 'happy', 'fearful', 'disgust']
         
         # Load model immediately if exists
         self.load_model()
         
-    def load_model(self):
+    def load_model(self, engine=None):
+        """
+        Load the classifier.
+        engine='numpy' (default, or SER_ENGINE env var) runs the float32 NumPy
+        forward pass; engine='sklearn' uses the pickled estimator as-is.
+        """
+        self.engine_name = resolve_engine_name(engine)
+
+        # Fast path: memory-mapped artifact, independent of sklearn/numpy versions
+        if self.engine_name == "numpy" and os.path.exists(os.path.join(self.artifact_path, MANIFEST_NAME)):
+            try:
+                artifact = load_artifact(self.artifact_path)
+                self.model = artifact.engine
+                self.sample_rate = artifact.sample_rate
+                self.use_fallback = False
+                logger.info("SER model artifact loaded from %s (engine: numpy)", self.artifact_path)
+                return
+            except Exception as artifact_error:
+                logger.warning("Failed to load SER model artifact: %s", artifact_error)
+
         try:
-            print(f"DEBUG: Looking for model at: {self.model_path}")
+            logger.debug("Looking for SER model at %s", self.model_path)
             # Check if directory exists
             model_dir = os.path.dirname(self.model_path)
             if os.path.exists(model_dir):
-                print(f"DEBUG: Directory {model_dir} contents: {os.listdir(model_dir)}")
+                logger.debug("Directory %s contents: %s", model_dir, os.listdir(model_dir))
             else:
-                print(f"DEBUG: Directory {model_dir} DOES NOT EXIST")
+                logger.debug("Directory %s does not exist", model_dir)
 
             if os.path.exists(self.model_path):
                 try:
-                    with open(self.model_path, 'rb') as file:
-                        self.model = pickle.load(file)
-                    print(f"SER Model loaded successfully from {self.model_path}")
+                    self.model = read_pickle(self.model_path)
+                    if self.engine_name == "numpy":
+                        self.model = NumpyMLPEngine.from_estimator(self.model)
+                    self.use_fallback = False
+                    logger.info("SER model loaded from %s (engine: %s)", self.model_path, self.engine_name)
                 except Exception as pickle_error:
-                    print(f"Failed to unpickle model (numpy version mismatch?): {pickle_error}")
-                    print("Using fallback rule-based emotion detection")
+                    logger.warning("Failed to unpickle SER model (numpy version mismatch?), "
+                                   "using rule-based fallback: %s", pickle_error)
                     self.model = None
                     self.use_fallback = True
             else:
-                print("SER Model not found. Using fallback mode.")
+                logger.warning("SER model not found, using fallback mode")
                 self.use_fallback = True
-        except Exception as e:
-            print(f"Failed to load SER model: {e}")
+        except Exception:
+            logger.exception("Failed to load SER model")
             self.use_fallback = True
 
+    def set_engine(self, engine):
+        """Switch inference engine at runtime ('numpy' or 'sklearn')."""
+        self.load_model(engine=engine)
+        return self.engine_name
+
+    def load_audio(self, audio_data):
+        """
+        Decode audio to (mono float32 samples, sample_rate) at the model's rate.
+        Accepts bytes, a file-like object, or an already decoded
+        (samples, sample_rate) tuple. Compressed containers (webm/opus, ogg,
+        mp4) are decoded with ffmpeg, see audio_decode.py.
+        """
+        if isinstance(audio_data, tuple):
+            X, sample_rate = audio_data
+            return resample(to_mono(X), sample_rate, self.sample_rate)
+        return decode_audio(audio_data, self.sample_rate)
+
     def extract_feature(self, audio_data, mfcc=True, chroma=True, mel=True):
         """
         Extract features from audio buffer (BytesIO or bytes).
         """
         try:
-            # Load audio using soundfile (librosa load can be slow or problematic with streams)
-            # soundfile expects file path or file-like object
-            if isinstance(audio_data, bytes):
-                audio_io = io.BytesIO(audio_data)
-            else:
-                audio_io = audio_data
-
-            with sf.SoundFile(audio_io) as sound_file:
-                X = sound_file.read(dtype="float32")
-                sample_rate = sound_file.samplerate
-                
-                # If chroma is true, compute STFT
-                if chroma:
-                    stft = np.abs(librosa.stft(X))
-                    
-                result = np.array([])
-                
-                if mfcc:
-                    mfccs = np.mean(librosa.feature.mfcc(y=X, sr=sample_rate, n_mfcc=40).T, axis=0)
-                    result = np.hstack((result, mfccs))
-                    
-                if chroma:
-                    chroma = np.mean(librosa.feature.chroma_stft(S=stft, sr=sample_rate).T, axis=0)
-                    result = np.hstack((result, chroma))
-                    
-                if mel:
-                    mel = np.mean(librosa.feature.melspectrogram(y=X, sr=sample_rate).T, axis=0)
-                    result = np.hstack((result, mel))
-                    
+            t0 = time.perf_counter()
+            X, sample_rate = self.load_audio(audio_data)
+            t1 = time.perf_counter()
+            STAGE_LATENCY.observe(t1 - t0, "decode", "ser")
+
+            # One STFT shared by MFCC, chroma and mel (see ser_features.py)
+            frames = compute_frames(X, sample_rate, mfcc=mfcc, chroma=chroma, mel=mel)
+            result = frames.mean_vector(mfcc=mfcc, chroma=chroma, mel=mel)
+            STAGE_LATENCY.observe(time.perf_counter() - t1, "features", "ser")
+
             return result
         except Exception as e:
-            print(f"Error extracting features: {e}")
+            logger.warning("Error extracting features: %s", e)
             return None
 
     def predict(self, audio_bytes):
         """
         Predict emotion from audio bytes.
         """
+        return self.predict_batch([audio_bytes])[0]
+
+    def predict_batch(self, clips):
+        """
+        Predict emotions for several clips at once.
+        Features are extracted in parallel, stacked into one (N, F) matrix
+        and classified with a single predict_proba call; argmax gives the label.
+        Results come back in input order.
+        """
         # Check for fallback mode
         if hasattr(self, 'use_fallback') and self.use_fallback:
-            return self._fallback_predict(audio_bytes)
-        
+            return [self._fallback_predict(clip) for clip in clips]
+
         if not self.model:
-            return self._fallback_predict(audio_bytes)
-        
-        # Extract features
-        features = self.extract_feature(audio_bytes, mfcc=True, chroma=True, mel=True)
-        
-        if features is None:
-            return {"emotion": "error", "message": "Extraction failed"}
-            
-        # Reshape for sklearn scalar/model (1, -1)
-        features = features.reshape(1, -1)
-        
-        # Predict
-        prediction = self.model.predict(features)
-        
-        # Get probabilities if supported
+            return [self._fallback_predict(clip) for clip in clips]
+
+        # Extract features (in parallel when there is more than one clip)
+        if len(clips) > 1:
+            features = list(self._get_feature_pool().map(self.extract_feature, clips))
+        else:
+            features = [self.extract_feature(clip) for clip in clips]
+
+        results = [None] * len(clips)
+        rows = []
+        for i, vector in enumerate(features):
+            if vector is None:
+                results[i] = {"emotion": "error", "message": "Extraction failed"}
+            else:
+                rows.append(i)
+
+        if rows:
+            X = np.vstack([features[i] for i in rows])
+            for i, result in zip(rows, self._classify(X)):
+                results[i] = result
+
+        return results
+
+    def predict_timeline(self, audio_bytes, window_seconds=2.0, hop_seconds=0.5):
+        """
+        Emotion over time for a longer recording.
+        The spectrogram is computed once; window vectors are averaged from its
+        frames and all windows are classified in a single batch.
+        Returns per-window probabilities as a compact (n_windows, n_classes) list.
+        """
+        if (hasattr(self, 'use_fallback') and self.use_fallback) or not self.model:
+            return {"status": "error", "message": "Timeline mode needs the trained SER model", "mode": "fallback"}
+
+        if window_seconds <= 0 or hop_seconds <= 0:
+            return {"status": "error", "message": "window_seconds and hop_seconds must be positive"}
+
         try:
-            probs = self.model.predict_proba(features)[0]
-            confidence = max(probs)
-            all_probs = {self.model.classes_[i]: float(probs[i]) for i in range(len(probs))}
-        except:
-            confidence = 1.0
-            all_probs = {}
+            X, sample_rate = self.load_audio(audio_bytes)
+            frames = compute_frames(X, sample_rate)
+        except Exception as e:
+            logger.warning("Error extracting timeline features: %s", e)
+            return {"status": "error", "message": "Extraction failed"}
+
+        window_frames = seconds_to_frames(window_seconds, sample_rate, frames.hop_length)
+        hop_frames = seconds_to_frames(hop_seconds, sample_rate, frames.hop_length)
+        vectors, starts = window_vectors(frames, window_frames, hop_frames)
+
+        # Windows plus the whole clip in one model call
+        probs = self.model.predict_proba(np.vstack((vectors, frames.mean_vector())))
+        window_probs, clip_probs = probs[:-1], probs[-1]
+
+        classes = [str(c) for c in self.model.classes_]
+        frame_seconds = frames.hop_length / sample_rate
+        best = np.argmax(window_probs, axis=1)
+        overall = int(np.argmax(clip_probs))
 
         return {
-            "emotion": prediction[0],
-            "confidence": float(confidence),
-            "probabilities": all_probs,
-            "status": "success"
+            "status": "success",
+            "classes": classes,
+            "window_seconds": float(window_seconds),
+            "hop_seconds": float(hop_seconds),
+            "times": np.round(starts * frame_seconds, 3).tolist(),
+            "emotions": [classes[j] for j in best],
+            "probabilities": np.round(window_probs, 4).tolist(),
+            "overall": {"emotion": classes[overall], "confidence": float(clip_probs[overall])}
         }
-    
+
+    def _classify(self, X):
+        """Classify a (N, F) feature matrix with one model call."""
+        try:
+            with STAGE_LATENCY.time("inference", "ser"):
+                probs = self.model.predict_proba(X)
+        except Exception:
+            # Model without probabilities: plain predict
+            return [
+                {"emotion": str(label), "confidence": 1.0, "probabilities": {}, "status": "success"}
+                for label in self.model.predict(X)
+            ]
+
+        classes = [str(c) for c in self.model.classes_]
+        best = np.argmax(probs, axis=1)
+        return [
+            {
+                "emotion": classes[j],
+                "confidence": float(row[j]),
+                "probabilities": {classes[k]: float(row[k]) for k in range(len(classes))},
+                "status": "success"
+            }
+            for row, j in zip(probs, best)
+        ]
+
+    def _get_feature_pool(self):
+        """Thread pool for feature extraction (the FFT/numpy work releases the GIL)."""
+        if self._feature_pool is None:
+            workers = min(4, os.cpu_count() or 1)
+            self._feature_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ser-features")
+        return self._feature_pool
+
     def _fallback_predict(self, audio_bytes):
         """
         Fallback emotion detection using simple audio features.
         Uses energy (RMS) and pitch variance for basic classification.
         """
         try:
-            # Load audio
-            audio_data, sample_rate = sf.read(io.BytesIO(audio_bytes))
-            if len(audio_data.shape) > 1:
-                audio_data = audio_data.mean(axis=1)
+            # Load audio (native rate: the thresholds below are per-sample)
+            if isinstance(audio_bytes, tuple):
+                audio_data, sample_rate = audio_bytes
+            else:
+                audio_data, sample_rate = decode_audio(audio_bytes)
+            audio_data = to_mono(audio_data)
             
             # Calculate simple features
             rms_energy = np.sqrt(np.mean(audio_data**2))
@@ -187,7 +303,7 @@ class SpeechEmotionRecognizer:
                 "mode": "fallback"
             }
         except Exception as e:
-            print(f"Fallback prediction error: {e}")
+            logger.warning("Fallback prediction error: %s", e)
             return {
                 "emotion": "neutral",
                 "confidence": 0.5,
@@ -0,0 +1,322 @@
+"""
+Training pipeline for the Speech Emotion Recognition model.
+
+Walks a labeled corpus, extracts features in a process pool into a
+memory-mapped feature store keyed by file hash (re-runs only extract new or
+changed files), trains and evaluates the classifier, and writes a model
+artifact (see ser_model.py) whose manifest records the metrics.
+
+Labels come from either layout:
+    corpus/Actor_01/03-01-05-01-02-01-01.wav   RAVDESS code in the 3rd field
+    corpus/happy/clip_001.webm                 parent directory is the label
+
+Usage:
+    python -m games.ser_train path/to/corpus
+    python -m games.ser_train path/to/corpus --emotions calm happy fearful disgust --workers 8
+
+Without --out the artifact goes to a new models/ser_model-<timestamp>
+directory, never over the shipped models/ser_model. Promote a model by
+passing --out models/ser_model explicitly (write_artifact swaps the
+directory atomically, so running workers keep their mapped weights).
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .audio_decode import decode_audio
+    from .ser_features import compute_frames, N_FEATURES, N_FFT, HOP_LENGTH, SAMPLE_RATE
+    from .ser_model import EMOTION_CODES, write_artifact
+except ImportError:
+    try:
+        from games.audio_decode import decode_audio
+        from games.ser_features import compute_frames, N_FEATURES, N_FFT, HOP_LENGTH, SAMPLE_RATE
+        from games.ser_model import EMOTION_CODES, write_artifact
+    except ImportError:
+        from audio_decode import decode_audio
+        from ser_features import compute_frames, N_FEATURES, N_FFT, HOP_LENGTH, SAMPLE_RATE
+        from ser_model import EMOTION_CODES, write_artifact
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".webm", ".mp3", ".m4a", ".opus")
+
+# Hyper-parameters of the shipped ser_model.pkl
+DEFAULT_MLP_PARAMS = {
+    "alpha": 0.01,
+    "batch_size": 32,
+    "epsilon": 1e-08,
+    "hidden_layer_sizes": (300,),
+    "learning_rate": "adaptive",
+    "max_iter": 500,
+}
+
+
+# ============== CORPUS ==============
+def label_for(path, emotion_codes=EMOTION_CODES):
+    """Emotion label for a corpus file, or None if it can't be determined."""
+    parent = os.path.basename(os.path.dirname(path)).lower()
+    if parent in emotion_codes.values():
+        return parent
+    parts = os.path.splitext(os.path.basename(path))[0].split("-")
+    if len(parts) >= 3:
+        return emotion_codes.get(parts[2])
+    return None
+
+
+def collect_corpus(root, emotions=None):
+    """List (path, label) pairs under root, optionally restricted to some emotions."""
+    items = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if not name.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, name)
+            label = label_for(path)
+            if label is None or (emotions and label not in emotions):
+                continue
+            items.append((path, label))
+    items.sort()
+    return items
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents (cache key for its features)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ============== FEATURE STORE ==============
+class FeatureStore:
+    """
+    On-disk feature cache: features.npy (rows, memory-mapped) plus
+    index.json (file hash -> row, feature parameters). Parameter changes
+    invalidate the whole store.
+    """
+
+    def __init__(self, directory, params=None):
+        self.directory = directory
+        self.params = params or feature_params()
+        self.features_path = os.path.join(directory, "features.npy")
+        self.index_path = os.path.join(directory, "index.json")
+        self.index = {}
+        self.features = np.empty((0, N_FEATURES), dtype=np.float32)
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.index_path) and os.path.exists(self.features_path)):
+            return
+        with open(self.index_path) as f:
+            meta = json.load(f)
+        if meta.get("params") != self.params:
+            print("Feature store parameters changed, re-extracting everything")
+            return
+        self.features = np.load(self.features_path, mmap_mode="r")
+        self.index = meta["rows"]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, digest):
+        return digest in self.index
+
+    def get(self, digests):
+        """(len(digests), N_FEATURES) matrix for cached hashes."""
+        rows = [self.index[d] for d in digests]
+        return np.asarray(self.features[rows], dtype=np.float32)
+
+    def add(self, new_rows):
+        """Append {digest: vector} and persist (write-then-rename)."""
+        if not new_rows:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        n_old = self.features.shape[0]
+        digests = list(new_rows)
+
+        tmp_path = self.features_path + ".tmp"
+        out = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(n_old + len(digests), N_FEATURES)
+        )
+        out[:n_old] = self.features
+        out[n_old:] = np.vstack([new_rows[d] for d in digests])
+        out.flush()
+        del out
+
+        index = dict(self.index)
+        for i, digest in enumerate(digests):
+            index[digest] = n_old + i
+
+        self.features = None  # release the old mapping before replacing the file
+        os.replace(tmp_path, self.features_path)
+        with open(self.index_path + ".tmp", "w") as f:
+            json.dump({"params": self.params, "rows": index}, f)
+        os.replace(self.index_path + ".tmp", self.index_path)
+
+        self.index = index
+        self.features = np.load(self.features_path, mmap_mode="r")
+
+
+def feature_params():
+    return {"n_features": N_FEATURES, "n_fft": N_FFT, "hop_length": HOP_LENGTH, "sample_rate": SAMPLE_RATE}
+
+
+# ============== EXTRACTION ==============
+def _extract_file(path):
+    """Worker: (feature vector or None, audio seconds) for one file."""
+    try:
+        with open(path, "rb") as f:
+            X, sample_rate = decode_audio(f.read(), SAMPLE_RATE)
+        vector = compute_frames(X, sample_rate).mean_vector().astype(np.float32)
+        return vector, len(X) / sample_rate
+    except Exception as e:
+        print(f"Skipping {path}: {e}")
+        return None, 0.0
+
+
+def build_dataset(items, store, workers=None):
+    """
+    Feature matrix and labels for the corpus, extracting only files whose
+    hash isn't in the store. Returns (X, y, stats).
+    """
+    start = time.perf_counter()
+    digests = [file_digest(path) for path, _ in items]
+
+    todo = {}
+    for (path, _), digest in zip(items, digests):
+        if digest not in store and digest not in todo:
+            todo[digest] = path
+
+    extracted = {}
+    audio_seconds = 0.0
+    extract_start = time.perf_counter()
+    if todo:
+        paths = list(todo.values())
+        chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for digest, (vector, seconds) in zip(todo, pool.map(_extract_file, paths, chunksize=chunksize)):
+                if vector is not None:
+                    extracted[digest] = vector
+                    audio_seconds += seconds
+        store.add(extracted)
+    extract_seconds = time.perf_counter() - extract_start
+
+    keep = [i for i, digest in enumerate(digests) if digest in store]
+    X = store.get([digests[i] for i in keep]) if keep else np.empty((0, N_FEATURES), dtype=np.float32)
+    y = np.array([items[i][1] for i in keep])
+
+    stats = {
+        "files": len(items),
+        "cached": len(items) - len(todo),
+        "extracted": len(extracted),
+        "failed": len(todo) - len(extracted),
+        "extract_seconds": extract_seconds,
+        "files_per_second": len(extracted) / extract_seconds if extracted and extract_seconds > 0 else 0.0,
+        "audio_seconds_per_second": audio_seconds / extract_seconds if extracted and extract_seconds > 0 else 0.0,
+        "total_seconds": time.perf_counter() - start,
+    }
+    return X, y, stats
+
+
+# ============== TRAINING ==============
+def train_and_evaluate(X, y, test_size=0.25, seed=9, mlp_params=None):
+    """Fit an MLPClassifier and evaluate it on a stratified hold-out split."""
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+    from sklearn.model_selection import train_test_split
+    from sklearn.neural_network import MLPClassifier
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=seed, stratify=y
+    )
+    params = dict(DEFAULT_MLP_PARAMS)
+    params.update(mlp_params or {})
+    model = MLPClassifier(random_state=seed, **params)
+    model.fit(X_train, y_train)
+
+    y_pred = model.predict(X_test)
+    labels = [str(c) for c in model.classes_]
+    report = classification_report(y_test, y_pred, labels=labels, output_dict=True, zero_division=0)
+    metrics = {
+        "accuracy": float(accuracy_score(y_test, y_pred)),
+        "n_train": int(len(y_train)),
+        "n_test": int(len(y_test)),
+        "per_class": {
+            label: {k: float(report[label][k]) for k in ("precision", "recall", "f1-score", "support")}
+            for label in labels
+        },
+        "confusion_matrix": confusion_matrix(y_test, y_pred, labels=labels).tolist(),
+    }
+    return model, metrics
+
+
+def print_report(stats, metrics):
+    print(f"Files: {stats['files']} ({stats['cached']} cached, {stats['extracted']} extracted, "
+          f"{stats['failed']} failed)")
+    if stats["extracted"]:
+        print(f"Extraction: {stats['files_per_second']:.1f} files/s, "
+              f"{stats['audio_seconds_per_second']:.1f}x real time")
+    print(f"Accuracy: {metrics['accuracy'] * 100:.2f}% (train {metrics['n_train']}, test {metrics['n_test']})")
+    print(f"{'emotion':>10} {'precision':>9} {'recall':>7} {'f1':>6} {'support':>7}")
+    for label, row in metrics["per_class"].items():
+        print(f"{label:>10} {row['precision']:>9.2f} {row['recall']:>7.2f} "
+              f"{row['f1-score']:>6.2f} {int(row['support']):>7}")
+
+
+def main():
+    backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    parser = argparse.ArgumentParser(description="Train the SER classifier")
+    parser.add_argument("corpus", help="Corpus root (RAVDESS layout or one folder per emotion)")
+    parser.add_argument("--out", default=None,
+                        help="Artifact directory to write (default: a new models/ser_model-<timestamp>)")
+    parser.add_argument("--cache-dir", default=os.path.join(backend_dir, "models", "feature_cache"),
+                        help="Feature store directory")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--emotions", nargs="+", default=None, help="Only train on these emotions")
+    parser.add_argument("--test-size", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=9)
+    parser.add_argument("--hidden", type=int, nargs="+", default=None, help="Hidden layer sizes")
+    parser.add_argument("--max-iter", type=int, default=None)
+    parser.add_argument("--pickle", default=None, help="Also write a sklearn pickle here")
+    args = parser.parse_args()
+    if args.out is None:
+        args.out = os.path.join(backend_dir, "models", time.strftime("ser_model-%Y%m%d-%H%M%S"))
+
+    items = collect_corpus(args.corpus, args.emotions)
+    if not items:
+        parser.error(f"No labeled audio files found under {args.corpus}")
+
+    store = FeatureStore(args.cache_dir)
+    X, y, stats = build_dataset(items, store, workers=args.workers)
+
+    mlp_params = {}
+    if args.hidden:
+        mlp_params["hidden_layer_sizes"] = tuple(args.hidden)
+    if args.max_iter:
+        mlp_params["max_iter"] = args.max_iter
+    model, metrics = train_and_evaluate(X, y, args.test_size, args.seed, mlp_params)
+
+    print_report(stats, metrics)
+
+    training = {
+        "corpus": os.path.abspath(args.corpus),
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "metrics": metrics,
+    }
+    write_artifact(model, args.out, source={"estimator": type(model).__name__}, training=training)
+    print(f"Wrote artifact to {args.out}")
+
+    if args.pickle:
+        import pickle
+        with open(args.pickle, "wb") as f:
+            pickle.dump(model, f)
+        print(f"Wrote pickle to {args.pickle}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+"""
+Session recording and deterministic replay.
+
+Tuning HandGestureStream's gesture thresholds or EmotionStream's scoring
+used to need a live camera. A SessionRecorder captures what a live
+/process-frame session saw and produced: the frames exactly as uploaded,
+the client and server timestamps, and the processor's outputs (label,
+detected flag, landmarks). replay() feeds a recording back through a fresh
+processor, either with the original timing or as fast as possible, and
+compare() diffs two sets of outputs, so a threshold change can be checked
+against real sessions in seconds.
+
+Recording layout (one directory, append-only chunks):
+
+    manifest.json          format, version, stream, landmark shape, chunks
+    00000.frames           encoded frames (JPEG/PNG as uploaded), concatenated
+    00000.index.npy        (n,) structured: offset, length, client_ts,
+                           server_ts, detected, label, extras, degradation,
+                           tracker (index into the manifest's "trackers",
+                           -1 if the processor has no tuned model)
+    00000.landmarks.npy    (n, *landmark_shape) float32, NaN = not detected
+
+A chunk's frames go straight to its .frames file; its index and landmarks
+are written when the chunk closes (every CHUNK_FRAMES frames, or on close),
+then the manifest is replaced atomically. A crash loses at most the open
+chunk. Everything is read back with np.load(mmap_mode="r") / np.memmap, so
+opening a recording costs nothing and comparisons run on whole arrays.
+
+Frames processed at a degraded admission level were resized before
+inference; they're recorded as uploaded, with the level in the index, so
+replaying them won't reproduce the live outputs exactly.
+
+The hand tracker autotunes its model configuration to the live machine's
+frame budget (see autotune.py). Each frame records the configuration it
+ran with, and replay() uses the same one, so a recording made while the
+tracker had stepped down still replays identically.
+
+Live recording: POST /recordings/start (X-Session-Id) then /process-frame
+as usual, then POST /recordings/stop. Recordings go to RECORDINGS_DIR.
+
+CLI:
+    python -m games.session_recorder info REC
+    python -m games.session_recorder replay REC --output outputs.npz [--realtime]
+    python -m games.session_recorder compare BASELINE CANDIDATE [--atol 1e-4]
+BASELINE / CANDIDATE are recordings (their live outputs) or replay outputs.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+try:
+    from .video_batch import VideoProcessingError, processor_runner
+except ImportError:
+    try:
+        from games.video_batch import VideoProcessingError, processor_runner
+    except ImportError:
+        from video_batch import VideoProcessingError, processor_runner
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "session-recording"
+VERSION = 2
+CHUNK_FRAMES = 256
+DEFAULT_MAX_FRAMES = int(os.environ.get("RECORDING_MAX_FRAMES", "54000"))  # 30 min at 30 fps
+
+INDEX_DTYPE = np.dtype([
+    ("offset", "<i8"),
+    ("length", "<i4"),
+    ("client_ts", "<f8"),  # as sent by the client (seconds), NaN if missing
+    ("server_ts", "<f8"),  # time.time() on arrival
+    ("detected", "?"),
+    ("label", "<U24"),
+    ("extras", "<U24"),
+    ("degradation", "<U12"),
+    ("tracker", "<i2"),  # version 2
+])
+
+# Processors a live session can record (/process-frame types)
+LANDMARK_SHAPES = {
+    "gesture": (2, 21, 3),
+    "pose": (33, 4),
+    "emotion": (478, 3),
+}
+
+
+class RecordingError(Exception):
+    """Not a recording, or one this version can't read."""
+
+
+def default_directory():
+    return os.environ.get("RECORDINGS_DIR") or os.path.join(tempfile.gettempdir(), "recordings")
+
+
+# ============== WRITER ==============
+class SessionRecorder:
+    """Appends frames and outputs of one session to a recording directory."""
+
+    def __init__(self, path, stream, options=None, chunk_frames=CHUNK_FRAMES, max_frames=DEFAULT_MAX_FRAMES):
+        if stream not in LANDMARK_SHAPES:
+            raise ValueError(f"Can't record {stream!r}, expected one of {sorted(LANDMARK_SHAPES)}")
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, "manifest.json")):
+            raise FileExistsError(f"{path} already holds a recording")
+        self.path = path
+        self.stream = stream
+        self.chunk_frames = chunk_frames
+        self.max_frames = max_frames
+        self.landmark_shape = LANDMARK_SHAPES[stream]
+        self.manifest = {
+            "format": FORMAT, "version": VERSION, "stream": stream, "options": dict(options or {}),
+            "landmark_shape": list(self.landmark_shape), "created_at": time.time(),
+            "frames": 0, "chunks": [], "closed": False, "trackers": [],
+        }
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._chunk = None
+        self._write_manifest()
+
+    @property
+    def full(self):
+        return self.frames >= self.max_frames
+
+    def process(self, processor, frame, data, client_ts=None, degradation="normal", **kwargs):
+        """
+        Run `processor` on the decoded frame like process_frame() and record
+        the encoded upload `data` with the outputs. Returns the annotated frame.
+        """
+        # The configuration this frame runs with (the tuner may switch after it)
+        tuner = getattr(processor, "tuner", None)
+        tracker = None if tuner is None else tuner.levels[tuner.level]
+        annotated, label, detected, landmarks = live_runner(self.stream, processor)(frame, **kwargs)
+        self.append(data, label, detected, landmarks, client_ts=client_ts,
+                    extras=",".join(kwargs.get("extras", ())), degradation=degradation, tracker=tracker)
+        return annotated
+
+    def append(self, data, label, detected, landmarks, client_ts=None, server_ts=None, extras="",
+               degradation="normal", tracker=None):
+        """
+        Record one encoded frame and its outputs (`tracker`: the tuned model
+        configuration it ran with). Returns False once max_frames is reached.
+        """
+        with self._lock:
+            if self.manifest["closed"]:
+                raise ValueError("Recording is closed")
+            if self.full:
+                return False
+            trackers = self.manifest["trackers"]
+            if tracker is not None and dict(tracker) not in trackers:
+                trackers.append(dict(tracker))
+            chunk = self._chunk or self._open_chunk()
+            chunk["file"].write(data)
+            chunk["index"].append((
+                chunk["offset"], len(data),
+                np.nan if client_ts is None else float(client_ts),
+                time.time() if server_ts is None else float(server_ts),
+                bool(detected), str(label)[:24], extras, degradation,
+                -1 if tracker is None else trackers.index(dict(tracker)),
+            ))
+            chunk["landmarks"].append(np.asarray(landmarks, dtype=np.float32).reshape(self.landmark_shape))
+            chunk["offset"] += len(data)
+            self.frames += 1
+            if len(chunk["index"]) >= self.chunk_frames:
+                self._close_chunk()
+            return True
+
+    def close(self):
+        with self._lock:
+            if self.manifest["closed"]:
+                return self.manifest
+            if self._chunk is not None:
+                self._close_chunk()
+            self.manifest["closed"] = True
+            self.manifest["closed_at"] = time.time()
+            self._write_manifest()
+            return self.manifest
+
+    def _open_chunk(self):
+        name = f"{len(self.manifest['chunks']):05d}"
+        self._chunk = {"name": name, "file": open(os.path.join(self.path, name + ".frames"), "wb"),
+                       "offset": 0, "index": [], "landmarks": []}
+        return self._chunk
+
+    def _close_chunk(self):
+        chunk, self._chunk = self._chunk, None
+        chunk["file"].close()
+        base = os.path.join(self.path, chunk["name"])
+        np.save(base + ".index.npy", np.array(chunk["index"], dtype=INDEX_DTYPE))
+        np.save(base + ".landmarks.npy", np.stack(chunk["landmarks"]))
+        self.manifest["chunks"].append({"name": chunk["name"], "frames": len(chunk["index"]),
+                                        "bytes": chunk["offset"]})
+        self.manifest["frames"] = self.frames
+        self._write_manifest()
+
+    def _write_manifest(self):
+        target = os.path.join(self.path, "manifest.json")
+        with open(target + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(target + ".tmp", target)
+
+
+_live_runners = {}
+_live_runners_lock = threading.Lock()
+
+
+def live_runner(stream, processor):
+    """
+    run(frame, **kwargs) for a shared live processor. The processor's model is
+    wrapped in place, so the runner is built once per instance and reused by
+    every recording.
+    """
+    key = (stream, id(processor))
+    with _live_runners_lock:
+        entry = _live_runners.get(key)
+        if entry is None or entry[0] is not processor:
+            entry = _live_runners[key] = (processor, processor_runner(stream, processor=processor))
+    return entry[1]
+
+
+# ============== READER ==============
+class Recording:
+    """Memory-mapped view of a recording directory."""
+
+    def __init__(self, path):
+        try:
+            with open(os.path.join(path, "manifest.json")) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise RecordingError(f"{path} is not a recording: {e}") from e
+        if self.manifest.get("format") != FORMAT:
+            raise RecordingError(f"{path} is not a recording")
+        if self.manifest.get("version", 0) > VERSION:
+            raise RecordingError(f"{path} has format version {self.manifest['version']}, "
+                                 f"this code reads up to {VERSION}")
+        self.path = path
+        self.stream = self.manifest["stream"]
+        self.landmark_shape = tuple(self.manifest["landmark_shape"])
+        self.trackers = self.manifest.get("trackers", [])
+        self._chunks = []
+        for chunk in self.manifest["chunks"]:
+            base = os.path.join(path, chunk["name"])
+            data = np.memmap(base + ".frames", dtype=np.uint8, mode="r") if chunk["bytes"] else np.zeros(0, np.uint8)
+            self._chunks.append((_upgrade_index(np.load(base + ".index.npy", mmap_mode="r")),
+                                 np.load(base + ".landmarks.npy", mmap_mode="r"), data))
+
+    def __len__(self):
+        return sum(len(index) for index, _, _ in self._chunks)
+
+    @property
+    def index(self):
+        """(T,) structured index over all chunks."""
+        return _concat([index for index, _, _ in self._chunks], INDEX_DTYPE, ())
+
+    def outputs(self):
+        """The live session's outputs, in the shape replay() returns."""
+        index = self.index
+        return {
+            "label": np.asarray(index["label"]),
+            "detected": np.asarray(index["detected"]),
+            "landmarks": _concat([landmarks for _, landmarks, _ in self._chunks], np.float32, self.landmark_shape),
+        }
+
+    def frames(self):
+        """Yield (index row, encoded frame bytes as a read-only memoryview)."""
+        for index, _, data in self._chunks:
+            for row in index:
+                offset, length = int(row["offset"]), int(row["length"])
+                yield row, memoryview(data[offset:offset + length])
+
+
+def _upgrade_index(index):
+    """Version 1 indexes have no tracker column: copy into the current layout (tracker -1)."""
+    if index.dtype == INDEX_DTYPE:
+        return index
+    upgraded = np.full(len(index), -1, dtype=INDEX_DTYPE)
+    for name in index.dtype.names:
+        upgraded[name] = index[name]
+    return upgraded
+
+
+def _concat(arrays, dtype, shape):
+    if not arrays:
+        return np.zeros((0,) + tuple(shape), dtype=dtype)
+    return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+
+# ============== REPLAY ==============
+def _timeline(index):
+    """Seconds from the first frame, from client timestamps where every frame has one."""
+    client = index["client_ts"]
+    stamps = client if len(client) and not np.isnan(client).any() else index["server_ts"]
+    return np.asarray(stamps, dtype=np.float64) - (stamps[0] if len(stamps) else 0.0)
+
+
+def replay(recording, realtime=False, options=None, speed=1.0, on_frame=None):
+    """
+    Run a recording's frames through a fresh processor of its stream type.
+    With realtime=True frames are fed on the original timeline (divided by
+    `speed`); otherwise as fast as possible. Either way the processor's
+    clock is the recorded timeline and the hand tracker runs each frame
+    with the configuration recorded for it (autotuning off), so the outputs
+    don't depend on the pacing or on this machine's speed. on_frame(i, annotated) is called per frame. Detection state
+    isn't published to the session store. Returns the outputs (label,
+    detected, landmarks arrays) plus timing.
+    """
+    if not isinstance(recording, Recording):
+        recording = Recording(recording)
+    options = dict(recording.manifest.get("options") or {}, **(options or {}))
+    timeline = _timeline(recording.index)
+
+    labels, detected, landmarks = [], [], []
+    run = processor_runner(recording.stream, dict(options, autotune=False, publish=False))
+    tuner = getattr(run.processor, "tuner", None)
+    started = time.perf_counter()
+    for i, (row, data) in enumerate(recording.frames()):
+        if realtime:
+            delay = timeline[i] / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise RecordingError(f"Frame {i} of {recording.path} can't be decoded")
+        if tuner is not None and row["tracker"] >= 0:
+            tuner.use(recording.trackers[int(row["tracker"])])
+        kwargs = {}
+        extras = str(row["extras"])
+        if extras:
+            kwargs["extras"] = tuple(extras.split(","))
+        annotated, label, found, points = run(frame, now=float(timeline[i]), **kwargs)
+        labels.append(label)
+        detected.append(found)
+        landmarks.append(points)
+        if on_frame is not None:
+            on_frame(i, annotated)
+    elapsed = time.perf_counter() - started
+
+    count = len(labels)
+    return {
+        "label": np.array(labels, dtype=INDEX_DTYPE["label"]),
+        "detected": np.array(detected, dtype=bool),
+        "landmarks": (np.stack(landmarks).astype(np.float32) if count
+                      else np.zeros((0,) + recording.landmark_shape, np.float32)),
+        "stream": recording.stream,
+        "frames": count,
+        "seconds": round(elapsed, 3),
+        "processing_fps": round(count / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def save_outputs(path, outputs):
+    """Write replay outputs (uncompressed .npz, so loading is a read, not a decode)."""
+    with open(path, "wb") as f:
+        np.savez(f, label=outputs["label"], detected=outputs["detected"], landmarks=outputs["landmarks"],
+                 stream=np.array(outputs.get("stream", "")))
+
+
+def load_outputs(path):
+    """Outputs from a save_outputs() file, or a recording's live outputs."""
+    if os.path.isdir(path):
+        return Recording(path).outputs()
+    with np.load(path) as data:
+        return {key: data[key] for key in ("label", "detected", "landmarks")}
+
+
+# ============== COMPARE ==============
+def compare(baseline, candidate, atol=1e-4, limit=20):
+    """
+    Diff two sets of outputs frame by frame. Landmarks are compared where
+    both sides detected something; `limit` caps the listed frame numbers.
+    """
+    if len(baseline["label"]) != len(candidate["label"]):
+        raise ValueError(f"Frame counts differ: {len(baseline['label'])} vs {len(candidate['label'])}")
+    count = len(baseline["label"])
+    label_diff = np.asarray(baseline["label"]) != np.asarray(candidate["label"])
+    detected_diff = np.asarray(baseline["detected"]) != np.asarray(candidate["detected"])
+
+    a = np.asarray(baseline["landmarks"], dtype=np.float32).reshape(count, -1)
+    b = np.asarray(candidate["landmarks"], dtype=np.float32).reshape(count, -1)
+    if a.shape != b.shape:
+        raise ValueError(f"Landmark shapes differ: {a.shape[1:]} vs {b.shape[1:]}")
+    both = ~(np.isnan(a) | np.isnan(b))
+    error = np.where(both, np.abs(a - b), 0.0)
+    frame_error = error.max(axis=1) if a.shape[1] else np.zeros(count, np.float32)
+    landmark_diff = frame_error > atol
+
+    changed = label_diff | detected_diff | landmark_diff
+    return {
+        "frames": count,
+        "identical": not changed.any(),
+        "changed_frames": int(changed.sum()),
+        "label_changes": int(label_diff.sum()),
+        "detected_changes": int(detected_diff.sum()),
+        "landmark_changes": int(landmark_diff.sum()),
+        "max_landmark_error": float(frame_error.max()) if count else 0.0,
+        "first_changes": np.flatnonzero(changed)[:limit].tolist(),
+    }
+
+
+# ============== LIVE SESSIONS ==============
+class RecordingSessions:
+    """Active recordings by session id (the API keeps one of these)."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_directory()
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def start(self, session, stream, options=None):
+        recording_id = uuid.uuid4().hex[:12]
+        recorder = SessionRecorder(os.path.join(self.directory, recording_id), stream, options)
+        recorder.manifest["session"] = session
+        with self._lock:
+            previous = self._active.pop(session, None)
+            self._active[session] = (recording_id, recorder)
+        if previous is not None:
+            previous[1].close()
+        return recording_id
+
+    def get(self, session, stream):
+        """The session's recorder if it is recording this stream type."""
+        entry = self._active.get(session)
+        if entry is None or entry[1].stream != stream:
+            return None
+        return entry[1]
+
+    def stop(self, session):
+        """Close the session's recording; returns (recording id, manifest) or None."""
+        with self._lock:
+            entry = self._active.pop(session, None)
+        if entry is None:
+            return None
+        return entry[0], entry[1].close()
+
+    def list(self):
+        recordings = []
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                try:
+                    manifest = Recording(os.path.join(self.directory, name)).manifest
+                except RecordingError:
+                    continue
+                recordings.append({"recording": name, "stream": manifest["stream"],
+                                   "frames": manifest["frames"], "closed": manifest["closed"],
+                                   "created_at": manifest["created_at"]})
+        return recordings
+
+    def close_all(self):
+        with self._lock:
+            entries, self._active = list(self._active.values()), {}
+        for _, recorder in entries:
+            recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session recording tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    info = sub.add_parser("info", help="Show a recording's manifest and timing")
+    info.add_argument("recording")
+
+    run = sub.add_parser("replay", help="Replay a recording through the current code")
+    run.add_argument("recording")
+    run.add_argument("--output", default=None, help="Write the outputs (.npz) for compare")
+    run.add_argument("--realtime", action="store_true", help="Feed frames on the original timeline")
+    run.add_argument("--speed", type=float, default=1.0, help="Timeline speed-up with --realtime")
+    run.add_argument("--atol", type=float, default=1e-4)
+
+    diff = sub.add_parser("compare", help="Compare two recordings / replay outputs")
+    diff.add_argument("baseline")
+    diff.add_argument("candidate")
+    diff.add_argument("--atol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "info":
+            recording = Recording(args.recording)
+            timeline = _timeline(recording.index)
+            duration = float(timeline[-1]) if len(timeline) else 0.0
+            print(json.dumps(dict(recording.manifest, duration_s=round(duration, 3)), indent=2))
+        elif args.command == "replay":
+            recording = Recording(args.recording)
+            outputs = replay(recording, realtime=args.realtime, speed=args.speed)
+            print(f"{outputs['frames']} frames in {outputs['seconds']} s ({outputs['processing_fps']} fps)")
+            if args.output:
+                save_outputs(args.output, outputs)
+                print(f"Outputs: {args.output}")
+            print(json.dumps(compare(recording.outputs(), outputs, args.atol), indent=2))
+        else:
+            print(json.dumps(compare(load_outputs(args.baseline), load_outputs(args.candidate), args.atol),
+                             indent=2))
+    except (RecordingError, VideoProcessingError, ValueError) as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+Session state storage shared between workers and instances.
+
+Stream status (the latest gesture/pose/emotion result) used to live in a
+per-process dict, so with several uvicorn/gunicorn workers or Cloud Run
+instances /stream/{type}/status answered from whichever worker got the
+request. The state now goes through a store selected with SESSION_STORE:
+
+    memory (default)         per-process dict (single worker)
+    shm[:///path]            one JSON file per key in /dev/shm (or /path),
+                             shared by all workers on the host
+    redis://host:6379/0      any Redis-compatible server (shared across hosts)
+
+No Redis client library is needed; the store speaks the wire protocol
+directly. For local multi-worker testing, a stand-in server that implements
+the few commands used here can replace Redis:
+
+    python -m games.session_state serve --port 6379
+
+Frame processors (MediaPipe graphs with tracking history) can't be shared,
+so AffinityMiddleware adds an X-Instance-Id header to every response, and
+X-Session-Affinity: required to routes that depend on process-local state.
+Load balancers (Cloud Run session affinity, nginx sticky sessions) or
+clients can use these to keep a camera session on one instance.
+"""
+import argparse
+import copy
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse, quote
+
+DEFAULT_TTL = 3600          # seconds a key lives in shared stores without updates
+REFRESH_INTERVAL = 1.0      # rewrite an unchanged value at most this often
+
+
+def instance_id():
+    """Identifies this worker: <host>:<pid> (K_REVISION-prefixed on Cloud Run)."""
+    base = f"{socket.gethostname()}:{os.getpid()}"
+    revision = os.environ.get("K_REVISION")
+    return f"{revision}/{base}" if revision else base
+
+
+# ============== STORES ==============
+class InProcessStore:
+    """
+    Dict + lock; only visible to the current process. Values are copied in
+    and out, like the shared stores, so callers can't mutate stored state.
+    """
+    shared = False
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            return copy.deepcopy(self._data[key])
+
+    def set(self, key, value, ttl=None):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SharedMemoryStore:
+    """
+    One JSON file per key in a tmpfs directory. Writes go to a temp file and
+    are renamed into place, so readers in other processes never see a
+    partial value and no cross-process lock is needed.
+    """
+    shared = True
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL):
+        if directory is None:
+            root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            directory = os.path.join(root, "hci-session-state")
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, quote(key, safe="") + ".json")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            if self.ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                return default
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def set(self, key, value, ttl=None):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class RespError(Exception):
+    """Error reply from a Redis-compatible server."""
+
+
+class RespClient:
+    """Minimal RESP2 client (one connection, one command at a time)."""
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, timeout=2.0):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+        self._sock = self._file = None
+
+    def _call(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return _read_reply(self._file)
+
+    def execute(self, *args):
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._call(*args)
+            except (OSError, ConnectionError):
+                # Reconnect once (server restart, idle timeout)
+                self.close()
+                self._connect()
+                return self._call(*args)
+
+
+def _read_reply(f):
+    line = f.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = f.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(rest)
+        return None if count < 0 else [_read_reply(f) for _ in range(count)]
+    raise RespError(f"Unexpected reply: {line!r}")
+
+
+class RedisStore:
+    """JSON values in a Redis-compatible server, under a key prefix."""
+    shared = True
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="hci:", ttl=DEFAULT_TTL):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        self.client = RespClient(parsed.hostname or "localhost", parsed.port or 6379, db, parsed.password)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        value = self.client.execute("GET", self.prefix + key)
+        return default if value is None else json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl or self.ttl
+        args = ["SET", self.prefix + key, json.dumps(value)]
+        if ttl:
+            args += ["EX", int(ttl)]
+        self.client.execute(*args)
+
+    def delete(self, key):
+        self.client.execute("DEL", self.prefix + key)
+
+
+def create_store(spec=None):
+    """Store for a SESSION_STORE value (see module docstring)."""
+    spec = (spec or "memory").strip()
+    if spec == "memory":
+        return InProcessStore()
+    if spec == "shm" or spec.startswith("shm://"):
+        path = urlparse(spec).path if spec.startswith("shm://") else ""
+        return SharedMemoryStore(path or None)
+    if spec.startswith(("redis://", "rediss://")):
+        if spec.startswith("rediss://"):
+            raise ValueError("TLS (rediss://) is not supported; use a local proxy or redis://")
+        return RedisStore(spec)
+    raise ValueError(f"Unknown SESSION_STORE: {spec!r}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store, created from SESSION_STORE on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store(os.environ.get("SESSION_STORE"))
+    return _store
+
+
+def set_store(store):
+    """Replace the process-wide store (tests, or configuration in code)."""
+    global _store
+    _store = store
+
+
+class ChangeNotifier:
+    """
+    Wakes asyncio waiters (in this process) when a key changes. Writers may
+    be on any thread; each waiter is woken on its own event loop.
+    """
+
+    def __init__(self):
+        self._waiters = {}  # key -> set of (loop, asyncio.Event)
+        self._lock = threading.Lock()
+
+    def subscribe(self, key, loop, event):
+        with self._lock:
+            self._waiters.setdefault(key, set()).add((loop, event))
+
+    def unsubscribe(self, key, loop, event):
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard((loop, event))
+                if not waiters:
+                    del self._waiters[key]
+
+    def notify(self, key):
+        with self._lock:
+            waiters = list(self._waiters.get(key, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # loop closed
+
+
+# Local change notifications for keys written through StateWriter
+changes = ChangeNotifier()
+
+
+class StateWriter:
+    """
+    Writes values for frequently-updated keys, skipping unchanged ones.
+    Processors update their status on every frame; with a shared store only
+    changes (and a periodic refresh, so another worker's write is overtaken
+    again) reach the backend. Changes are announced on `changes`.
+    """
+
+    def __init__(self, store=None, refresh_interval=REFRESH_INTERVAL):
+        self._store = store
+        self.refresh_interval = refresh_interval
+        self._last = {}
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        return self._store or get_store()
+
+    def write(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            previous = self._last.get(key)
+            changed = previous is None or previous[0] != value
+            if not changed and now - previous[1] < self.refresh_interval:
+                return False
+            self._last[key] = (value, now)
+        self.store.set(key, value)
+        if changed:
+            changes.notify(key)
+        return True
+
+
+# ============== AFFINITY ==============
+class AffinityMiddleware:
+    """
+    Pure ASGI middleware adding X-Instance-Id to every response, and
+    X-Session-Affinity: required for paths that use process-local state.
+    """
+
+    def __init__(self, app, stateful_prefixes=()):
+        self.app = app
+        self.stateful_prefixes = tuple(stateful_prefixes)
+        self.instance = instance_id().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = [(b"x-instance-id", self.instance)]
+        if self.stateful_prefixes and scope.get("path", "").startswith(self.stateful_prefixes):
+            headers.append((b"x-session-affinity", b"required"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# ============== LOCAL STAND-IN SERVER ==============
+class _StandInHandler(socketserver.StreamRequestHandler):
+    """PING, GET, SET [EX], DEL, EXISTS, FLUSHDB, SELECT, AUTH."""
+
+    def handle(self):
+        while True:
+            try:
+                command = _read_reply(self.rfile)
+            except (ConnectionError, OSError):
+                return
+            if not isinstance(command, list) or not command:
+                self.wfile.write(b"-ERR protocol error\r\n")
+                continue
+            self.wfile.write(self.server.dispatch([part.decode() if isinstance(part, bytes) else part
+                                                   for part in command]))
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    """In-memory Redis stand-in for local development and tests (single db)."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 6379)):
+        super().__init__(address, _StandInHandler)
+        self.data = {}  # key -> (value, expires_at or None)
+        self.lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] < time.time():
+            del self.data[key]
+            entry = None
+        return entry
+
+    def dispatch(self, args):
+        name = args[0].upper()
+        with self.lock:
+            if name == "PING":
+                return b"+PONG\r\n"
+            if name in ("SELECT", "AUTH"):
+                return b"+OK\r\n"
+            if name == "GET" and len(args) == 2:
+                entry = self._live(args[1])
+                if entry is None:
+                    return b"$-1\r\n"
+                value = entry[0].encode()
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if name == "SET" and len(args) >= 3:
+                expires = None
+                if len(args) == 5 and args[3].upper() == "EX":
+                    expires = time.time() + int(args[4])
+                self.data[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            if name in ("DEL", "EXISTS") and len(args) >= 2:
+                count = sum(1 for key in args[1:] if self._live(key) is not None)
+                if name == "DEL":
+                    for key in args[1:]:
+                        self.data.pop(key, None)
+                return b":%d\r\n" % count
+            if name == "FLUSHDB":
+                self.data.clear()
+                return b"+OK\r\n"
+        return f"-ERR unsupported command '{args[0]}'\r\n".encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session state tools")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = StandInServer((args.host, args.port))
+    print(f"Session store stand-in listening on {args.host}:{args.port} "
+          f"(SESSION_STORE=redis://{args.host}:{args.port}/0)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
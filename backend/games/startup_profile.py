@@ -0,0 +1,168 @@
+"""
+Import-time and startup profiler for the API process.
+
+Runs `import main` in a fresh interpreter under `python -X importtime`,
+attributes the time to top-level packages, and separately measures
+time-to-first-/health (import + app startup + one request) and time until
+model warm-up finishes. Import and startup time are checked against a
+budget (benchmarks/startup_budget.json):
+
+    {"import_ms": 1500, "startup_ms": 2500,
+     "forbidden": ["mediapipe", "nltk", ...],   # must not load at startup
+     "modules_ms": {"fastapi": 800}}            # per-package ceilings
+
+    python -m games.startup_profile
+    python -m games.startup_profile --families speech,ser --top 30
+    python -m games.startup_profile --check            # exit 1 on budget violations
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+BUDGET_PATH = os.path.join(BACKEND_DIR, "benchmarks", "startup_budget.json")
+
+_STARTUP_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get("/health").status_code
+    healthy = time.perf_counter()
+    # Time until warm-up finishes (/ready turns 200)
+    while client.get("/ready").status_code != 200 and time.perf_counter() - start < 300:
+        time.sleep(0.05)
+    ready = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "startup_ms": (healthy - start) * 1000,
+                  "ready_ms": (ready - start) * 1000, "status": status}))
+"""
+
+
+def _env(families=None, extra=None):
+    env = dict(os.environ)
+    if families is not None:
+        env["ROUTE_FAMILIES"] = families
+    env.update(extra or {})
+    return env
+
+
+def parse_importtime(text):
+    """Parse -X importtime output into (module, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_profile(target="main", families=None, python=sys.executable):
+    """Import `target` in a fresh interpreter; returns parsed importtime rows."""
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR, env=_env(families), capture_output=True, text=True, timeout=300,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def by_package(rows):
+    """Self time summed per top-level package, in ms, largest first."""
+    totals = defaultdict(float)
+    for name, self_us, _, _ in rows:
+        totals[name.split(".")[0]] += self_us / 1000
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def direct_imports(rows, target="main"):
+    """Cumulative ms of each module imported directly by `target`."""
+    # importtime lists children before their parent, one level deeper
+    result = {}
+    for i, (name, _, cumulative_us, depth) in enumerate(rows):
+        if name == target:
+            for child, _, child_cumulative, child_depth in reversed(rows[:i]):
+                if child_depth <= depth:
+                    break
+                if child_depth == depth + 1:
+                    result[child] = child_cumulative / 1000
+            break
+    return dict(sorted(result.items(), key=lambda item: item[1], reverse=True))
+
+
+def startup_time(families=None, python=sys.executable):
+    """
+    {"import_ms", "startup_ms", "ready_ms", "status"}: import main, first /health
+    answered, and warm-up finished (/ready 200), all from interpreter start.
+    """
+    result = subprocess.run(
+        [python, "-c", _STARTUP_SNIPPET],
+        cwd=BACKEND_DIR, env=_env(families), capture_output=True, text=True, timeout=300,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def load_budget(path=BUDGET_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_budget(packages, timing, budget):
+    """List of budget violations (empty when within budget)."""
+    failures = []
+    for name in budget.get("forbidden", []):
+        if name in packages:
+            failures.append(f"{name} is imported at startup ({packages[name]:.0f} ms)")
+    for name, limit in budget.get("modules_ms", {}).items():
+        if packages.get(name, 0.0) > limit:
+            failures.append(f"{name}: {packages[name]:.0f} ms > budget {limit:.0f} ms")
+    for key in ("import_ms", "startup_ms"):
+        if key in budget and timing.get(key, 0.0) > budget[key]:
+            failures.append(f"{key}: {timing[key]:.0f} ms > budget {budget[key]:.0f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API import-time / startup profiler")
+    parser.add_argument("--families", default=None, help="ROUTE_FAMILIES to profile with (default: env/all)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget", default=BUDGET_PATH)
+    parser.add_argument("--check", action="store_true", help="Exit 1 if the budget is exceeded")
+    args = parser.parse_args()
+
+    rows = import_profile(families=args.families)
+    packages = by_package(rows)
+    timing = startup_time(families=args.families)
+
+    print(f"import main: {timing['import_ms']:.0f} ms, first /health answered after {timing['startup_ms']:.0f} ms, "
+          f"models warm after {timing['ready_ms']:.0f} ms")
+    print("\nDirect imports of main (cumulative ms):")
+    for name, ms in list(direct_imports(rows).items())[:args.top]:
+        print(f"  {ms:>8.1f}  {name}")
+    print("\nSelf time by package (ms):")
+    for name, ms in list(packages.items())[:args.top]:
+        print(f"  {ms:>8.1f}  {name}")
+
+    if os.path.exists(args.budget):
+        failures = check_budget(packages, timing, load_budget(args.budget))
+        if failures:
+            print(f"\n{len(failures)} budget violation(s):")
+            for failure in failures:
+                print(f"  {failure}")
+            if args.check:
+                raise SystemExit(1)
+        else:
+            print("\nWithin startup budget")
+
+
+if __name__ == "__main__":
+    main()
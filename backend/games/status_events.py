@@ -0,0 +1,104 @@
+"""
+Server-Sent Events for stream detection status.
+
+/stream/{type}/events replaces polling /stream/{type}/status: the client
+opens one EventSource and gets a `status` event whenever the detected
+gesture, pose or emotion (or the status/message) changes. Per-frame noise
+such as emotion scores is sent along with a change but never causes one.
+
+- Changes made in this process wake the stream immediately (StateWriter
+  notifications). With a shared session store, changes made by other
+  workers are picked up by polling the store every `poll_interval`.
+- Bursts are coalesced: after a wake-up the stream waits `coalesce`
+  seconds and sends only the latest state.
+- A `: heartbeat` comment is sent after `heartbeat` seconds without events,
+  so proxies don't close the idle connection and clients notice a dead one.
+"""
+import asyncio
+import json
+
+try:
+    from .session_state import changes, get_store
+except ImportError:
+    try:
+        from games.session_state import changes, get_store
+    except ImportError:
+        from session_state import changes, get_store
+
+# Fields whose change is worth an event
+CHANGE_FIELDS = ("status", "gesture", "pose", "emotion", "message")
+
+DEFAULT_COALESCE = 0.05
+DEFAULT_HEARTBEAT = 15.0
+DEFAULT_POLL_INTERVAL = 0.25
+RETRY_MS = 2000
+
+
+def significant(state):
+    return tuple(state.get(field) for field in CHANGE_FIELDS)
+
+
+def format_event(data, event="status", event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def status_events(key, read_state, is_disconnected=None, coalesce=DEFAULT_COALESCE,
+                        heartbeat=DEFAULT_HEARTBEAT, poll_interval=DEFAULT_POLL_INTERVAL, store=None):
+    """
+    Async generator of SSE messages for one status key.
+    read_state() returns the current state dict; is_disconnected() is an
+    optional coroutine function that ends the stream when it returns True.
+    """
+    store = store or get_store()
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    changes.subscribe(key, loop, wake)
+
+    async def read():
+        # Shared stores do network/file I/O; keep it off the event loop
+        if store.shared:
+            return await asyncio.to_thread(read_state)
+        return read_state()
+
+    # Without a shared store every change arrives as a notification, so
+    # there is nothing to poll; just wake up for heartbeats
+    timeout = min(poll_interval, heartbeat) if store.shared else heartbeat
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        state = await read()
+        last_sent = significant(state)
+        event_id = 1
+        yield format_event(state, event_id=event_id)
+        idle = 0.0
+
+        while True:
+            notified = False
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+                notified = True
+            except asyncio.TimeoutError:
+                idle += timeout
+            if is_disconnected is not None and await is_disconnected():
+                break
+
+            if notified:
+                # Coalesce a burst of per-frame updates into one event
+                await asyncio.sleep(coalesce)
+            wake.clear()
+
+            state = await read()
+            current = significant(state)
+            if current != last_sent:
+                last_sent = current
+                event_id += 1
+                idle = 0.0
+                yield format_event(state, event_id=event_id)
+            elif idle >= heartbeat:
+                idle = 0.0
+                yield ": heartbeat\n\n"
+    finally:
+        changes.unsubscribe(key, loop, wake)
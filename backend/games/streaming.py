@@ -4,7 +4,9 @@ CLEAN VIDEO - No text overlays on video. Status sent separately.
 """
 import cv2
 import mediapipe as mp
+import logging
 import math
+import os
 import time
 import numpy as np
 from collections import deque, Counter
@@ -12,30 +14,63 @@ import threading
 import json
 try:
     from .utils import OneEuroFilter
+    from .metrics import STAGE_LATENCY, ACTIVE_SESSIONS, FPS
+    from .session_state import StateWriter, get_store
+    from .landmark_render import LandmarkRenderer
+    from .frame_buffers import FrameArena, to_rgb, use_arena
+    from .autotune import ModelTuner, HAND_LEVELS, AUTOTUNE_ENABLED
 except ImportError:
     try:
         from games.utils import OneEuroFilter
+        from games.metrics import STAGE_LATENCY, ACTIVE_SESSIONS, FPS
+        from games.session_state import StateWriter, get_store
+        from games.landmark_render import LandmarkRenderer
+        from games.frame_buffers import FrameArena, to_rgb, use_arena
+        from games.autotune import ModelTuner, HAND_LEVELS, AUTOTUNE_ENABLED
     except ImportError:
         from utils import OneEuroFilter
-
-# Global state for each stream type
+        from metrics import STAGE_LATENCY, ACTIVE_SESSIONS, FPS
+        from session_state import StateWriter, get_store
+        from landmark_render import LandmarkRenderer
+        from frame_buffers import FrameArena, to_rgb, use_arena
+        from autotune import ModelTuner, HAND_LEVELS, AUTOTUNE_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Initial state for each stream type. Live state goes through the session
+# store (SESSION_STORE, see session_state.py) so every worker sees it, under
+# one key per client session (X-Session-Id); the local MJPEG stream has no
+# session and uses the bare stream:<type> key.
 stream_states = {
     "gesture": {"status": "waiting", "gesture": "None", "message": "Show your hand"},
     "pose": {"status": "waiting", "pose": "None", "message": "Step into frame"},
     "emotion": {"status": "waiting", "emotion": "neutral", "message": "Analyzing..."}
 }
-state_lock = threading.Lock()
+_state_writer = StateWriter()
+
+
+def stream_state_key(stream_type: str, session=None):
+    return f"stream:{stream_type}:{session}" if session else f"stream:{stream_type}"
+
+
+def set_stream_state(stream_type: str, state: dict, session=None):
+    """Publish the latest detection state (unchanged states aren't rewritten)."""
+    _state_writer.write(stream_state_key(stream_type, session), state)
 
 # ============== STREAMING CONFIG ==============
 # Uses MediaPipe (Solutions) for all tracking
 # - Hands: GestureStream
-# - Pose: PoseStream (Holistic)
+# - Pose: PoseStream (Holistic, or Pose only with POSE_ENGINE=pose)
 # - Emotion: ExpressionLab (FaceMesh)
 
 
 # ============== HAND GESTURE STREAM (CLEAN) ==============
 class HandGestureStream:
-    def __init__(self):
+    def __init__(self, autotune=None):
+        """
+        :param autotune: Follow the frame budget (None = HAND_AUTOTUNE); False
+                         pins the heaviest configuration, for replays
+        """
         try:
             self.mp_hands = mp.solutions.hands
             self.mp_draw = mp.solutions.drawing_utils
@@ -47,11 +82,14 @@ class HandGestureStream:
             self.mp_draw = mp.solutions.drawing_utils
             self.mp_styles = mp.styles
 
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=2, # Support both hands
-            min_detection_confidence=0.7, 
-            min_tracking_confidence=0.6,
-            model_complexity=1
+        # Complexity and hand count follow the frame budget (see autotune.py);
+        # starts at complexity 1 with both hands
+        self.tuner = ModelTuner(HAND_LEVELS, self._build_hands, name="hand tracker",
+                                enabled=AUTOTUNE_ENABLED if autotune is None else autotune)
+        self.hand_renderer = LandmarkRenderer(
+            self.mp_hands.HAND_CONNECTIONS,
+            self.mp_styles.get_default_hand_connections_style(),
+            self.mp_styles.get_default_hand_landmarks_style()
         )
         # Tracking for Swipe detection per hand
         self.histories = {} # Dict: hand_label -> deque
@@ -60,16 +98,30 @@ class HandGestureStream:
         
         self.last_swipe_time = 0
         self.swipe_cooldown = 1.0 # 1 second cooldown across all hands
+        # Status of the last processed frame (also published to the store)
+        self.state = dict(stream_states["gesture"])
+
+    def _build_hands(self, model_complexity, max_num_hands):
+        return self.mp_hands.Hands(
+            max_num_hands=max_num_hands,
+            min_detection_confidence=0.7, 
+            min_tracking_confidence=0.6,
+            model_complexity=model_complexity
+        )
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, session=None, publish=True, now=None):
+        """`now`: the frame's time in seconds for smoothing and the swipe cooldown (None = wall clock)."""
         h, w, c = frame.shape
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(img_rgb)
+        t0 = time.perf_counter()
+        img_rgb = to_rgb(frame)
+        results = self.tuner.process(img_rgb)
+        t1 = time.perf_counter()
+        STAGE_LATENCY.observe(t1 - t0, "inference", "gesture")
         
         gesture = "None"
         message = "Show your hand to the camera"
         
-        current_time = time.time()
+        current_time = time.time() if now is None else now
         detected_gestures = []
 
         if results.multi_hand_landmarks and results.multi_handedness:
@@ -78,13 +130,7 @@ class HandGestureStream:
                 hand_label = results.multi_handedness[idx].classification[0].label # 'Left' or 'Right'
                 
                 # Draw hand landmarks
-                self.mp_draw.draw_landmarks(
-                    frame, 
-                    hand_lms, 
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_styles.get_default_hand_landmarks_style(),
-                    self.mp_styles.get_default_hand_connections_style()
-                )
+                self.hand_renderer.draw(frame, hand_lms)
                 
                 # Finger tracking
                 raw_idx_x = int(hand_lms.landmark[8].x * w)
@@ -131,7 +177,7 @@ class HandGestureStream:
                         # Toward User's Right (Screen Left) = diff < 0 = Prev Slide
                         hand_gesture = "Swipe_Left" if diff > 0 else "Swipe_Right"
                         detected_gestures.append((hand_gesture, abs(diff)))
-                        print(f"✅ {hand_label} SLAP: diff={diff}, gesture={hand_gesture}")
+                        logger.info("Swipe detected", extra={"hand": hand_label, "diff": round(float(diff), 1), "gesture": hand_gesture})
 
                 # Draw feedback (Pinch Click)
                 if dist < 40:
@@ -157,30 +203,58 @@ class HandGestureStream:
             for h_label in self.histories:
                 self.histories[h_label].clear()
 
-        # Update global state
-        with state_lock:
-            stream_states["gesture"] = {
-                "status": "active" if gesture != "None" else "waiting",
-                "gesture": gesture,
-                "message": message
-            }
+        self.state = {
+            "status": "active" if gesture != "None" else "waiting",
+            "gesture": gesture,
+            "message": message,
+            "tracker": self.tuner.config
+        }
+        if publish:
+            set_stream_state("gesture", self.state, session)
         
+        # Draw = annotation + classification after the model call
+        STAGE_LATENCY.observe(time.perf_counter() - t1, "draw", "gesture")
         return frame        # Persistent history through brief occlusion
         
         # Update global state
-        with state_lock:
-            stream_states["gesture"] = {
-                "status": "active" if gesture != "None" else "waiting",
-                "gesture": gesture,
-                "message": message
-            }
+        set_stream_state("gesture", {
+            "status": "active" if gesture != "None" else "waiting",
+            "gesture": gesture,
+            "message": message
+        })
         
         return frame
 
 
-# ============== POSE STREAM (HOLISTIC - BODY + HANDS) ==============
+# ============== POSE STREAM (BODY, HANDS/FACE ON DEMAND) ==============
+# Engine for PoseStream: "holistic" (the default) runs body + hands + face
+# mesh on every frame, which is what the pose page draws; "pose" runs the
+# Pose solution only (the classifier reads six body landmarks), for callers
+# that don't need hands or face or ask for them via extras.
+POSE_ENGINES = ("pose", "holistic")
+POSE_EXTRAS = ("hands", "face")
+DEFAULT_POSE_ENGINE = os.environ.get("POSE_ENGINE", "holistic")
+DEFAULT_POSE_COMPLEXITY = int(os.environ.get("POSE_MODEL_COMPLEXITY", "1"))
+
+
+def parse_pose_extras(text):
+    """'hands,face' -> ('hands', 'face'); unknown names are ignored."""
+    names = [name.strip().lower() for name in (text or "").split(",")]
+    return tuple(name for name in POSE_EXTRAS if name in names)
+
+
 class PoseStream:
-    def __init__(self):
+    """
+    Body pose classification. In "pose" mode hands and face are only tracked
+    when a caller asks for them (process_frame(frame, extras=("hands",))),
+    with separate models created on first request.
+    """
+
+    def __init__(self, engine=None, model_complexity=None):
+        self.engine = engine or DEFAULT_POSE_ENGINE
+        if self.engine not in POSE_ENGINES:
+            raise ValueError(f"Unknown pose engine {self.engine!r}, expected one of {POSE_ENGINES}")
+        self.model_complexity = DEFAULT_POSE_COMPLEXITY if model_complexity is None else model_complexity
         try:
             self.mp_holistic = mp.solutions.holistic
             self.mp_draw = mp.solutions.drawing_utils
@@ -192,64 +266,86 @@ class PoseStream:
             self.mp_draw = mp.solutions.drawing_utils
             self.mp_styles = mp.solutions.drawing_styles
 
-        # Use Holistic model for Body + Hands + Face
-        self.holistic = self.mp_holistic.Holistic(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-            model_complexity=1,
-            smooth_landmarks=True
-        )
+        if self.engine == "holistic":
+            # Body + Hands + Face in one graph
+            self.model = self.mp_holistic.Holistic(
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5,
+                model_complexity=self.model_complexity,
+                smooth_landmarks=True
+            )
+        else:
+            self.model = mp.solutions.pose.Pose(
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5,
+                model_complexity=self.model_complexity,
+                smooth_landmarks=True
+            )
+        # On-demand models for "pose" mode, created on first request
+        self._hands = None
+        self._face_mesh = None
+        self._extras_lock = threading.Lock()
         
         # Custom drawing specs for high visibility
         self.pose_landmark_spec = self.mp_draw.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
         self.pose_connection_spec = self.mp_draw.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
         self.hand_landmark_spec = self.mp_draw.DrawingSpec(color=(255, 0, 255), thickness=2, circle_radius=2)
         self.hand_connection_spec = self.mp_draw.DrawingSpec(color=(255, 0, 255), thickness=2, circle_radius=2)
-
-    def process_frame(self, frame):
+        self.pose_renderer = LandmarkRenderer(
+            self.mp_holistic.POSE_CONNECTIONS, self.pose_connection_spec, self.pose_landmark_spec)
+        self.hand_renderer = LandmarkRenderer(
+            self.mp_holistic.HAND_CONNECTIONS, self.hand_connection_spec, self.hand_landmark_spec)
+        # Tesselation lines only (no points)
+        self.face_renderer = LandmarkRenderer(
+            self.mp_holistic.FACEMESH_TESSELATION, self.mp_styles.get_default_face_mesh_tesselation_style())
+        self.state = dict(stream_states["pose"])
+
+    def _extra_models(self, extras):
+        """Hands / FaceMesh models for the requested extras ("pose" mode only)."""
+        with self._extras_lock:
+            if "hands" in extras and self._hands is None:
+                self._hands = mp.solutions.hands.Hands(
+                    max_num_hands=2, model_complexity=0,
+                    min_detection_confidence=0.5, min_tracking_confidence=0.5)
+            if "face" in extras and self._face_mesh is None:
+                self._face_mesh = mp.solutions.face_mesh.FaceMesh(
+                    max_num_faces=1, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        return (self._hands if "hands" in extras else None,
+                self._face_mesh if "face" in extras else None)
+
+    def process_frame(self, frame, extras=(), session=None, publish=True):
         h, w, c = frame.shape
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.holistic.process(img_rgb)
+        t0 = time.perf_counter()
+        img_rgb = to_rgb(frame)
+        results = self.model.process(img_rgb)
+
+        hand_landmarks, face_landmarks = [], []
+        if self.engine == "holistic":
+            hand_landmarks = [results.left_hand_landmarks, results.right_hand_landmarks]
+            face_landmarks = [results.face_landmarks]
+        elif extras and results.pose_landmarks:
+            hands, face_mesh = self._extra_models(extras)
+            if hands is not None:
+                hand_landmarks = hands.process(img_rgb).multi_hand_landmarks or []
+            if face_mesh is not None:
+                face_landmarks = face_mesh.process(img_rgb).multi_face_landmarks or []
+        t1 = time.perf_counter()
+        STAGE_LATENCY.observe(t1 - t0, "inference", "pose")
         
         pose_status = "None"
         message = "Step back so I can see you"
         
         if results.pose_landmarks:
             # Draw Pose (Body)
-            self.mp_draw.draw_landmarks(
-                frame,
-                results.pose_landmarks,
-                self.mp_holistic.POSE_CONNECTIONS,
-                landmark_drawing_spec=self.pose_landmark_spec,
-                connection_drawing_spec=self.pose_connection_spec
-            )
+            self.pose_renderer.draw(frame, results.pose_landmarks)
             
-            # Draw Left Hand
-            self.mp_draw.draw_landmarks(
-                frame,
-                results.left_hand_landmarks,
-                self.mp_holistic.HAND_CONNECTIONS,
-                landmark_drawing_spec=self.hand_landmark_spec,
-                connection_drawing_spec=self.hand_connection_spec
-            )
-
-            # Draw Right Hand
-            self.mp_draw.draw_landmarks(
-                frame,
-                results.right_hand_landmarks,
-                self.mp_holistic.HAND_CONNECTIONS,
-                landmark_drawing_spec=self.hand_landmark_spec,
-                connection_drawing_spec=self.hand_connection_spec
-            )
+            # Draw Hands
+            for landmarks in hand_landmarks:
+                self.hand_renderer.draw(frame, landmarks)
 
             # Draw Face Mesh (Lightweight)
-            self.mp_draw.draw_landmarks(
-                frame,
-                results.face_landmarks,
-                self.mp_holistic.FACEMESH_TESSELATION,
-                landmark_drawing_spec=None,
-                connection_drawing_spec=self.mp_styles.get_default_face_mesh_tesselation_style()
-            )
+            for landmarks in face_landmarks:
+                self.face_renderer.draw(frame, landmarks)
             
             # Logic for pose detection (same as before)
             landmarks = results.pose_landmarks.landmark
@@ -276,14 +372,15 @@ class PoseStream:
                 pose_status = "Standing"
                 message = "🧍 Standing position"
         
-        # Update global state
-        with state_lock:
-            stream_states["pose"] = {
-                "status": "active" if pose_status != "None" else "waiting",
-                "pose": pose_status,
-                "message": message
-            }
+        self.state = {
+            "status": "active" if pose_status != "None" else "waiting",
+            "pose": pose_status,
+            "message": message
+        }
+        if publish:
+            set_stream_state("pose", self.state, session)
         
+        STAGE_LATENCY.observe(time.perf_counter() - t1, "draw", "pose")
         return frame
 
 
@@ -300,7 +397,7 @@ class EmotionStream:
                 min_tracking_confidence=0.5
             )
         except Exception as e:
-            print(f"MediaPipe FaceMesh init failed: {e}")
+            logger.error("MediaPipe FaceMesh init failed: %s", e)
             self.face_mesh = None
 
         self.emotion = "neutral"
@@ -315,6 +412,7 @@ class EmotionStream:
         }
         # Smoothing factor (0.0 - 1.0). Lower = smoother but slower.
         self.alpha = 0.2
+        self.state = dict(stream_states["emotion"])
 
     def get_pt(self, landmarks, idx):
         # Return 3D point (x, y, z)
@@ -323,13 +421,16 @@ class EmotionStream:
     def dist(self, p1, p2):
         return np.linalg.norm(p1 - p2)
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, session=None, publish=True):
         if not self.face_mesh:
             return frame
 
         h, w, c = frame.shape
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t0 = time.perf_counter()
+        img_rgb = to_rgb(frame)
         results = self.face_mesh.process(img_rgb)
+        t1 = time.perf_counter()
+        STAGE_LATENCY.observe(t1 - t0, "inference", "emotion")
         
         current_scores = {k: 0.0 for k in self.scores}
         
@@ -474,15 +575,16 @@ class EmotionStream:
         # Prepare scores for UI (convert to int)
         ui_scores = {k: float(v) for k, v in self.scores.items() if v > 1.0}
 
-        # Update global state
-        with state_lock:
-            stream_states["emotion"] = {
-                "status": "active",
-                "emotion": self.emotion,
-                "scores": ui_scores,
-                "message": message
-            }
+        self.state = {
+            "status": "active",
+            "emotion": self.emotion,
+            "scores": ui_scores,
+            "message": message
+        }
+        if publish:
+            set_stream_state("emotion", self.state, session)
         
+        STAGE_LATENCY.observe(time.perf_counter() - t1, "draw", "emotion")
         return frame
 
     def _analysis_complete(self, future):
@@ -513,7 +615,7 @@ def generate_stream(stream_type: str):
     # Get actual resolution (camera may not support requested)
     actual_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     actual_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    print(f"Camera streaming at {actual_w}x{actual_h}")
+    logger.info("Camera streaming at %dx%d", actual_w, actual_h)
     
     # Initialize the appropriate processor
     if stream_type == "gesture":
@@ -525,31 +627,41 @@ def generate_stream(stream_type: str):
     else:
         processor = None
     
+    # Capture, mirror and RGB buffers are reused for every frame
+    arena = FrameArena()
+    captured = None
+    ACTIVE_SESSIONS.inc("mjpeg")
     try:
         while True:
-            success, frame = cap.read()
+            success, captured = cap.read(captured)
             if not success:
                 break
             
-            frame = cv2.flip(frame, 1)  # Mirror
+            frame = arena.mirror(captured)  # Mirror
             
             if processor:
-                frame = processor.process_frame(frame)
+                # Each next() may run on a different thread; activate the arena per frame
+                with use_arena(arena):
+                    frame = processor.process_frame(frame)
             
             # MAXIMUM QUALITY JPEG (100% = no compression)
+            t0 = time.perf_counter()
             ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 100])
+            STAGE_LATENCY.observe(time.perf_counter() - t0, "encode", stream_type)
             if not ret:
                 continue
+            FPS.tick(stream_type)
             
-            yield (
-                b'--frame\r\n'
-                b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n'
-            )
+            # Separate chunks: the encoded buffer is sent without copying it
+            yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+            yield memoryview(buffer)
+            yield b'\r\n'
     finally:
+        ACTIVE_SESSIONS.dec("mjpeg")
         cap.release()
 
 
-def get_stream_status(stream_type: str) -> dict:
-    """Get the current status for a stream type."""
-    with state_lock:
-        return stream_states.get(stream_type, {"status": "unknown"})
+def get_stream_status(stream_type: str, session=None) -> dict:
+    """Get the current status for a stream type (of one session, if given)."""
+    return get_store().get(stream_state_key(stream_type, session),
+                           stream_states.get(stream_type, {"status": "unknown"}))
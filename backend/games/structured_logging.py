@@ -0,0 +1,285 @@
+"""
+Structured, non-blocking logging for the API.
+
+configure_logging() routes every logger through a QueueHandler: the request
+thread only builds the record and enqueues it (dropping it if the queue is
+full), and a QueueListener thread formats and writes it. Records are JSON
+lines (LOG_FORMAT=text for local reading) carrying the request-scoped fields
+set by RequestLogMiddleware and bind():
+
+    {"ts": "...", "level": "INFO", "logger": "access", "msg": "request",
+     "request_id": "5f0c...", "method": "POST", "path": "/transcribe",
+     "session": "abc", "route": "/transcribe", "language": "en-US",
+     "audio_bytes": 48213, "status": 200, "latency_ms": 812.4}
+
+Endpoints add their own fields with bind(); they appear on every record for
+the request, including the access line, so one line per request is enough.
+
+Hot call sites can't flood the log: each call site (file:line) may emit
+LOG_RATE_LIMIT records per second (burst LOG_RATE_BURST); the next record
+that gets through reports how many were suppressed. The access log line
+written per request is sampled on the high-frequency frame routes
+(failures and slow requests are always logged).
+
+Environment:
+    LOG_LEVEL=INFO  LOG_FORMAT=json|text  LOG_FILE=path (default: stderr)
+    LOG_RATE_LIMIT=5  LOG_RATE_BURST=20  LOG_QUEUE_SIZE=10000
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+DEFAULT_RATE_LIMIT = 5.0
+DEFAULT_RATE_BURST = 20
+DEFAULT_QUEUE_SIZE = 10000
+
+# Access log sampling for routes hit many times per second per client
+DEFAULT_ACCESS_SAMPLE_RATES = {
+    "/process-frame": 0.02,
+    "/stream/{stream_type}/status": 0.02,
+}
+SLOW_REQUEST_SECONDS = 1.0
+
+# Attributes every LogRecord has; anything else came from `extra=` (uvicorn
+# adds an ANSI-coloured copy of its message, which isn't useful in JSON)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "color_message"}
+
+# ============== REQUEST CONTEXT ==============
+_context = ContextVar("log_context", default=None)
+# ASGI scope of the current request (the route is only known after routing)
+_scope = ContextVar("log_scope", default=None)
+
+
+def bind(**fields):
+    """Add fields to every record logged for the current request."""
+    current = _context.get()
+    if current is not None:
+        current.update(fields)
+
+
+def current_context():
+    return dict(_context.get() or {})
+
+
+class ContextFilter(logging.Filter):
+    """Copies the request context onto the record (before it changes threads)."""
+
+    def filter(self, record):
+        context = _context.get()
+        if context:
+            for key, value in context.items():
+                if not hasattr(record, key):
+                    setattr(record, key, value)
+            route = getattr((_scope.get() or {}).get("route"), "path", None)
+            if route and not hasattr(record, "route"):
+                record.route = route
+        return True
+
+
+# ============== RATE LIMITING ==============
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per call site; reports suppressed counts on the next record.
+    Records logged with extra={"_rate_limit": False} are always let through.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE_LIMIT, burst=DEFAULT_RATE_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # (pathname, lineno) -> [tokens, last, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0 or not getattr(record, "_rate_limit", True):
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+# ============== FORMATTING ==============
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        doc = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                doc[key] = value
+        if record.exc_info:
+            doc["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            doc["exc"] = record.exc_text
+        return json.dumps(doc, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable line with the structured fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        extra = " ".join(f"{key}={value}" for key, value in vars(record).items()
+                         if key not in _RECORD_ATTRS and not key.startswith("_"))
+        return f"{line} [{extra}]" if extra else line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: records are dropped (and counted) when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Keep `extra` fields and args-free message, render the traceback here
+        # (the exception may be gone by the time the listener runs)
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+
+
+def configure_logging(level=None, fmt=None, filename=None, rate=None, burst=None, queue_size=None):
+    """
+    Install the queue handler on the root logger (idempotent; settings
+    default to the LOG_* environment variables). Returns the queue handler.
+    """
+    global _listener
+    level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.environ.get("LOG_FORMAT", "json")).lower()
+    filename = filename or os.environ.get("LOG_FILE") or None
+    rate = float(os.environ.get("LOG_RATE_LIMIT", DEFAULT_RATE_LIMIT)) if rate is None else rate
+    burst = int(os.environ.get("LOG_RATE_BURST", DEFAULT_RATE_BURST)) if burst is None else burst
+    queue_size = queue_size or int(os.environ.get("LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+
+    if _listener is not None:
+        _listener.stop()
+
+    target = logging.FileHandler(filename) if filename else logging.StreamHandler(sys.stderr)
+    target.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(queue_size))
+    handler.addFilter(ContextFilter())
+    handler.addFilter(RateLimitFilter(rate, burst))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    # uvicorn's own access log duplicates RequestLogMiddleware's
+    logging.getLogger("uvicorn.access").disabled = True
+    for name in ("uvicorn", "uvicorn.error"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+
+    _listener = logging.handlers.QueueListener(handler.queue, target, respect_handler_level=True)
+    _listener.start()
+    return handler
+
+
+def shutdown_logging():
+    """Flush queued records (registered with atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+# ============== ACCESS LOG MIDDLEWARE ==============
+class RequestLogMiddleware:
+    """
+    Pure ASGI middleware: sets the request context (request_id, route, method,
+    session) for logs emitted during the request, echoes X-Request-Id, and
+    writes one access record with status and latency (sampled per route).
+    """
+
+    def __init__(self, app, sample_rates=None, slow_seconds=SLOW_REQUEST_SECONDS, logger_name="access"):
+        self.app = app
+        self.sample_rates = DEFAULT_ACCESS_SAMPLE_RATES if sample_rates is None else sample_rates
+        self.slow_seconds = slow_seconds
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or ())
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex[:16]
+        context = {"request_id": request_id, "method": scope.get("method"), "path": scope.get("path")}
+        session = headers.get(b"x-session-id")
+        if session:
+            context["session"] = session.decode("latin-1")
+        token = _context.set(context)
+        scope_token = _scope.set(scope)
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None)
+            status = status_holder[0]
+            rate = self.sample_rates.get(route, 1.0)
+            if status >= 500 or duration >= self.slow_seconds or rate >= 1.0 or random.random() < rate:
+                level = logging.ERROR if status >= 500 else logging.INFO
+                # Sampled already; not subject to the per-call-site limit
+                extra = {"status": status, "latency_ms": round(duration * 1000, 1), "_rate_limit": False}
+                if rate < 1.0:
+                    extra["sample_rate"] = rate
+                self.logger.log(level, "request", extra=extra)
+            _scope.reset(scope_token)
+            _context.reset(token)
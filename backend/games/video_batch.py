@@ -0,0 +1,588 @@
+"""
+Offline video processing.
+
+Runs a recorded video through one of the live processors (gesture, pose,
+emotion, filter, gaze) and writes an annotated video plus a compact
+per-frame results file. The stages run concurrently, joined by bounded
+queues so memory stays flat on long videos:
+
+    decode thread  --chunks-->  process pool  --in order-->  encode thread
+    VideoCapture                one processor                VideoWriter +
+                                per worker                   result arrays
+
+Consecutive frames are sent to the workers in chunks (CHUNK_SIZE).
+Processors keep tracking state, so each worker's smoothing and MediaPipe
+tracking restart at chunk boundaries; use --workers 1 for strictly
+sequential processing. Processors run on the video's clock (frame index /
+fps) with the hand tracker's configuration pinned, so results don't depend
+on how fast the machine is. Offline processors don't publish their
+detection state, so the live session store (and its SSE subscribers) never
+see it, even when a job runs inline in the API process. With two CPUs or fewer
+the default is to run inline: the decode and encode threads already use
+the other core, and a worker process would only add pickling.
+
+Results (.npz, see load_results):
+    frame      (T,) int32     frame index
+    time       (T,) float32   seconds from the start
+    label      (T,) str       gesture / pose / emotion / gaze direction, or face / none
+    detected   (T,) bool
+    landmarks  (T, ...) float32, normalized, NaN where nothing was detected
+                 gesture (T, 2, 21, 3) [left, right hand]   pose (T, 33, 4) x, y, z, visibility
+                 emotion / filter (T, 478, 3)               gaze (T, 68, 2)
+    processor, fps, width, height
+
+CLI:
+    python -m games.video_batch input.mp4 --processor pose \\
+        --output annotated.mp4 --results results.npz --workers 4
+
+API (VideoJobs): POST /process-video starts a background job; poll
+GET /process-video/{job}, then download /process-video/{job}/video and
+/process-video/{job}/results.
+"""
+import argparse
+import importlib.util
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 16
+FOURCC = "mp4v"
+_DONE = object()
+
+
+class VideoProcessingError(Exception):
+    """The video can't be read, or the processor can't run here."""
+
+
+# ============== PROCESSORS ==============
+def _record(obj, attr):
+    """Wrap the callable obj.attr so its last return value is kept in recorder["last"]."""
+    original = getattr(obj, attr)
+    recorder = {"last": None}
+
+    def wrapper(*args, **kwargs):
+        recorder["last"] = original(*args, **kwargs)
+        return recorder["last"]
+
+    setattr(obj, attr, wrapper)
+    return recorder
+
+
+def _points(landmark_list, fields=("x", "y", "z")):
+    return np.array([[getattr(lm, field) for field in fields] for lm in landmark_list.landmark], dtype=np.float32)
+
+
+def _into(target, values):
+    n = min(len(target), len(values))
+    target[:n] = values[:n]
+
+
+def _gesture(options, processor=None):
+    from games.streaming import HandGestureStream
+    processor = processor or HandGestureStream(autotune=options.get("autotune"))
+    recorder = _record(processor.tuner, "process")
+    publish = options.get("publish", True)
+
+    def run(frame, now=None, **kwargs):
+        recorder["last"] = None
+        kwargs.setdefault("publish", publish)
+        annotated = processor.process_frame(frame, now=now, **kwargs)
+        results = recorder["last"]
+        landmarks = np.full((2, 21, 3), np.nan, dtype=np.float32)
+        hands, handedness = [], []
+        if results is not None and results.multi_hand_landmarks:
+            hands, handedness = results.multi_hand_landmarks, results.multi_handedness or []
+        for hand, side in zip(hands, handedness):
+            slot = 0 if side.classification[0].label == "Left" else 1
+            _into(landmarks[slot], _points(hand))
+        return annotated, processor.state["gesture"], bool(hands), landmarks
+    run.processor = processor
+    return run
+
+
+def _pose(options, processor=None):
+    from games.streaming import PoseStream
+    processor = processor or PoseStream(engine=options.get("engine"), model_complexity=options.get("model_complexity"))
+    recorder = _record(processor.model, "process")
+    publish = options.get("publish", True)
+
+    def run(frame, now=None, **kwargs):
+        recorder["last"] = None
+        kwargs.setdefault("publish", publish)
+        annotated = processor.process_frame(frame, **kwargs)
+        results = recorder["last"]
+        landmarks = np.full((33, 4), np.nan, dtype=np.float32)
+        detected = results is not None and results.pose_landmarks is not None
+        if detected:
+            _into(landmarks, _points(results.pose_landmarks, ("x", "y", "z", "visibility")))
+        return annotated, processor.state["pose"], detected, landmarks
+    run.processor = processor
+    return run
+
+
+def _face_points(results):
+    landmarks = np.full((478, 3), np.nan, dtype=np.float32)
+    faces = (results.multi_face_landmarks or []) if results is not None else []
+    if faces:
+        _into(landmarks, _points(faces[0]))
+    return bool(faces), landmarks
+
+
+def _emotion(options, processor=None):
+    from games.streaming import EmotionStream
+    processor = processor or EmotionStream()
+    if processor.face_mesh is None:
+        raise VideoProcessingError("MediaPipe FaceMesh could not be initialised")
+    recorder = _record(processor.face_mesh, "process")
+    publish = options.get("publish", True)
+
+    def run(frame, now=None, **kwargs):
+        recorder["last"] = None
+        kwargs.setdefault("publish", publish)
+        annotated = processor.process_frame(frame, **kwargs)
+        detected, landmarks = _face_points(recorder["last"])
+        return annotated, processor.state["emotion"], detected, landmarks
+    run.processor = processor
+    return run
+
+
+def _filter(options, processor=None):
+    from games.face_filter import FaceFilterProcessor
+    processor = processor or FaceFilterProcessor()
+    recorder = _record(processor.face_mesh, "process")
+    filter_type = options.get("filter", "sunglasses")
+
+    def run(frame, now=None):
+        recorder["last"] = None
+        annotated, face_detected = processor.process_frame(frame, filter_type)
+        _, landmarks = _face_points(recorder["last"])
+        return annotated, "face" if face_detected else "none", bool(face_detected), landmarks
+    run.processor = processor
+    return run
+
+
+def _gaze(options, processor=None):
+    from games.gaze_tracker import GazeTracker
+    processor = processor or GazeTracker()
+    if processor.predictor is None:
+        raise VideoProcessingError("dlib shape predictor model not found")
+    recorder = _record(processor, "predictor")
+
+    def run(frame, now=None):
+        recorder["last"] = None
+        h, w = frame.shape[:2]
+        annotated, direction = processor.process_frame(frame)
+        shape = recorder["last"]
+        landmarks = np.full((68, 2), np.nan, dtype=np.float32)
+        if shape is not None:
+            points = np.array([[shape.part(i).x / w, shape.part(i).y / h] for i in range(shape.num_parts)])
+            _into(landmarks, points)
+        return annotated, direction, shape is not None, landmarks
+    run.processor = processor
+    return run
+
+
+# name -> (factory(options, processor=None) returning run(frame, now=None, **kwargs) ->
+#          (annotated, label, detected, landmarks), required modules).
+# `now` is the frame's time in seconds (None = wall clock); only the gesture
+# processor is time-dependent (smoothing, swipe cooldown).
+PROCESSORS = {
+    "gesture": (_gesture, ("mediapipe",)),
+    "pose": (_pose, ("mediapipe",)),
+    "emotion": (_emotion, ("mediapipe",)),
+    "filter": (_filter, ("mediapipe",)),
+    "gaze": (_gaze, ("dlib",)),
+}
+
+
+def check_processor(name):
+    """Raise VideoProcessingError unless the processor's dependencies are installed."""
+    if name not in PROCESSORS:
+        raise VideoProcessingError(f"Unknown processor {name!r}, expected one of {sorted(PROCESSORS)}")
+    for module in PROCESSORS[name][1]:
+        if importlib.util.find_spec(module) is None:
+            raise VideoProcessingError(f"{name} needs {module}, which isn't installed")
+
+
+def processor_runner(name, options=None, processor=None):
+    """
+    run(frame, now=None, **kwargs) -> (annotated, label, detected, landmarks)
+    for a processor. Pass `processor` to wrap an existing instance (its model
+    is wrapped in place, so wrap each instance once) instead of creating one.
+    options["autotune"] = False pins the hand tracker's configuration;
+    options["publish"] = False keeps detection state out of the session store.
+    run.processor is the wrapped instance.
+    """
+    check_processor(name)
+    return PROCESSORS[name][0](dict(options or {}), processor)
+
+
+# ============== WORKERS ==============
+_worker = None
+
+
+def _init_worker(name, options):
+    global _worker
+    # Offline results shouldn't depend on this machine's speed, and never
+    # reach the live status (inline jobs share the API's store)
+    _worker = processor_runner(name, dict(options, autotune=False, publish=False))
+
+
+def _process_chunk(frames, start, fps):
+    return [_worker(frame, now=(start + i) / fps) for i, frame in enumerate(frames)]
+
+
+def default_workers():
+    """CPUs - 1 inference processes, or 0 (inline) with two CPUs or fewer."""
+    cpus = os.cpu_count() or 1
+    return 0 if cpus <= 2 else cpus - 1
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    # Worker processes must not inherit the API's threads (fork)
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up once `stop` is set (another stage failed)."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class _InlinePool:
+    """Runs chunks in the calling thread (workers=0)."""
+
+    def __init__(self, name, options):
+        _init_worker(name, options)
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        global _worker
+        _worker = None
+
+
+# ============== PIPELINE ==============
+def process_video(input_path, processor="pose", output_path=None, results_path=None, workers=None,
+                  chunk_size=CHUNK_SIZE, options=None, progress=None):
+    """
+    Process a video file. Writes the annotated video to output_path and the
+    per-frame results to results_path (either may be None). progress(done,
+    total) is called from the encode thread. Returns a summary dict.
+    """
+    check_processor(processor)
+    options = dict(options or {})
+    workers = default_workers() if workers is None else workers
+
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise VideoProcessingError(f"Can't open video {input_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+
+    in_flight = max(2, workers * 2)
+    decoded = queue.Queue(maxsize=in_flight)
+    annotated_chunks = queue.Queue(maxsize=in_flight)
+    stop = threading.Event()
+    errors = []
+    results = {"label": [], "detected": [], "landmarks": []}
+    state = {"frames": 0, "size": None}
+
+    def decode():
+        try:
+            chunk, start = [], 0
+            while not stop.is_set():
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                chunk.append(frame)
+                if len(chunk) == chunk_size:
+                    _put(decoded, (chunk, start), stop)
+                    chunk, start = [], start + chunk_size
+            if chunk:
+                _put(decoded, (chunk, start), stop)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            cap.release()
+            _put(decoded, _DONE, stop)
+
+    def encode():
+        writer = None
+        try:
+            while True:
+                try:
+                    item = annotated_chunks.get(timeout=0.1)
+                except queue.Empty:
+                    if stop.is_set():
+                        break
+                    continue
+                if item is _DONE:
+                    break
+                for annotated, label, detected, landmarks in item:
+                    if state["size"] is None:
+                        state["size"] = (annotated.shape[1], annotated.shape[0])
+                        if output_path:
+                            writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*FOURCC), fps, state["size"])
+                            if not writer.isOpened():
+                                raise VideoProcessingError(f"Can't write video {output_path}")
+                    if writer is not None:
+                        writer.write(annotated)
+                    results["label"].append(label)
+                    results["detected"].append(detected)
+                    results["landmarks"].append(landmarks)
+                    state["frames"] += 1
+                if progress is not None:
+                    progress(state["frames"], total)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            if writer is not None:
+                writer.release()
+
+    started = time.perf_counter()
+    if workers == 0:
+        pool = _InlinePool(processor, options)
+    else:
+        pool = ProcessPoolExecutor(workers, mp_context=_pool_context(),
+                                   initializer=_init_worker, initargs=(processor, options))
+    threads = [threading.Thread(target=decode, name="video-decode", daemon=True),
+               threading.Thread(target=encode, name="video-encode", daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    pending = deque()
+    try:
+        while not stop.is_set():
+            try:
+                chunk = decoded.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if chunk is _DONE:
+                break
+            pending.append(pool.submit(_process_chunk, *chunk, fps))
+            if len(pending) >= in_flight:
+                _put(annotated_chunks, pending.popleft().result(), stop)
+        while pending and not stop.is_set():
+            _put(annotated_chunks, pending.popleft().result(), stop)
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        _put(annotated_chunks, _DONE, stop)
+        for thread in threads:
+            thread.join()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if errors:
+        error = errors[0]
+        if isinstance(error, VideoProcessingError):
+            raise error
+        raise VideoProcessingError(f"{processor} failed: {error}") from error
+
+    elapsed = time.perf_counter() - started
+    frames = state["frames"]
+    if results_path:
+        save_results(results_path, results, processor, fps, state["size"])
+    return {
+        "processor": processor,
+        "frames": frames,
+        "fps": fps,
+        "width": state["size"][0] if state["size"] else None,
+        "height": state["size"][1] if state["size"] else None,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "processing_fps": round(frames / elapsed, 2) if elapsed > 0 else None,
+        # > 1 means faster than real time
+        "realtime_factor": round(frames / fps / elapsed, 2) if elapsed > 0 and fps else None,
+        "detected_frames": int(sum(results["detected"])),
+        "output": output_path,
+        "results": results_path,
+    }
+
+
+# ============== RESULTS FILE ==============
+def save_results(path, results, processor, fps, size):
+    count = len(results["label"])
+    landmarks = np.stack(results["landmarks"]) if count else np.zeros((0,), dtype=np.float32)
+    width, height = size or (0, 0)
+    # Write through a file object so numpy doesn't append .npz to the name
+    with open(path, "wb") as f:
+        np.savez_compressed(
+            f,
+            frame=np.arange(count, dtype=np.int32),
+            time=(np.arange(count, dtype=np.float32) / np.float32(fps)),
+            label=np.array(results["label"], dtype=str),
+            detected=np.array(results["detected"], dtype=bool),
+            landmarks=landmarks.astype(np.float32),
+            processor=np.array(processor),
+            fps=np.float32(fps),
+            width=np.int32(width),
+            height=np.int32(height),
+        )
+
+
+def load_results(path):
+    """Results file as a dict of arrays (scalars unwrapped)."""
+    with np.load(path) as data:
+        doc = {key: data[key] for key in data.files}
+    for key in ("processor", "fps", "width", "height"):
+        doc[key] = doc[key].item()
+    return doc
+
+
+# ============== API JOBS ==============
+class JobNotFound(KeyError):
+    """Unknown video job id."""
+
+
+class VideoJobs:
+    """
+    Background video jobs for the API. Jobs run one at a time (each already
+    uses a worker pool); the newest `max_jobs` are kept with their files
+    under VIDEO_JOBS_DIR, older ones are deleted.
+    """
+
+    def __init__(self, directory=None, max_jobs=20, workers=None):
+        self.directory = directory or os.environ.get("VIDEO_JOBS_DIR") or os.path.join(
+            tempfile.gettempdir(), "video-jobs")
+        self.max_jobs = max_jobs
+        self.workers = workers
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="video-job")
+
+    def new_job(self, processor, suffix=".mp4", options=None):
+        """Register a job and return (job id, path to write the input video to)."""
+        check_processor(processor)
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.directory, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        job = {"job": job_id, "state": "uploading", "processor": processor, "options": dict(options or {}),
+               "frames_done": 0, "total_frames": None, "created_at": time.time(),
+               "dir": job_dir, "input": os.path.join(job_dir, "input" + (suffix or ".mp4"))}
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                _, old = self._jobs.popitem(last=False)
+                shutil.rmtree(old["dir"], ignore_errors=True)
+        return job_id, job["input"]
+
+    def start(self, job_id):
+        job = self._get(job_id)
+        job["state"] = "queued"
+        self._executor.submit(self._run, job)
+        return self.status(job_id)
+
+    def _run(self, job):
+        job["state"] = "running"
+        job["started_at"] = time.time()
+
+        def progress(done, total):
+            job["frames_done"], job["total_frames"] = done, total
+
+        try:
+            job["summary"] = process_video(
+                job["input"], job["processor"], os.path.join(job["dir"], "annotated.mp4"),
+                os.path.join(job["dir"], "results.npz"), self.workers, options=job["options"], progress=progress)
+            job["state"] = "done"
+        except Exception as e:
+            logger.exception("Video job failed", extra={"job": job["job"]})
+            job["state"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            try:
+                os.remove(job["input"])
+            except OSError:
+                pass
+
+    def _get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    def status(self, job_id):
+        job = self._get(job_id)
+        return {key: value for key, value in job.items() if key not in ("dir", "input", "options")}
+
+    def output_path(self, job_id, kind):
+        """Path of a finished job's "video" or "results" file (None until done)."""
+        job = self._get(job_id)
+        if job["state"] != "done":
+            return None
+        return os.path.join(job["dir"], {"video": "annotated.mp4", "results": "results.npz"}[kind])
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a video file through a vision processor")
+    parser.add_argument("input", help="Video file")
+    parser.add_argument("--processor", choices=sorted(PROCESSORS), default="pose")
+    parser.add_argument("--output", default=None, help="Annotated video (.mp4)")
+    parser.add_argument("--results", default=None, help="Per-frame results (.npz)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Inference processes (default: CPUs - 1, or 0 with two CPUs or fewer; "
+                             f"here {default_workers()}; 0 = in this process)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--filter", default="sunglasses", help="Filter name for --processor filter")
+    parser.add_argument("--engine", default=None, help="Pose engine for --processor pose (pose or holistic)")
+    args = parser.parse_args()
+
+    if not args.output and not args.results:
+        parser.error("nothing to write: pass --output and/or --results")
+
+    options = {"filter": args.filter, "engine": args.engine}
+
+    def report(done, total):
+        print(f"\r{done}/{total or '?'} frames", end="", flush=True)
+
+    try:
+        summary = process_video(args.input, args.processor, args.output, args.results, args.workers,
+                                args.chunk_size, options, progress=report)
+    except VideoProcessingError as e:
+        print()
+        raise SystemExit(f"Error: {e}")
+    print()
+    print(f"{summary['frames']} frames in {summary['seconds']} s: {summary['processing_fps']} fps, "
+          f"{summary['realtime_factor']}x real time with {summary['workers']} worker(s)")
+    if args.output:
+        print(f"Annotated video: {args.output}")
+    if args.results:
+        print(f"Results: {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Model warm-up and readiness tracking.
+
+Each model registers a load step (import / construct) and a warm-up step (one
+dummy inference, so lazy graph initialisation, caches and allocations happen
+before real traffic). The manager runs them at startup and /ready reports
+per-model state and latency; it returns 503 until every selected model has
+finished, so the orchestrator only routes traffic to a hot instance.
+
+Configuration (environment):
+    WARMUP_MODELS=all            every registered model of the enabled route families (default),
+                                 except opt-in ones
+    WARMUP_MODELS=ser,gesture    only these (opt-in models, e.g. games, must be named)
+    WARMUP_MODELS=none           no warm-up; models load on first request
+    WARMUP_BLOCKING=1            warm up before the server accepts requests
+                                 (default: in a background thread)
+
+A model whose load fails is reported as "failed" and marks the instance as
+degraded, but does not hold back readiness for the others.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Model states
+PENDING = "pending"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+_IN_PROGRESS = (PENDING, LOADING, WARMING)
+
+
+def dummy_frame(width=640, height=480, seed=0):
+    """A textured BGR frame (a blank frame can skip parts of some pipelines)."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+def dummy_audio(seconds=1.0, sample_rate=16000, seed=0):
+    """(samples, sample_rate) of low-level noise plus a tone."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    X = 0.1 * np.sin(2 * np.pi * 220 * t) + 0.01 * rng.normal(size=t.size)
+    return X.astype(np.float32), sample_rate
+
+
+class ModelSpec:
+    def __init__(self, name, family, load, warm=None, opt_in=False):
+        self.name = name
+        self.family = family
+        self.load = load      # () -> model object
+        self.warm = warm      # (model) -> None, one dummy inference
+        self.opt_in = opt_in  # only warmed when named in WARMUP_MODELS
+
+
+class WarmupManager:
+    def __init__(self):
+        self.specs = {}
+        self.selected = []
+        self.states = {}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, name, family, load, warm=None, opt_in=False):
+        self.specs[name] = ModelSpec(name, family, load, warm, opt_in)
+
+    def configure(self, selection="all", enabled_families=None):
+        """Select models from a WARMUP_MODELS value; returns the selected names."""
+        available = [
+            name for name, spec in self.specs.items()
+            if enabled_families is None or spec.family in enabled_families
+        ]
+        value = (selection or "all").strip().lower()
+        if value == "all":
+            chosen = [name for name in available if not self.specs[name].opt_in]
+        elif value in ("none", "0", "off"):
+            chosen = []
+        else:
+            requested = [name.strip() for name in value.split(",") if name.strip()]
+            unknown = [name for name in requested if name not in available]
+            if unknown:
+                logger.warning("Warm-up: ignoring unknown or disabled models: %s", ", ".join(unknown))
+            chosen = [name for name in requested if name in available]
+
+        with self._lock:
+            self.selected = chosen
+            self.states = {
+                name: {"state": PENDING, "family": self.specs[name].family,
+                       "load_ms": None, "warmup_ms": None, "error": None}
+                for name in chosen
+            }
+        return chosen
+
+    def _update(self, name, **fields):
+        with self._lock:
+            self.states[name].update(fields)
+
+    def warm(self, name):
+        """Load and warm one model, recording timings and errors."""
+        spec = self.specs[name]
+        try:
+            self._update(name, state=LOADING)
+            start = time.perf_counter()
+            model = spec.load()
+            self._update(name, load_ms=round((time.perf_counter() - start) * 1000, 1), state=WARMING)
+
+            if spec.warm is not None:
+                start = time.perf_counter()
+                spec.warm(model)
+                self._update(name, warmup_ms=round((time.perf_counter() - start) * 1000, 1))
+            self._update(name, state=READY)
+        except Exception as e:
+            logger.warning("Warm-up: %s failed: %s", name, e)
+            self._update(name, state=FAILED, error=str(e))
+
+    def run(self):
+        """Warm all selected models in order (blocking)."""
+        self.started_at = time.perf_counter()
+        for name in list(self.selected):
+            self.warm(name)
+        self.finished_at = time.perf_counter()
+        summary = ", ".join(
+            f"{name} {state['state']}" + (f" ({state['load_ms'] or 0:.0f}+{state['warmup_ms'] or 0:.0f} ms)"
+                                         if state["state"] == READY else "")
+            for name, state in self.states.items()
+        )
+        if summary:
+            logger.info("Warm-up finished in %.1fs: %s", self.finished_at - self.started_at, summary)
+
+    def start(self, background=True):
+        if not background:
+            self.run()
+            return
+        self._thread = threading.Thread(target=self.run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def ready(self):
+        with self._lock:
+            return all(state["state"] not in _IN_PROGRESS for state in self.states.values())
+
+    def status(self):
+        with self._lock:
+            models = {name: dict(state) for name, state in self.states.items()}
+        in_progress = any(state["state"] in _IN_PROGRESS for state in models.values())
+        elapsed = None
+        if self.started_at is not None:
+            end = self.finished_at if self.finished_at is not None else time.perf_counter()
+            elapsed = round((end - self.started_at) * 1000, 1)
+        return {
+            "ready": not in_progress,
+            "degraded": any(state["state"] == FAILED for state in models.values()),
+            "warmup_ms": elapsed,
+            "models": models,
+        }
@@ -1,25 +1,29 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Form, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse, Response, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
-import speech_recognition as sr
+from typing import List
+from contextlib import asynccontextmanager
+from functools import partial
 import difflib
-from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
 import time
 import io
 import wave
-from pydub import AudioSegment
-import subprocess
 import os
 import sys
 import threading
-import numpy as np
-import cv2
-import base64
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Heavy dependencies (speech_recognition, nltk, pydub, cv2/numpy, mediapipe via
+# games.streaming, the SER/gaze/filter models) are imported inside the routes
+# that use them, so startup only pays for FastAPI. Check with:
+#   python -m games.startup_profile
+
+# Configure logging (JSON lines through a background queue; LOG_* env, see games/structured_logging.py)
+from games.structured_logging import configure_logging, RequestLogMiddleware, bind as bind_log
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Import streaming module
@@ -29,14 +33,88 @@ games_dir = os.path.join(current_dir, 'games')
 if games_dir not in sys.path:
     sys.path.append(games_dir)
 
-try:
-    from games.streaming import generate_stream
-    STREAMING_AVAILABLE = True
-except ImportError as e:
-    print(f"Streaming module not available: {e}")
-    STREAMING_AVAILABLE = False
+from games.metrics import (
+    MetricsMiddleware, STAGE_LATENCY, ACTIVE_SESSIONS, POOL_QUEUE_DEPTH, FPS, mark_error,
+    render as render_metrics
+)
+from games.profiling import ProfilingMiddleware, annotate as annotate_profile
+from games.warmup import WarmupManager, dummy_frame, dummy_audio
+from games.session_state import AffinityMiddleware, get_store, instance_id
+from games.admission import (
+    AdmissionMiddleware, RouteLimit, current_level as degradation_level, at_least, REDUCED, STATUS_ONLY
+)
+
+# Route families, enabled with ROUTE_FAMILIES=speech,ser (default: all).
+# Modules behind a disabled family are never imported.
+ROUTE_FAMILIES = ("speech", "games", "vision", "ser")
+
+def parse_route_families(value):
+    """Enabled families from a comma-separated list ('' or 'all' = every family)."""
+    if not value or value.strip().lower() == "all":
+        return set(ROUTE_FAMILIES)
+    requested = {name.strip().lower() for name in value.split(",") if name.strip()}
+    unknown = requested - set(ROUTE_FAMILIES)
+    if unknown:
+        logger.warning("Ignoring unknown route families: %s", ", ".join(sorted(unknown)))
+    return requested & set(ROUTE_FAMILIES)
 
-app = FastAPI(title="Speech Recognition HCI Lab API")
+ENABLED_FAMILIES = parse_route_families(os.environ.get("ROUTE_FAMILIES", ""))
+
+speech_router = APIRouter(tags=["speech"])
+games_router = APIRouter(tags=["games"])
+vision_router = APIRouter(tags=["vision"])
+ser_router = APIRouter(tags=["ser"])
+
+# Streaming module (imports mediapipe) is loaded on first use
+_streaming_available = None
+
+def streaming_available():
+    """Import games.streaming once; False if it (or mediapipe) can't be loaded."""
+    global _streaming_available
+    if _streaming_available is None:
+        try:
+            import games.streaming  # noqa: F401
+            _streaming_available = True
+        except ImportError as e:
+            logger.warning("Streaming module not available: %s", e)
+            _streaming_available = False
+    return _streaming_available
+
+# Model warm-up (models are registered at the end of this file)
+warmup = WarmupManager()
+
+@asynccontextmanager
+async def lifespan(app):
+    warmup.configure(os.environ.get("WARMUP_MODELS", "all"), ENABLED_FAMILIES)
+    if os.environ.get("WARMUP_BLOCKING", "").lower() in ("1", "true", "yes"):
+        await run_in_threadpool(warmup.run)
+    else:
+        warmup.start()
+    yield
+    # Don't leave game windows (and their cameras) behind
+    if game_manager is not None:
+        await run_in_threadpool(game_manager.shutdown)
+    if video_jobs is not None:
+        video_jobs.shutdown()
+    if recording_sessions is not None:
+        recording_sessions.close_all()
+
+app = FastAPI(title="Speech Recognition HCI Lab API", lifespan=lifespan)
+
+# Admission control: per-route concurrency, bounded queues and queue-time SLOs.
+# Under pressure, frame routes degrade (reduced resolution, then status only)
+# before shedding with 429. Added first so CORS headers cover 429 responses.
+ADMISSION_LIMITS = {
+    "/process-frame": RouteLimit(max_concurrent=2, max_queue=4, queue_slo_ms=100),
+    "/process-gaze": RouteLimit(max_concurrent=2, max_queue=4, queue_slo_ms=100),
+    # The filtered image is the result, so no status-only level
+    "/apply-filter": RouteLimit(max_concurrent=2, max_queue=4, queue_slo_ms=100, levels=(REDUCED,)),
+    "/transcribe": RouteLimit(max_concurrent=4, max_queue=16, queue_slo_ms=2000, levels=()),
+    "/predict-emotion": RouteLimit(max_concurrent=8, max_queue=32, queue_slo_ms=500, levels=()),
+    "/predict-face-emotion": RouteLimit(max_concurrent=8, max_queue=32, queue_slo_ms=200, levels=()),
+}
+app.add_middleware(AdmissionMiddleware, limits=ADMISSION_LIMITS,
+                   enabled=os.environ.get("ADMISSION_CONTROL", "1").lower() not in ("0", "false", "off"))
 
 # CORS middleware for React frontend
 app.add_middleware(
@@ -47,8 +125,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize recognizer
-recognizer = sr.Recognizer()
+# Opt-in per-request profiling (PROFILING_ENABLED / PROFILE_SAMPLE_RATE, see games/profiling.py)
+app.add_middleware(ProfilingMiddleware)
+
+# Request count / error / latency metrics per route (see /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Instance id on every response; frame routes keep tracking state in-process,
+# so their responses ask for session affinity (see games/session_state.py)
+app.add_middleware(AffinityMiddleware, stateful_prefixes=("/process-frame", "/process-gaze", "/apply-filter", "/recordings",
+                                                       "/predict-face-emotion"))
+
+# Request-scoped log fields and one (sampled) access record per request; outermost
+app.add_middleware(RequestLogMiddleware)
+
+# Speech recognizer, created on first /transcribe
+recognizer = None
+
+def get_recognizer():
+    global recognizer
+    if recognizer is None:
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+    return recognizer
 
 # Models
 class TranscriptionRequest(BaseModel):
@@ -114,6 +213,7 @@ def calculate_accuracy(original: str, result: str) -> float:
     hypothesis = result_clean.split()
     
     # Smoothing handles edge cases like very short sentences
+    from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
     smoothing = SmoothingFunction().method1
     bleu_score = sentence_bleu(reference, hypothesis, smoothing_function=smoothing)
     
@@ -175,16 +275,54 @@ def read_root():
         "endpoints": [
             "/transcribe - POST audio file for transcription",
             "/accuracy - POST to calculate accuracy",
-            "/health - GET health check"
+            "/health - GET health check",
+            "/ready - GET model readiness (503 until warm-up finishes)",
+            "/metrics - GET Prometheus metrics"
         ]
     }
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "service": "speech-recognition-api"}
+    return {
+        "status": "healthy",
+        "service": "speech-recognition-api",
+        "instance": instance_id(),
+        "session_store": type(get_store()).__name__,
+    }
+
+def _session_gauges():
+    """Frame sessions: streams that received a /process-frame call recently."""
+    return {("frame",): len(FPS.active())}
+
+def _queue_gauges():
+    depths = {}
+    if ser_batcher is not None:
+        depths[("ser_batcher",)] = ser_batcher.stats()["queue_depth"]
+    if face_emotion_batcher is not None:
+        depths[("face_emotion_batcher",)] = face_emotion_batcher.stats()["queue_depth"]
+    # Only inspect the recognizer if something already loaded it
+    ser_pipeline = sys.modules.get("games.ser_pipeline")
+    pool = getattr(getattr(ser_pipeline, "ser_engine", None), "_feature_pool", None)
+    if pool is not None:
+        depths[("ser_features",)] = pool._work_queue.qsize()
+    return depths
+
+ACTIVE_SESSIONS.set_function(_session_gauges)
+POOL_QUEUE_DEPTH.set_function(_queue_gauges)
+
+@app.get("/ready")
+def readiness_check():
+    """Per-model load state and warm-up latency; 503 while models are still warming up."""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of request, stage and session metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 # ... imports ...
 
-@app.post("/transcribe", response_model=TranscriptionResponse)
+@speech_router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
     audio: UploadFile = File(...),
     language: str = Form("en-US"),
@@ -193,21 +331,19 @@ async def transcribe_audio(
     """
     Transcribe audio file to text using Google Speech Recognition
     """
+    import speech_recognition as sr
+    from pydub import AudioSegment
+    recognizer = get_recognizer()
     start_time = time.time()
     
     try:
         # Read audio file
         audio_data = await audio.read()
-        logger.info(f"Received audio data size: {len(audio_data)} bytes")
-        logger.info(f"Audio filename: {audio.filename}, content_type: {audio.content_type}")
-        
-        # Log first few bytes to identify format
-        if len(audio_data) > 20:
-            header_hex = audio_data[:20].hex()
-            logger.info(f"Audio header (hex): {header_hex}")
+        annotate_profile(language=language, audio_bytes=len(audio_data), content_type=audio.content_type)
+        bind_log(language=language, audio_bytes=len(audio_data), content_type=audio.content_type)
         
         if len(audio_data) == 0:
-            logger.error("Received empty audio file")
+            logger.warning("Received empty audio file")
             return TranscriptionResponse(
                 transcription="",
                 accuracy=0.0,
@@ -219,32 +355,28 @@ async def transcribe_audio(
         # Convert audio to WAV using pydub
         try:
             # Try to load the audio using pydub (handles webm, m4a, etc.)
-            logger.info("Attempting pydub conversion...")
             audio_segment = AudioSegment.from_file(io.BytesIO(audio_data))
-            logger.info(f"Pydub loaded: duration={len(audio_segment)}ms, channels={audio_segment.channels}, sample_width={audio_segment.sample_width}")
+            bind_log(audio_ms=len(audio_segment), channels=audio_segment.channels)
             
             # Export to wav for speech_recognition
             wav_buffer = io.BytesIO()
             audio_segment.export(wav_buffer, format="wav")
             wav_buffer.seek(0)
-            wav_size = len(wav_buffer.getvalue())
-            logger.info(f"Exported WAV size: {wav_size} bytes")
             
             source_file = wav_buffer
         except Exception as conversion_error:
-            logger.error(f"Conversion Error: {str(conversion_error)}")
+            logger.warning("Audio conversion failed, trying the raw upload as WAV: %s", conversion_error)
             # Fallback to original data if conversion fails (might be already wav)
             source_file = io.BytesIO(audio_data)
         
         # Convert to AudioData format
         with sr.AudioFile(source_file) as source:
             audio_input = recognizer.record(source)
-            logger.info(f"AudioData created, sample_rate={source.SAMPLE_RATE}, sample_width={source.SAMPLE_WIDTH}")
         
         # Transcribe
-        logger.info(f"Calling Google Speech API with language={language}...")
-        transcription = recognizer.recognize_google(audio_input, language=language)
-        logger.info(f"Transcription result: '{transcription}'")
+        with STAGE_LATENCY.time("recognizer", "google"):
+            transcription = recognizer.recognize_google(audio_input, language=language)
+        logger.debug("Transcription result: %r", transcription)
         end_time = time.time()
         
         latency = end_time - start_time
@@ -283,12 +415,10 @@ async def transcribe_audio(
     except sr.RequestError as e:
         raise HTTPException(status_code=500, detail=f"API Error: {str(e)}")
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR: {str(e)}")
+        logger.exception("Transcription failed")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-@app.post("/accuracy", response_model=AccuracyResponse)
+@speech_router.post("/accuracy", response_model=AccuracyResponse)
 def calculate_text_accuracy(request: AccuracyRequest):
     """
     Calculate accuracy between original and transcribed text
@@ -296,7 +426,7 @@ def calculate_text_accuracy(request: AccuracyRequest):
     accuracy = calculate_accuracy(request.original, request.result)
     return AccuracyResponse(accuracy=accuracy)
 
-@app.get("/experiments")
+@speech_router.get("/experiments")
 def get_experiments():
     """
     Get list of available experiments
@@ -341,7 +471,7 @@ def get_experiments():
         ]
     }
 
-@app.get("/languages")
+@speech_router.get("/languages")
 def get_supported_languages():
     """
     Get list of supported language codes
@@ -364,249 +494,564 @@ def get_supported_languages():
         ]
     }
 
-@app.post("/games/gesture")
+# Desktop games run in supervised processes forked from a prewarmed server
+# (see games/game_manager.py); created on first use or by warm-up
+game_manager = None
+_game_manager_lock = threading.Lock()
+
+def get_game_manager():
+    global game_manager
+    if game_manager is None:
+        with _game_manager_lock:
+            if game_manager is None:
+                from games.game_manager import GameManager
+                game_manager = GameManager()
+    return game_manager
+
+def _launch_game(name):
+    try:
+        result = get_game_manager().launch(name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    message = f"{result['name']} is already running" if result["already_running"] else f"{result['name']} launched!"
+    return {"status": "success", "message": message, **result}
+
+@games_router.post("/games/gesture")
 def launch_gesture_game():
     """
     Launch the Gesture Controlled Menu Game in a separate process.
     """
-    try:
-        # Get absolute path to the game script
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        script_path = os.path.join(current_dir, "games", "gesture_game.py")
-        
-        # Run in a separate thread/process so it doesn't block the API
-        def run_script():
-            subprocess.run([sys.executable, script_path])
-            
-        thread = threading.Thread(target=run_script)
-        thread.start()
-        
-        return {"status": "success", "message": "Gesture Game launched!"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return _launch_game("gesture")
 
-@app.post("/games/pose")
+@games_router.post("/games/pose")
 def launch_pose_game():
     """
     Launch the Pose Estimation Game in a separate process.
     """
-    try:
-        # Get absolute path to the game script
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        script_path = os.path.join(current_dir, "games", "pose_game.py")
-        
-        # Run in a separate thread/process so it doesn't block the API
-        def run_script():
-            subprocess.run([sys.executable, script_path])
-            
-        thread = threading.Thread(target=run_script)
-        thread.start()
-        
-        return {"status": "success", "message": "Pose Estimation launched!"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return _launch_game("pose")
 
-@app.post("/games/emotion")
+@games_router.post("/games/emotion")
 def launch_emotion_game():
     """
     Launch the Emotion Responsive AI Game in a separate process.
     """
+    return _launch_game("emotion")
+
+@games_router.get("/games/status")
+def games_status():
+    """Running games with their PIDs, and the fork server's preloaded modules."""
+    return get_game_manager().status()
+
+@games_router.post("/games/{game}/stop")
+def stop_game(game: str):
+    """Stop a running game (terminate, then kill after a timeout)."""
+    from games.game_manager import GameNotFound
     try:
-        # Get absolute path to the game script
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        script_path = os.path.join(current_dir, "games", "emotion_game.py")
-        
-        # Run in a separate thread/process so it doesn't block the API
-        def run_script():
-            subprocess.run([sys.executable, script_path])
-            
-        thread = threading.Thread(target=run_script)
-        thread.start()
-        
-        return {"status": "success", "message": "Emotion Game launched!"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return get_game_manager().stop(game)
+    except GameNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown game: {game}")
 
 # ============== STREAMING ENDPOINTS (In-Browser Camera) ==============
 
-@app.get("/stream/gesture")
+@vision_router.get("/stream/gesture")
 def stream_gesture():
     """
     Stream hand gesture recognition video feed.
     Use this in an <img> tag: <img src="http://localhost:8000/stream/gesture" />
     """
-    if not STREAMING_AVAILABLE:
+    if not streaming_available():
         raise HTTPException(status_code=503, detail="Streaming not available")
+    from games.streaming import generate_stream
     return StreamingResponse(
         generate_stream("gesture"),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
-@app.get("/stream/pose")
+@vision_router.get("/stream/pose")
 def stream_pose():
     """
     Stream pose estimation video feed.
     """
-    if not STREAMING_AVAILABLE:
+    if not streaming_available():
         raise HTTPException(status_code=503, detail="Streaming not available")
+    from games.streaming import generate_stream
     return StreamingResponse(
         generate_stream("pose"),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
-@app.get("/stream/emotion")
+@vision_router.get("/stream/emotion")
 def stream_emotion():
     """
     Stream emotion detection video feed.
     """
-    if not STREAMING_AVAILABLE:
+    if not streaming_available():
         raise HTTPException(status_code=503, detail="Streaming not available")
+    from games.streaming import generate_stream
     return StreamingResponse(
         generate_stream("emotion"),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
-@app.get("/stream/{stream_type}/status")
-def get_status(stream_type: str):
+@vision_router.get("/stream/{stream_type}/status")
+def get_status(stream_type: str, request: Request, session: str = None):
     """
-    Get the current detection status for a stream.
-    Frontend polls this to get gesture/pose/emotion info.
+    Get the current detection status for a stream (one-off read; live
+    updates are pushed by /stream/{stream_type}/events). Pass the session
+    (X-Session-Id or ?session=) to read a /process-frame client's status.
     """
-    if not STREAMING_AVAILABLE:
+    if not streaming_available():
         raise HTTPException(status_code=503, detail="Streaming not available")
     
     try:
         from games.streaming import get_stream_status
-        return get_stream_status(stream_type)
+        return get_stream_status(stream_type, session or request.headers.get("x-session-id"))
     except ImportError:
         return {"status": "error", "message": "Streaming module not loaded"}
 
+@vision_router.get("/stream/{stream_type}/events")
+async def stream_status_events(stream_type: str, request: Request, session: str = None):
+    """
+    Server-Sent Events: a `status` event on every gesture/pose/emotion change,
+    coalesced, with heartbeats while idle. Use with EventSource in the browser
+    (?session= selects a /process-frame client's status).
+    """
+    if not streaming_available():
+        raise HTTPException(status_code=503, detail="Streaming not available")
+    if stream_type not in ("gesture", "pose", "emotion"):
+        raise HTTPException(status_code=404, detail=f"Unknown stream type: {stream_type}")
+
+    from games.streaming import get_stream_status, stream_state_key
+    from games.status_events import status_events
+
+    async def events():
+        ACTIVE_SESSIONS.inc("sse")
+        try:
+            async for message in status_events(stream_state_key(stream_type, session),
+                                               partial(get_stream_status, stream_type, session),
+                                               request.is_disconnected):
+                yield message
+        finally:
+            ACTIVE_SESSIONS.dec("sse")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============== SER ENDPOINTS (Speech Emotion Recognition) ==============
-@app.post("/predict-emotion")
+# Micro-batcher shared by concurrent /predict-emotion requests
+ser_batcher = None
+
+def get_ser_batcher():
+    """Create the SER micro-batcher on first use (loads the model lazily)."""
+    global ser_batcher
+    if ser_batcher is None:
+        from games.ser_pipeline import ser_engine
+        from games.batching import MicroBatcher
+        ser_batcher = MicroBatcher(ser_engine.predict_batch, max_batch_size=16, max_wait_ms=10)
+    return ser_batcher
+
+@ser_router.post("/predict-emotion")
 async def predict_speech_emotion(
     audio: UploadFile = File(...),
     gender: str = Form("all") # For future use
 ):
     """
     Predict emotion from speech audio file.
+    Concurrent requests are micro-batched into a single model call.
     """
     try:
-        from games.ser_pipeline import ser_engine
-        
         # Read audio file
         audio_data = await audio.read()
         
-        # Predict
-        result = ser_engine.predict(audio_data)
+        # Predict (batched with other in-flight requests)
+        result = await get_ser_batcher().submit(audio_data)
         
         return result
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Speech emotion prediction failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Largest raw audio body accepted by /predict-emotion/stream
+MAX_AUDIO_BYTES = 20 * 1024 * 1024
+
+@ser_router.post("/predict-emotion/stream")
+async def predict_speech_emotion_stream(request: Request):
+    """
+    Predict emotion from a raw (non-multipart) audio body, e.g. audio/webm.
+    The body is decoded by ffmpeg while it uploads, so prediction starts as
+    soon as the last chunk arrives.
+    """
+    decoder = None
+    finished = False
+    try:
+        from games.ser_pipeline import ser_engine
+        from games.audio_decode import StreamingDecoder, AudioDecodeError
+        
+        try:
+            decoder = StreamingDecoder(ser_engine.sample_rate, max_input_bytes=MAX_AUDIO_BYTES)
+        except AudioDecodeError:
+            decoder = None  # No ffmpeg: buffer the body and decode at the end
+        
+        received = bytearray()
+        async for chunk in request.stream():
+            received.extend(chunk)
+            if len(received) > MAX_AUDIO_BYTES:
+                raise HTTPException(status_code=413, detail="Audio too large")
+            if decoder and chunk:
+                await run_in_threadpool(decoder.feed, chunk)
+        
+        if not received:
+            raise HTTPException(status_code=400, detail="Empty audio body")
+        
+        audio = bytes(received)
+        if decoder:
+            try:
+                audio = await run_in_threadpool(decoder.finish)
+                finished = True
+            except AudioDecodeError:
+                # Non-streamable container (e.g. mp4): full-buffer decode in the recognizer
+                pass
+        
+        return await get_ser_batcher().submit(audio)
+    except HTTPException:
+        raise
+    except ClientDisconnect:
+        logger.info("Client disconnected during audio upload")
+        raise
+    except Exception as e:
+        logger.exception("Streaming speech emotion prediction failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Too large, empty, disconnected or failed: don't leave ffmpeg running
+        if decoder is not None and not finished:
+            decoder.abort()
+
+@ser_router.post("/predict-emotion/batch")
+async def predict_speech_emotion_batch(
+    audio: List[UploadFile] = File(...)
+):
+    """
+    Predict emotion for several audio files in one request.
+    Returns results in upload order.
+    """
+    try:
+        from games.ser_pipeline import ser_engine
+        
+        clips = [await f.read() for f in audio]
+        results = await run_in_threadpool(ser_engine.predict_batch, clips)
+        
+        return {"status": "success", "count": len(results), "results": results}
+    except Exception as e:
+        logger.exception("Batch speech emotion prediction failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@ser_router.post("/predict-emotion/timeline")
+async def predict_speech_emotion_timeline(
+    audio: UploadFile = File(...),
+    window_seconds: float = Form(2.0),
+    hop_seconds: float = Form(0.5)
+):
+    """
+    Emotion timeline for a longer recording (sliding windows).
+    Returns per-window start times, labels and class probabilities.
+    """
+    try:
+        from games.ser_pipeline import ser_engine
+        
+        audio_data = await audio.read()
+        return await run_in_threadpool(ser_engine.predict_timeline, audio_data, window_seconds, hop_seconds)
+    except Exception as e:
+        logger.exception("Speech emotion timeline failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 # ============== GAZE TRACKING ENDPOINT ==============
-@app.post("/process-gaze")
-async def process_gaze_frame(image: UploadFile = File(...)):
+@vision_router.post("/process-gaze")
+async def process_gaze_frame(request: Request, image: UploadFile = File(...)):
     """
     Process image for Gaze Tracking.
     Returns: JSON with "status", "direction", and "image" (base64 annotated).
     """
     try:
+        import cv2
+        import numpy as np
         from games.gaze_tracker import gaze_tracker
+        from games.frame_buffers import session_arena, encode_jpeg, json_image_body
         
         contents = await image.read()
         nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with STAGE_LATENCY.time("decode", "gaze"):
+            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
         if img is None:
+            mark_error()
             return {"status": "error", "message": "Invalid image"}
 
-        # Process
-        annotated_frame, direction = gaze_tracker.process_frame(img)
-        
-        # Encode result
-        _, buffer = cv2.imencode('.jpg', annotated_frame)
-        base64_image = base64.b64encode(buffer).decode('utf-8')
-        
-        return {
-            "status": "success",
-            "direction": direction,
-            "image": f"data:image/jpeg;base64,{base64_image}"
-        }
+        with session_arena(request.headers.get("x-session-id")):
+            level = degradation_level()
+            if at_least(level, REDUCED):
+                img = reduce_frame(img)
+
+            # Process
+            async with hold_processor("gaze"):
+                with STAGE_LATENCY.time("inference", "gaze"):
+                    annotated_frame, direction = gaze_tracker.process_frame(img)
+
+            result = {"status": "success", "direction": direction, "degradation": level}
+            if not at_least(level, STATUS_ONLY):
+                # Encode result
+                with STAGE_LATENCY.time("encode", "gaze"):
+                    jpeg = encode_jpeg(annotated_frame)
+                if jpeg is not None:
+                    return Response(json_image_body(result, jpeg), media_type="application/json")
+        return result
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Gaze processing failed")
+        mark_error()
         return {"status": "error", "message": str(e)}
 
+# Frame size used when admission control degrades to REDUCED
+REDUCED_FRAME_SIDE = 320
+
+def reduce_frame(img, max_side=REDUCED_FRAME_SIDE):
+    """Downscale so the longer side is at most max_side (no-op for small frames)."""
+    import cv2
+    from games.frame_buffers import current_arena
+    h, w = img.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1:
+        return img
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    arena = current_arena()
+    if arena is not None:
+        return arena.resize(img, *size)
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
 # Frame processors for native camera approach
 frame_processors = {}
+_frame_processor_locks = {name: threading.Lock() for name in ("gesture", "pose", "emotion")}
+# Held while a shared MediaPipe/dlib processor runs: graphs aren't thread-safe,
+# and background warm-up uses the same instances as the endpoints
+processor_busy = {name: threading.Lock() for name in ("gesture", "pose", "emotion", "filter", "gaze")}
+
+@asynccontextmanager
+async def hold_processor(name):
+    """processor_busy[name] for an async route, waited for off the event loop."""
+    lock = processor_busy[name]
+    held = [lock.acquire(blocking=False)]
+
+    def acquire():
+        # Warm-up can hold it for a first inference that takes seconds
+        lock.acquire()
+        held[0] = True
+
+    try:
+        if not held[0]:
+            await run_in_threadpool(acquire)
+        yield
+    finally:
+        if held[0]:
+            lock.release()
+
+def get_frame_processor(stream_type):
+    """Shared processor for a stream type, created on first use (or by warm-up)."""
+    processor = frame_processors.get(stream_type)
+    if processor is None and stream_type in _frame_processor_locks:
+        with _frame_processor_locks[stream_type]:
+            processor = frame_processors.get(stream_type)
+            if processor is None:
+                from games.streaming import HandGestureStream, PoseStream, EmotionStream
+                classes = {"gesture": HandGestureStream, "pose": PoseStream, "emotion": EmotionStream}
+                processor = frame_processors[stream_type] = classes[stream_type]()
+    return processor
 
-@app.post("/process-frame")
+@vision_router.post("/process-frame")
 async def process_frame(
+    request: Request,
     frame: UploadFile = File(...),
-    type: str = Form("gesture")
+    type: str = Form("gesture"),
+    extras: str = Form(""),
+    timestamp: float = Form(None)
 ):
     """
     Process a single frame from the browser's native camera.
     Returns the detection results without streaming video.
+    For type=pose, extras="hands,face" also tracks and draws hands / face mesh.
+    timestamp (client capture time, ms) is kept when the session is recording.
     """
-    if not STREAMING_AVAILABLE:
+    if not streaming_available():
         raise HTTPException(status_code=503, detail="Processing not available")
     
     try:
         import cv2
         import numpy as np
-        from games.streaming import HandGestureStream, PoseStream, EmotionStream, get_stream_status
+        from games.streaming import get_stream_status, parse_pose_extras
+        from games.frame_buffers import session_arena, encode_jpeg, json_image_body
         
         # Read the frame
         frame_data = await frame.read()
+        annotate_profile(type=type, frame_bytes=len(frame_data))
+        bind_log(stream_type=type, frame_bytes=len(frame_data))
         nparr = np.frombuffer(frame_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with STAGE_LATENCY.time("decode", "frame"):
+            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if img is None:
+            mark_error()
             return {"status": "error", "message": "Invalid frame"}
         
-        # Get or create processor
-        global frame_processors
-        if type not in frame_processors:
-            if type == "gesture":
-                frame_processors[type] = HandGestureStream()
-            elif type == "pose":
-                frame_processors[type] = PoseStream()
-            elif type == "emotion":
-                frame_processors[type] = EmotionStream()
-        
-    
-        processed_frame = None
-        processor = frame_processors.get(type)
-        if processor:
-            # Process frame (updates global state) AND returns annotated frame
-            processed_frame = processor.process_frame(img)
-        
-        # Get status
-        response_data = get_stream_status(type)
-        
-        # Encode processed frame to base64 if available
-        if processed_frame is not None:
-            import base64
-            # Encode to jpg
-            ret, buffer = cv2.imencode('.jpg', processed_frame)
-            if ret:
-                jpg_as_text = base64.b64encode(buffer).decode('utf-8')
-                response_data["image"] = f"data:image/jpeg;base64,{jpg_as_text}"
-        
+        # Per-session buffers for resize / RGB conversion (see frame_buffers.py)
+        session = request.headers.get("x-session-id")
+        with session_arena(session):
+            level = degradation_level()
+            if at_least(level, REDUCED):
+                img = reduce_frame(img)
+
+            # Get or create processor
+            processed_frame = None
+            processor = get_frame_processor(type)
+            if processor:
+                kwargs = {"extras": parse_pose_extras(extras)} if type == "pose" and extras else {}
+                kwargs["session"] = session
+                recorder = recording_sessions.get(session or "", type) if recording_sessions is not None else None
+                # Process frame (updates global state) AND returns annotated frame
+                async with hold_processor(type):
+                    if recorder is not None and not recorder.full:
+                        processed_frame = recorder.process(
+                            processor, img, frame_data, degradation=level,
+                            client_ts=None if timestamp is None else timestamp / 1000, **kwargs)
+                    else:
+                        processed_frame = processor.process_frame(img, **kwargs)
+                    # This frame's own result; the store may hold another
+                    # worker's or session's state
+                    response_data = dict(processor.state)
+                FPS.tick(type)
+            else:
+                response_data = dict(get_stream_status(type, session))
+            response_data["degradation"] = level
+
+            # Attach the annotated frame as a data URL (not when shedding to status only);
+            # the JPEG goes into the body without intermediate str copies
+            if processed_frame is not None and not at_least(level, STATUS_ONLY):
+                with STAGE_LATENCY.time("encode", type):
+                    jpeg = encode_jpeg(processed_frame)
+                if jpeg is not None:
+                    return Response(json_image_body(response_data, jpeg), media_type="application/json")
+
         return response_data
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"FRAME PROCESS ERROR: {str(e)}")
+        logger.exception("Frame processing failed")
+        mark_error()
         return {"status": "error", "message": str(e)}
 
+# ============== SESSION RECORDING ==============
+# Records /process-frame sessions for offline replay (see games/session_recorder.py);
+# created on the first recording
+recording_sessions = None
+_recording_sessions_lock = threading.Lock()
+
+def get_recording_sessions():
+    global recording_sessions
+    if recording_sessions is None:
+        with _recording_sessions_lock:
+            if recording_sessions is None:
+                from games.session_recorder import RecordingSessions
+                recording_sessions = RecordingSessions()
+    return recording_sessions
+
+@vision_router.post("/recordings/start")
+def start_recording(request: Request, type: str = Form("gesture")):
+    """
+    Record this session's (X-Session-Id) /process-frame calls of the given
+    type: frames, client timestamps and outputs, until /recordings/stop.
+    """
+    if not streaming_available():
+        raise HTTPException(status_code=503, detail="Processing not available")
+    from games.session_recorder import LANDMARK_SHAPES
+    session = request.headers.get("x-session-id")
+    if not session:
+        raise HTTPException(status_code=400, detail="X-Session-Id header required")
+    if type not in LANDMARK_SHAPES:
+        raise HTTPException(status_code=400, detail=f"Can't record type: {type}")
+    # Replays rebuild the processor with the same engine
+    engine = getattr(get_frame_processor(type), "engine", None)
+    recording_id = get_recording_sessions().start(session, type, {"engine": engine} if engine else None)
+    bind_log(recording=recording_id)
+    return {"status": "recording", "recording": recording_id, "type": type}
+
+@vision_router.post("/recordings/stop")
+def stop_recording(request: Request):
+    """Close this session's recording; returns its manifest."""
+    stopped = get_recording_sessions().stop(request.headers.get("x-session-id") or "")
+    if stopped is None:
+        raise HTTPException(status_code=404, detail="Session is not recording")
+    recording_id, manifest = stopped
+    return {"status": "stopped", "recording": recording_id, "frames": manifest["frames"],
+            "chunks": len(manifest["chunks"])}
+
+@vision_router.get("/recordings")
+def list_recordings():
+    """Recordings under RECORDINGS_DIR (replay them with python -m games.session_recorder)."""
+    return {"recordings": get_recording_sessions().list()}
+
+# ============== FACE EMOTION (DeepFace) ==============
+# Micro-batcher shared by concurrent /predict-face-emotion requests: face crops
+# from several sessions go through the emotion model in one call
+face_emotion_batcher = None
+
+def get_face_emotion_batcher():
+    """Create the face emotion micro-batcher on first use (the model loads lazily)."""
+    global face_emotion_batcher
+    if face_emotion_batcher is None:
+        from games.face_emotion import face_emotion_engine
+        from games.batching import MicroBatcher
+        face_emotion_batcher = MicroBatcher(face_emotion_engine.predict_batch, max_batch_size=16, max_wait_ms=5)
+    return face_emotion_batcher
+
+@vision_router.post("/predict-face-emotion")
+async def predict_face_emotion(
+    request: Request,
+    image: UploadFile = File(...)
+):
+    """
+    Facial emotion from DeepFace's emotion model (angry, disgust, fear, happy,
+    sad, surprise, neutral; scores in %). With an X-Session-Id header the face
+    box is reused between keyframes instead of detecting on every frame.
+    """
+    import cv2
+    import numpy as np
+    from games.face_emotion import face_emotion_engine, deepface_available
+    if not deepface_available():
+        raise HTTPException(status_code=503, detail="DeepFace not installed")
+
+    contents = await image.read()
+    try:
+        with STAGE_LATENCY.time("decode", "face_emotion"):
+            img = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            mark_error()
+            return {"status": "error", "message": "Invalid image"}
+        with STAGE_LATENCY.time("detect", "face_emotion"):
+            face = await run_in_threadpool(face_emotion_engine.locate, img, request.headers.get("x-session-id"))
+        if face is None:
+            return {"status": "success", "face_detected": False}
+        bind_log(keyframe=face["keyframe"])
+        with STAGE_LATENCY.time("inference", "face_emotion"):
+            result = await get_face_emotion_batcher().submit(face["crop"])
+    except Exception as e:
+        logger.exception("Face emotion failed")
+        mark_error()
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", "face_detected": True, "box": list(face["box"]),
+            "keyframe": face["keyframe"], **result}
+
 # ============== FACE FILTER ENDPOINT (Snapchat-style) ==============
-@app.post("/apply-filter")
+@vision_router.post("/apply-filter")
 async def apply_face_filter(
+    request: Request,
     image: UploadFile = File(...),
     filter: str = Form("sunglasses")
 ):
@@ -615,34 +1060,186 @@ async def apply_face_filter(
     Available filters: sunglasses, hat, cigar, beard, mustache, bald, clown, dog, none
     """
     try:
+        import cv2
+        import numpy as np
         from games.face_filter import face_filter_processor
+        from games.frame_buffers import session_arena, encode_jpeg, json_image_body
         
         # Read the image
         contents = await image.read()
         nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with STAGE_LATENCY.time("decode", "filter"):
+            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
         if img is None:
+            mark_error()
             return {"status": "error", "message": "Invalid image"}
 
-        # Process and apply filter
-        processed_frame, face_detected = face_filter_processor.process_frame(img, filter)
-        
-        # Encode result
-        _, buffer = cv2.imencode('.jpg', processed_frame)
-        base64_image = base64.b64encode(buffer).decode('utf-8')
-        
-        return {
+        with session_arena(request.headers.get("x-session-id")):
+            level = degradation_level()
+            if at_least(level, REDUCED):
+                img = reduce_frame(img)
+
+            # Process and apply filter
+            async with hold_processor("filter"):
+                with STAGE_LATENCY.time("inference", "filter"):
+                    processed_frame, face_detected = face_filter_processor.process_frame(img, filter)
+
+            # Encode result
+            with STAGE_LATENCY.time("encode", "filter"):
+                jpeg = encode_jpeg(processed_frame)
+
+        result = {
             "status": "success",
             "face_detected": face_detected,
             "filter": filter,
-            "image": f"data:image/jpeg;base64,{base64_image}"
+            "degradation": level
         }
+        if jpeg is None:
+            return result
+        return Response(json_image_body(result, jpeg), media_type="application/json")
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Face filter failed")
+        mark_error()
         return {"status": "error", "message": str(e)}
 
+# ============== OFFLINE VIDEO PROCESSING ==============
+# Uploaded videos run through a processor in background jobs with a worker
+# pool (see games/video_batch.py); created on first use
+video_jobs = None
+_video_jobs_lock = threading.Lock()
+VIDEO_PROCESSORS = ("gesture", "pose", "emotion", "filter", "gaze")
+
+def get_video_jobs():
+    global video_jobs
+    if video_jobs is None:
+        with _video_jobs_lock:
+            if video_jobs is None:
+                from games.video_batch import VideoJobs
+                video_jobs = VideoJobs()
+    return video_jobs
+
+@vision_router.post("/process-video", status_code=202)
+async def process_video_upload(
+    video: UploadFile = File(...),
+    processor: str = Form("pose"),
+    filter: str = Form("sunglasses")
+):
+    """
+    Run an uploaded video through a processor (gesture, pose, emotion,
+    filter, gaze). Returns a job; poll /process-video/{job} and download the
+    annotated video and per-frame results (.npz) when it's done.
+    """
+    from games.video_batch import VideoProcessingError
+    if processor not in VIDEO_PROCESSORS:
+        raise HTTPException(status_code=400, detail=f"Unknown processor: {processor}")
+    suffix = os.path.splitext(video.filename or "")[1].lower() or ".mp4"
+    try:
+        job_id, path = get_video_jobs().new_job(processor, suffix, {"filter": filter})
+    except VideoProcessingError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    bind_log(video_job=job_id, processor=processor)
+    with open(path, "wb") as f:
+        while True:
+            chunk = await video.read(1 << 20)
+            if not chunk:
+                break
+            f.write(chunk)
+    return get_video_jobs().start(job_id)
+
+def _video_job_or_404(job_id):
+    from games.video_batch import JobNotFound
+    try:
+        return get_video_jobs().status(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown video job: {job_id}")
+
+@vision_router.get("/process-video/{job_id}")
+def video_job_status(job_id: str):
+    """State (queued, running, done, failed), progress and, when done, throughput."""
+    return _video_job_or_404(job_id)
+
+@vision_router.get("/process-video/{job_id}/video")
+def video_job_video(job_id: str):
+    """Annotated video (mp4) of a finished job."""
+    _video_job_or_404(job_id)
+    path = get_video_jobs().output_path(job_id, "video")
+    if path is None:
+        raise HTTPException(status_code=409, detail="Video job not finished")
+    return FileResponse(path, media_type="video/mp4", filename=f"{job_id}.mp4")
+
+@vision_router.get("/process-video/{job_id}/results")
+def video_job_results(job_id: str):
+    """Per-frame labels and landmarks (.npz) of a finished job."""
+    _video_job_or_404(job_id)
+    path = get_video_jobs().output_path(job_id, "results")
+    if path is None:
+        raise HTTPException(status_code=409, detail="Video job not finished")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{job_id}.npz")
+
+# ============== WARM-UP / READINESS ==============
+def _load_speech():
+    from pydub import AudioSegment  # noqa: F401
+    calculate_accuracy("warm up", "warm up")  # loads nltk
+    return get_recognizer()
+
+def _load_ser():
+    from games.ser_pipeline import ser_engine
+    get_ser_batcher()
+    return ser_engine
+
+def _load_gaze():
+    from games.gaze_tracker import gaze_tracker
+    if gaze_tracker.predictor is None:
+        raise RuntimeError("dlib shape predictor not loaded")
+    return gaze_tracker
+
+def _load_face_emotion():
+    from games.face_emotion import face_emotion_engine
+    face_emotion_engine.load()
+    get_face_emotion_batcher()
+    return face_emotion_engine
+
+def _warm_face_emotion(engine):
+    from games.face_emotion import INPUT_SIZE
+    engine.predict(dummy_frame())
+    engine.predict_batch([(dummy_frame(INPUT_SIZE, INPUT_SIZE)[:, :, :1] / 255.0).astype("float32")])
+
+def _load_filter():
+    from games.face_filter import face_filter_processor
+    return face_filter_processor
+
+warmup.register("speech", "speech", _load_speech)
+warmup.register("ser", "ser", _load_ser, lambda engine: engine.predict(dummy_audio()))
+def _warm_frame_processor(stream_type, processor):
+    # Same instance as /process-frame: wait for it, and don't publish the dummy result
+    with processor_busy[stream_type]:
+        processor.process_frame(dummy_frame(), publish=False)
+
+def _warm_filter(processor):
+    with processor_busy["filter"]:
+        processor.process_frame(dummy_frame(), "sunglasses")
+
+def _warm_gaze(tracker):
+    with processor_busy["gaze"]:
+        tracker.process_frame(dummy_frame())
+
+for _stream_type in ("gesture", "pose", "emotion"):
+    warmup.register(_stream_type, "vision", partial(get_frame_processor, _stream_type),
+                    partial(_warm_frame_processor, _stream_type))
+warmup.register("gaze", "vision", _load_gaze, _warm_gaze)
+warmup.register("filter", "vision", _load_filter, _warm_filter)
+warmup.register("face_emotion", "vision", _load_face_emotion, _warm_face_emotion)
+# Desktop games need a display and camera, so their fork server is only
+# prewarmed when asked for (WARMUP_MODELS=...,games)
+warmup.register("games", "games", lambda: get_game_manager().prewarm(), opt_in=True)
+
+# Register the enabled route families
+for _family, _router in (("speech", speech_router), ("games", games_router),
+                         ("vision", vision_router), ("ser", ser_router)):
+    if _family in ENABLED_FAMILIES:
+        app.include_router(_router)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
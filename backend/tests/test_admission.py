@@ -0,0 +1,117 @@
+"""
+Tests for admission control and graceful degradation.
+"""
+import pytest
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.admission import (
+    AdmissionMiddleware, RouteGate, RouteLimit, current_level, NORMAL, REDUCED, STATUS_ONLY, SHED
+)
+
+
+class TestRouteGate:
+    def test_levels_follow_pressure(self):
+        gate = RouteGate("/x", RouteLimit(max_concurrent=1, max_queue=4, queue_slo_ms=100))
+        assert gate.level_for(0.1) == NORMAL
+        assert gate.level_for(0.7) == REDUCED
+        assert gate.level_for(3.0) == STATUS_ONLY
+
+    def test_levels_limited_to_route(self):
+        filter_gate = RouteGate("/f", RouteLimit(1, 4, 100, levels=(REDUCED,)))
+        assert filter_gate.level_for(3.0) == REDUCED
+        audio_gate = RouteGate("/a", RouteLimit(1, 4, 100, levels=()))
+        assert audio_gate.level_for(3.0) == NORMAL
+
+    def test_pressure_from_wait_and_queue(self):
+        gate = RouteGate("/x", RouteLimit(max_concurrent=1, max_queue=4, queue_slo_ms=100))
+        assert gate.pressure() == 0.0
+        gate.inflight, gate.active = 3, 1
+        assert gate.pressure() == 0.5
+        for _ in range(50):
+            gate.observe(0.2, 0.05)
+        assert gate.pressure() == pytest.approx(2.0, rel=0.01)
+        assert gate.retry_after() >= 1
+
+
+def _app(limit):
+    from fastapi import FastAPI
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        await asyncio.sleep(0.05)
+        return {"level": current_level()}
+
+    @app.get("/free")
+    async def free():
+        return {"level": current_level()}
+
+    app.add_middleware(AdmissionMiddleware, limits={"/work": limit})
+    return app
+
+
+async def _burst(app, count, path="/work"):
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.get(path) for _ in range(count)))
+
+
+class TestMiddleware:
+    def test_idle_requests_are_normal(self):
+        responses = asyncio.run(_burst(_app(RouteLimit(2, 4, 100)), 1))
+        assert responses[0].json() == {"level": NORMAL}
+        assert responses[0].headers["x-degradation"] == NORMAL
+
+    def test_overload_degrades_then_sheds(self):
+        # One slot, 50 ms per request, 20 ms SLO: the queue builds immediately
+        limit = RouteLimit(max_concurrent=1, max_queue=3, queue_slo_ms=20, max_wait_ms=1000)
+        responses = asyncio.run(_burst(_app(limit), 8))
+        shed = [r for r in responses if r.status_code == 429]
+        served = [r for r in responses if r.status_code == 200]
+        assert shed and served
+        assert all(r.headers["x-degradation"] == SHED and int(r.headers["retry-after"]) >= 1 for r in shed)
+        assert shed[0].json()["degradation"] == SHED
+        # Served requests had a queue behind them, so they were degraded
+        levels = [r.json()["level"] for r in served]
+        assert STATUS_ONLY in levels
+        assert all(r.headers["x-degradation"] == r.json()["level"] for r in served)
+
+    def test_wait_timeout_sheds(self):
+        limit = RouteLimit(max_concurrent=1, max_queue=10, queue_slo_ms=5, max_wait_ms=20)
+        responses = asyncio.run(_burst(_app(limit), 3))
+        assert [r.status_code for r in responses].count(429) >= 1
+
+    def test_unlimited_routes_pass_through(self):
+        responses = asyncio.run(_burst(_app(RouteLimit(1, 0, 10)), 5, path="/free"))
+        assert all(r.status_code == 200 and "x-degradation" not in r.headers for r in responses)
+
+
+class TestFrameDegradation:
+    def test_process_frame_reports_level(self):
+        pytest.importorskip("mediapipe")
+        import cv2
+        from fastapi.testclient import TestClient
+        import main
+        from games.warmup import dummy_frame
+        frame = cv2.imencode(".jpg", dummy_frame(640, 480))[1].tobytes()
+        response = TestClient(main.app).post("/process-frame", data={"type": "pose"},
+                                             files={"frame": ("f.jpg", frame, "image/jpeg")})
+        assert response.headers["x-degradation"] == NORMAL
+        assert response.json()["degradation"] == NORMAL and "image" in response.json()
+
+    def test_reduce_frame(self):
+        import main
+        from games.warmup import dummy_frame
+        assert main.reduce_frame(dummy_frame(1280, 720)).shape == (180, 320, 3)
+        small = dummy_frame(200, 100)
+        assert main.reduce_frame(small) is small
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
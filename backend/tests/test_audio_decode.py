@@ -0,0 +1,189 @@
+"""
+Unit tests for the SER audio decoding layer.
+Compressed-format tests need ffmpeg (FFMPEG_BINARY or PATH) and are
+skipped without it.
+"""
+import pytest
+import numpy as np
+import subprocess
+import io
+import sys
+import os
+
+import soundfile as sf
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.audio_decode import AudioDecodeError, StreamingDecoder, decode_audio, find_ffmpeg
+
+
+def make_tone(sample_rate=48000, seconds=1.0, freq=440.0):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def wav_bytes(X, sample_rate):
+    buffer = io.BytesIO()
+    sf.write(buffer, X, sample_rate, format="WAV")
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def ffmpeg():
+    binary = find_ffmpeg()
+    if binary is None:
+        pytest.skip("ffmpeg not available")
+    return binary
+
+
+def encode(ffmpeg, wav, args):
+    """Encode WAV bytes with ffmpeg (e.g. to webm/opus)."""
+    result = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", *args, "pipe:1"],
+        input=wav, stdout=subprocess.PIPE, check=True,
+    )
+    return result.stdout
+
+
+class TestDecodeAudio:
+    """Whole-buffer decoding."""
+
+    def test_wav_native_rate(self):
+        X = make_tone(22050)
+        decoded, sample_rate = decode_audio(wav_bytes(X, 22050))
+        assert sample_rate == 22050
+        np.testing.assert_allclose(decoded, X, atol=1e-4)
+
+    def test_wav_resampled(self):
+        decoded, sample_rate = decode_audio(wav_bytes(make_tone(16000), 16000), sample_rate=48000)
+        assert sample_rate == 48000
+        assert decoded.dtype == np.float32
+        assert abs(len(decoded) - 48000) < 10
+
+    def test_stereo_downmixed(self):
+        X = make_tone(16000)
+        decoded, _ = decode_audio(wav_bytes(np.stack([X, X], axis=1), 16000))
+        assert decoded.ndim == 1
+
+    def test_file_like_input(self):
+        decoded, _ = decode_audio(io.BytesIO(wav_bytes(make_tone(16000), 16000)))
+        assert len(decoded) == 16000
+
+    def test_empty_buffer(self):
+        with pytest.raises(AudioDecodeError):
+            decode_audio(b"")
+
+    def test_webm_opus(self, ffmpeg):
+        webm = encode(ffmpeg, wav_bytes(make_tone(48000), 48000),
+                      ["-c:a", "libopus", "-b:a", "32k", "-f", "webm"])
+        decoded, sample_rate = decode_audio(webm, sample_rate=16000)
+        assert sample_rate == 16000
+        assert abs(len(decoded) - 16000) < 1600
+        # Tone survives the codec
+        assert 0.15 < np.sqrt(np.mean(decoded ** 2)) < 0.3
+
+    def test_garbage_rejected(self, ffmpeg):
+        with pytest.raises(AudioDecodeError):
+            decode_audio(b"\x00\x01garbage" * 100)
+
+
+class TestStreamingDecoder:
+    """Incremental decoding while the upload arrives."""
+
+    def test_chunked_feed_matches_whole_decode(self, ffmpeg):
+        webm = encode(ffmpeg, wav_bytes(make_tone(48000, seconds=2.0), 48000),
+                      ["-c:a", "libopus", "-f", "webm"])
+        decoder = StreamingDecoder(16000, ffmpeg=ffmpeg)
+        for start in range(0, len(webm), 997):
+            decoder.feed(webm[start:start + 997])
+        streamed, sample_rate = decoder.finish()
+
+        whole, _ = decode_audio(webm, sample_rate=16000)
+        assert sample_rate == 16000
+        np.testing.assert_allclose(streamed, whole, atol=1e-6)
+
+    def test_size_limit(self, ffmpeg):
+        decoder = StreamingDecoder(16000, ffmpeg=ffmpeg, max_input_bytes=1000)
+        with pytest.raises(AudioDecodeError):
+            decoder.feed(b"\x00" * 2000)
+
+    def test_invalid_stream(self, ffmpeg):
+        decoder = StreamingDecoder(16000, ffmpeg=ffmpeg)
+        decoder.feed(b"not audio at all" * 50)
+        with pytest.raises(AudioDecodeError):
+            decoder.finish()
+
+
+    def test_abort_stops_ffmpeg(self, ffmpeg):
+        decoder = StreamingDecoder(16000, ffmpeg=ffmpeg)
+        decoder.feed(b"\x1a\x45\xdf\xa3")
+        decoder.abort()
+        assert decoder._proc.poll() is not None
+        assert not decoder._stdout_thread.is_alive() and not decoder._stderr_thread.is_alive()
+
+
+class SpyDecoder:
+    """Stands in for StreamingDecoder to check the endpoint cleans up after itself."""
+
+    instances = []
+
+    def __init__(self, sample_rate, max_input_bytes=None):
+        self.aborted = self.finished = False
+        SpyDecoder.instances.append(self)
+
+    def feed(self, chunk):
+        pass
+
+    def finish(self):
+        self.finished = True
+        return np.zeros(16000, np.float32), 16000
+
+    def abort(self):
+        self.aborted = True
+
+
+class TestStreamEndpointCleanup:
+    """/predict-emotion/stream must not leave a decoder (ffmpeg) running."""
+
+    @pytest.fixture
+    def spy(self, monkeypatch):
+        import games.audio_decode
+        SpyDecoder.instances = []
+        monkeypatch.setattr(games.audio_decode, "StreamingDecoder", SpyDecoder)
+        return SpyDecoder
+
+    def _call(self, messages):
+        import asyncio
+        from starlette.requests import Request
+        import main
+
+        queue = list(messages)
+
+        async def receive():
+            return queue.pop(0)
+
+        scope = {"type": "http", "method": "POST", "path": "/predict-emotion/stream", "headers": [],
+                 "query_string": b""}
+        return asyncio.run(main.predict_speech_emotion_stream(Request(scope, receive)))
+
+    def test_client_disconnect(self, spy):
+        from starlette.requests import ClientDisconnect
+        with pytest.raises(ClientDisconnect):
+            self._call([{"type": "http.request", "body": b"abc", "more_body": True},
+                        {"type": "http.disconnect"}])
+        assert spy.instances[0].aborted
+
+    def test_empty_body(self, spy):
+        from fastapi import HTTPException
+        with pytest.raises(HTTPException) as error:
+            self._call([{"type": "http.request", "body": b"", "more_body": False}])
+        assert error.value.status_code == 400 and spy.instances[0].aborted
+
+    def test_finished_decoder_is_not_aborted(self, spy):
+        self._call([{"type": "http.request", "body": b"abc", "more_body": False}])
+        assert spy.instances[0].finished and not spy.instances[0].aborted
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,125 @@
+"""
+Tests for the latency-aware model tuner (hysteresis, graph caching,
+upgrade backoff) and its use in HandGestureStream.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.autotune import ModelTuner, HAND_LEVELS
+
+
+class FakeModel:
+    def __init__(self, **config):
+        self.config = config
+
+    def process(self, image):
+        return image
+
+
+def _tuner(**kwargs):
+    built = []
+
+    def factory(**config):
+        built.append(config)
+        return FakeModel(**config)
+
+    options = dict(budget_ms=20, patience_down=3, patience_up=5, settle=0)
+    options.update(kwargs)
+    return ModelTuner(HAND_LEVELS, factory, **options), built
+
+
+def _feed(tuner, ms, frames):
+    for _ in range(frames):
+        tuner.observe(ms / 1000)
+
+
+class TestModelTuner:
+    def test_steps_down_when_over_budget(self):
+        tuner, _ = _tuner()
+        _feed(tuner, 40, 3)
+        assert tuner.level == 1
+        assert tuner.config["model_complexity"] == 0 and tuner.config["max_num_hands"] == 2
+        _feed(tuner, 40, 10)
+        assert tuner.level == 1  # lightest level, still tracking both hands
+        assert all(level["max_num_hands"] == 2 for level in HAND_LEVELS)
+
+    def test_hysteresis_band_holds(self):
+        tuner, _ = _tuner()
+        _feed(tuner, 40, 3)
+        # Between low water (12 ms) and budget (20 ms): no change either way
+        _feed(tuner, 15, 100)
+        assert tuner.level == 1
+
+    def test_steps_up_when_well_under_budget(self):
+        tuner, _ = _tuner()
+        _feed(tuner, 40, 3)
+        _feed(tuner, 5, 20)
+        assert tuner.level == 0
+
+    def test_single_spike_does_not_switch(self):
+        tuner, _ = _tuner()
+        _feed(tuner, 5, 10)
+        _feed(tuner, 100, 1)
+        _feed(tuner, 5, 10)
+        assert tuner.level == 0 and tuner.switches == 0
+
+    def test_graphs_are_cached(self):
+        tuner, built = _tuner()
+        tuner.model
+        _feed(tuner, 40, 3)
+        tuner.model
+        _feed(tuner, 5, 20)
+        assert tuner.process("frame") == "frame"
+        assert [b["model_complexity"] for b in built] == [1, 0]
+        assert tuner.model.config == HAND_LEVELS[0]
+
+    def test_failed_upgrade_backs_off(self):
+        tuner, _ = _tuner()
+        _feed(tuner, 40, 3)   # -> level 1
+        _feed(tuner, 5, 5)    # -> level 0
+        _feed(tuner, 40, 3)   # upgrade failed -> level 1, patience doubled
+        assert tuner.level == 1 and tuner.patience_up == 10
+        _feed(tuner, 5, 9)
+        assert tuner.level == 1
+        _feed(tuner, 5, 1)
+        assert tuner.level == 0
+
+    def test_settle_frames_ignored(self):
+        tuner, _ = _tuner(settle=2)
+        _feed(tuner, 40, 3)   # 2 settle frames + 1 counted
+        assert tuner.level == 0
+        _feed(tuner, 40, 2)
+        assert tuner.level == 1
+
+    def test_use_selects_a_configuration(self):
+        tuner, built = _tuner(enabled=False)
+        tuner.use(HAND_LEVELS[1])
+        assert tuner.level == 1 and tuner.model.config == HAND_LEVELS[1]
+        # Not on the ladder (e.g. recorded by an older version): added
+        tuner.use({"model_complexity": 0, "max_num_hands": 1})
+        assert tuner.level == 2 and tuner.model.config == {"model_complexity": 0, "max_num_hands": 1}
+
+    def test_disabled_pins_heaviest(self):
+        tuner, _ = _tuner(enabled=False)
+        _feed(tuner, 100, 50)
+        assert tuner.level == 0 and tuner.config["auto"] is False
+
+
+class TestHandGestureStream:
+    def test_status_reports_tracker_config(self):
+        pytest.importorskip("mediapipe")
+        import numpy as np
+        from games.streaming import HandGestureStream, get_stream_status
+        stream = HandGestureStream()
+        stream.process_frame(np.zeros((120, 160, 3), np.uint8))
+        tracker = get_stream_status("gesture")["tracker"]
+        assert tracker["model_complexity"] == 1 and tracker["max_num_hands"] == 2
+        assert "budget_ms" in tracker
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
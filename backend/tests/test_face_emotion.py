@@ -0,0 +1,181 @@
+"""
+Tests for the DeepFace emotion path: per-session face box reuse, crop
+preprocessing, batched prediction and /predict-face-emotion.
+
+The engine tests use a small NumPy model with DeepFace's input/output
+shapes; the DeepFace model itself is tested only where it's installed.
+"""
+import pytest
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from games.batching import MicroBatcher
+from games.face_emotion import (
+    EMOTIONS, FaceBoxCache, FaceDetector, FaceEmotionEngine, deepface_available, preprocess, widen
+)
+
+
+class BrightnessModel:
+    """(N, 48, 48, 1) -> (N, 7): "happy" for bright crops, "sad" for dark ones; counts calls."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch, verbose=0):
+        assert batch.shape[1:] == (48, 48, 1) and batch.dtype == np.float32
+        self.batch_sizes.append(len(batch))
+        probabilities = np.full((len(batch), len(EMOTIONS)), 0.01)
+        bright = batch.mean(axis=(1, 2, 3)) > 0.5
+        probabilities[bright, EMOTIONS.index("happy")] = 0.94
+        probabilities[~bright, EMOTIONS.index("sad")] = 0.94
+        return probabilities
+
+
+class FixedDetector:
+    def __init__(self, box=(40, 30, 80, 80)):
+        self.box = box
+        self.calls = 0
+
+    def detect(self, gray):
+        self.calls += 1
+        return self.box
+
+
+def frame(value=200, width=160, height=120):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+class TestFaceBoxCache:
+    def test_keyframe_interval(self):
+        cache = FaceBoxCache(keyframe_interval=3)
+        assert cache.reusable("s") is None
+        cache.update("s", (1, 2, 3, 4))
+        assert cache.reusable("s") == (1, 2, 3, 4)
+        assert cache.reusable("s") == (1, 2, 3, 4)
+        # Third frame after the keyframe: detect again
+        assert cache.reusable("s") is None
+
+    def test_no_session_or_lost_face_detects(self):
+        cache = FaceBoxCache(keyframe_interval=5)
+        cache.update(None, (1, 2, 3, 4))
+        assert cache.reusable(None) is None and len(cache) == 0
+        cache.update("s", (1, 2, 3, 4))
+        cache.update("s", None)
+        assert cache.reusable("s") is None
+
+    def test_lru_and_idle(self):
+        cache = FaceBoxCache(keyframe_interval=5, max_sessions=2, idle_seconds=0)
+        for session in ("a", "b", "c"):
+            cache.update(session, (0, 0, 1, 1))
+        assert len(cache) == 2
+        assert cache.reusable("c") is None  # idle_seconds=0 expires immediately
+
+
+class TestEngine:
+    def test_detects_on_keyframes_only(self):
+        detector = FixedDetector()
+        engine = FaceEmotionEngine(BrightnessModel(), detector, FaceBoxCache(keyframe_interval=4))
+        keyframes = [engine.locate(frame(), "s")["keyframe"] for _ in range(8)]
+        assert keyframes == [True, False, False, False] * 2
+        assert detector.calls == 2 and engine.stats()["reused_boxes"] == 6
+
+    def test_reused_box_is_widened_and_clipped(self):
+        engine = FaceEmotionEngine(BrightnessModel(), FixedDetector((100, 60, 60, 60)), FaceBoxCache(3))
+        assert engine.locate(frame(), "s")["box"] == (100, 60, 60, 60)
+        assert engine.locate(frame(), "s")["box"] == widen((100, 60, 60, 60), 160, 120) == (94, 54, 66, 66)
+
+    def test_changed_region_forces_keyframe(self):
+        detector = FixedDetector()
+        engine = FaceEmotionEngine(BrightnessModel(), detector, FaceBoxCache(keyframe_interval=5))
+        assert engine.locate(frame(200), "s")["keyframe"]
+        # Same content, darker: still the same face
+        assert not engine.locate(frame(60), "s")["keyframe"]
+        # Something else in the box (the face moved away)
+        changed = frame(200)
+        changed[30:70, 40:120] = 0
+        assert engine.locate(changed, "s")["keyframe"]
+        assert detector.calls == 2 and engine.stats()["stale_boxes"] == 1
+        # A smaller frame can't hold the old box: detect
+        assert engine.locate(frame(200, 100, 80), "s")["keyframe"]
+
+    def test_no_face(self):
+        engine = FaceEmotionEngine(BrightnessModel(), FixedDetector(None))
+        assert engine.predict(frame(), "s") == {"face_detected": False}
+        assert len(engine.boxes) == 0
+
+    def test_predict(self):
+        engine = FaceEmotionEngine(BrightnessModel(), FixedDetector())
+        result = engine.predict(frame(230))
+        assert result["face_detected"] and result["emotion"] == "happy"
+        assert set(result["scores"]) == set(EMOTIONS) and result["scores"]["happy"] == 94.0
+        assert engine.predict(frame(20))["emotion"] == "sad"
+
+    def test_preprocess_matches_deepface_input(self):
+        gray = np.tile(np.arange(160, dtype=np.uint8), (120, 1))
+        crop = preprocess(gray, (10, 10, 96, 96))
+        assert crop.shape == (48, 48, 1) and crop.dtype == np.float32
+        assert 0.0 <= crop.min() and crop.max() <= 1.0
+
+    def test_haar_detector_on_noise(self):
+        noise = np.random.default_rng(0).integers(0, 255, (480, 640), dtype=np.uint8)
+        assert FaceDetector().detect(noise) is None
+
+
+class TestBatching:
+    def test_concurrent_crops_share_a_model_call(self):
+        model = BrightnessModel()
+        engine = FaceEmotionEngine(model, FixedDetector())
+        batcher = MicroBatcher(engine.predict_batch, max_batch_size=16, max_wait_ms=50)
+        crops = [engine.locate(frame(value))["crop"] for value in (230, 20, 230, 20, 230)]
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(crop) for crop in crops))
+
+        results = asyncio.run(run())
+        assert [r["emotion"] for r in results] == ["happy", "sad", "happy", "sad", "happy"]
+        assert model.batch_sizes == [5]
+
+
+class TestEndpoint:
+    def test_predict_face_emotion(self):
+        from fastapi.testclient import TestClient
+        import main
+        client = TestClient(main.app)
+        image = cv2.imencode(".jpg", frame())[1].tobytes()
+        response = client.post("/predict-face-emotion", files={"image": ("face.jpg", image, "image/jpeg")})
+        if not deepface_available():
+            assert response.status_code == 503
+            return
+        # A flat frame has no face, so this doesn't reach the model
+        assert response.json() == {"status": "success", "face_detected": False}
+
+    def test_undecodable_image(self):
+        from fastapi.testclient import TestClient
+        import main
+        client = TestClient(main.app)
+        for image in (b"", b"not an image"):
+            response = client.post("/predict-face-emotion", files={"image": ("face.jpg", image, "image/jpeg")})
+            if not deepface_available():
+                assert response.status_code == 503
+                return
+            assert response.status_code == 200 and response.json()["status"] == "error"
+
+
+@pytest.mark.skipif(not deepface_available(), reason="deepface not installed")
+class TestDeepFaceModel:
+    def test_model_batch(self):
+        engine = FaceEmotionEngine()
+        results = engine.predict_batch([np.zeros((48, 48, 1), np.float32)] * 3)
+        assert len(results) == 3 and results[0]["emotion"] in EMOTIONS
+        assert sum(results[0]["scores"].values()) == pytest.approx(100, abs=0.1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+"""
+Tests for the vision processor benchmark harness.
+The full regression check against the stored baseline only runs with
+RUN_BENCHMARKS=1 (timings are machine-specific).
+"""
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.frame_bench import (
+    PROCESSORS, BASELINE_PATH, DEFAULT_THRESHOLD, synthetic_frames, figure_frames, endpoint_path, measure,
+    run_benchmarks, compare, load_baseline, save_baseline
+)
+
+RUN_BENCHMARKS = os.environ.get("RUN_BENCHMARKS") == "1"
+
+
+class TestHarness:
+    def test_synthetic_frames(self):
+        frames = synthetic_frames(64, 48, 4)
+        assert len(frames) == 4
+        assert frames[0].shape == (48, 64, 3) and frames[0].dtype == np.uint8
+        assert not np.array_equal(frames[0], frames[-1])
+
+    def test_figure_frames_are_tracked(self):
+        pytest.importorskip("mediapipe")
+        from games.video_batch import processor_runner
+        run = processor_runner("pose", {"engine": "pose"})
+        assert all(run(frame)[2] for frame in figure_frames(320, 240, 3))
+
+    def test_endpoint_path_returns_data_url(self):
+        import cv2
+        frame = synthetic_frames(64, 48, 1)[0]
+        data = cv2.imencode(".jpg", frame)[1].tobytes()
+        assert b'"image": "data:image/jpeg;base64,' in endpoint_path(lambda img: img, data)
+
+    def test_measure_reports_all_fields(self):
+        frames = synthetic_frames(32, 24, 5)
+        result = measure(lambda f: f.sum(), frames, warmup=1, rounds=2)
+        assert set(result) == {"fps", "p50_ms", "p99_ms", "cpu_ms", "peak_mb", "frames"}
+        assert result["fps"] > 0 and result["p99_ms"] >= result["p50_ms"]
+
+    def test_processor_smoke(self):
+        results = run_benchmarks(["emotion"], resolutions=((160, 120),), frames=3, warmup=1, rounds=1)
+        assert results["emotion@160x120"]["frames"] == 3
+        assert "emotion/endpoint@160x120" in results
+        assert results["emotion+figure@160x120"]["frames"] == 3
+        assert "emotion+figure/endpoint@160x120" in results
+
+    def test_baseline_covers_the_figure_scene(self):
+        # Synthetic shapes never trigger detection; the figure scene must be gated too
+        keys = load_baseline()["results"]
+        assert any(key.startswith("pose+figure@") for key in keys)
+        assert any(key.startswith("gesture+figure@") for key in keys)
+
+
+class TestRegressionCheck:
+    BASE = {"results": {"pose@640x480": {"fps": 50.0, "p50_ms": 20.0, "p99_ms": 30.0, "peak_mb": 2.0}}}
+
+    def test_within_threshold(self):
+        current = {"pose@640x480": {"fps": 45.0, "p50_ms": 22.0, "p99_ms": 80.0, "peak_mb": 2.1}}
+        assert compare(current, self.BASE, threshold=0.2) == []
+
+    def test_detects_regressions(self):
+        current = {"pose@640x480": {"fps": 30.0, "p50_ms": 33.0, "p99_ms": 40.0, "peak_mb": 9.0}}
+        failures = compare(current, self.BASE, threshold=0.2)
+        assert len(failures) == 3
+
+    def test_skipped_and_missing_entries_ignored(self):
+        assert compare({"pose@640x480": {"skipped": "no dlib"}}, self.BASE) == []
+        assert compare({}, self.BASE) == []
+
+    def test_baseline_roundtrip(self, tmp_path):
+        path = str(tmp_path / "baseline.json")
+        save_baseline({"a@1x1": {"fps": 1.0, "p50_ms": 1.0, "p99_ms": 1.0, "peak_mb": 0.1},
+                       "gaze": {"skipped": "no dlib"}}, path)
+        assert list(load_baseline(path)["results"]) == ["a@1x1"]
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="set RUN_BENCHMARKS=1 to run the benchmark suite")
+def test_no_regression_against_baseline():
+    baseline = load_baseline(BASELINE_PATH)
+    results = run_benchmarks(list(PROCESSORS), frames=baseline.get("frames", 60))
+    failures = compare(results, baseline, DEFAULT_THRESHOLD)
+    assert not failures, "\n".join(failures)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
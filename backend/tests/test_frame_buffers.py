@@ -0,0 +1,118 @@
+"""
+Tests for the per-session frame buffer arenas and the copy-free image
+response body.
+"""
+import pytest
+import base64
+import json
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+from games.frame_buffers import (
+    ArenaPool, FrameArena, current_arena, encode_jpeg, json_image_body, session_arena, to_rgb, use_arena
+)
+from games.warmup import dummy_frame
+
+
+class TestFrameArena:
+    def test_buffers_are_reused(self):
+        arena = FrameArena()
+        frame = dummy_frame(64, 48)
+        first = arena.to_rgb(frame)
+        second = arena.to_rgb(frame)
+        assert np.shares_memory(first, second)
+        assert arena.allocations == 1
+        assert np.array_equal(first, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def test_rgb_view_is_read_only(self):
+        rgb = FrameArena().to_rgb(dummy_frame(64, 48))
+        with pytest.raises(ValueError):
+            rgb[0, 0, 0] = 1
+
+    def test_shape_change_reallocates(self):
+        arena = FrameArena()
+        arena.mirror(dummy_frame(64, 48))
+        mirrored = arena.mirror(dummy_frame(32, 24))
+        assert mirrored.shape == (24, 32, 3) and arena.allocations == 2
+
+    def test_resize_and_mirror_match_cv2(self):
+        arena = FrameArena()
+        frame = dummy_frame(64, 48)
+        assert np.array_equal(arena.mirror(frame), cv2.flip(frame, 1))
+        assert np.array_equal(arena.resize(frame, 32, 24),
+                              cv2.resize(frame, (32, 24), interpolation=cv2.INTER_AREA))
+
+
+class TestSessions:
+    def test_to_rgb_without_arena_allocates(self):
+        frame = dummy_frame(64, 48)
+        assert current_arena() is None
+        assert to_rgb(frame).flags.writeable
+
+    def test_session_arena_is_per_session(self):
+        pool = ArenaPool()
+        with session_arena("a", pool) as a:
+            assert current_arena() is a
+        with session_arena("a", pool) as again, session_arena("b", pool) as b:
+            assert again is a and b is not a
+        assert current_arena() is None
+
+    def test_busy_arena_gets_throwaway(self):
+        pool = ArenaPool()
+        with session_arena("a", pool) as outer:
+            with session_arena("a", pool) as inner:
+                assert inner is not outer
+                assert current_arena() is inner
+            assert current_arena() is outer
+
+    def test_pool_is_bounded(self):
+        pool = ArenaPool(max_sessions=2)
+        for session in ("a", "b", "c"):
+            pool.get(session)
+        assert len(pool) == 2
+
+    def test_use_arena(self):
+        arena = FrameArena()
+        with use_arena(arena):
+            to_rgb(dummy_frame(64, 48))
+        assert arena.allocations == 1
+
+
+class TestImageBody:
+    def test_json_image_body(self):
+        jpeg = encode_jpeg(dummy_frame(64, 48))
+        doc = json.loads(json_image_body({"status": "ok", "message": "🙌 hands"}, jpeg))
+        assert doc["status"] == "ok" and doc["message"] == "🙌 hands"
+        prefix = "data:image/jpeg;base64,"
+        assert doc["image"].startswith(prefix)
+        assert base64.b64decode(doc["image"][len(prefix):]) == jpeg.tobytes()
+
+    def test_empty_fields(self):
+        doc = json.loads(json_image_body({}, encode_jpeg(dummy_frame(16, 16))))
+        assert list(doc) == ["image"]
+
+
+class TestProcessFrame:
+    def test_pose_with_extras_and_session(self):
+        pytest.importorskip("mediapipe")
+        from fastapi.testclient import TestClient
+        import main
+        frame = cv2.imencode(".jpg", dummy_frame(320, 240))[1].tobytes()
+        client = TestClient(main.app)
+        for _ in range(2):
+            response = client.post("/process-frame", data={"type": "pose", "extras": "hands,face"},
+                                   files={"frame": ("f.jpg", frame, "image/jpeg")},
+                                   headers={"X-Session-Id": "test-session"})
+            assert response.status_code == 200
+            body = response.json()
+            assert body["status"] != "error" and body["image"].startswith("data:image/jpeg;base64,")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
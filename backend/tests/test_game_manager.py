@@ -0,0 +1,80 @@
+"""
+Tests for the supervised game process manager.
+"""
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.game_manager import GameManager, GameNotFound
+
+
+@pytest.fixture
+def manager(tmp_path):
+    (tmp_path / "sleeper.py").write_text("import time\nif __name__ == '__main__':\n    time.sleep(60)\n")
+    (tmp_path / "quick.py").write_text("import sys\nif __name__ == '__main__':\n    sys.exit(3)\n")
+    manager = GameManager(games={"sleeper": ("sleeper.py", "Sleeper"), "quick": ("quick.py", "Quick")},
+                          preload=("numpy",), games_dir=str(tmp_path))
+    yield manager
+    manager.shutdown(timeout=1)
+
+
+class TestGameManager:
+    def test_one_instance_per_game(self, manager):
+        first = manager.launch("sleeper")
+        assert first["running"] and not first["already_running"] and first["pid"]
+        second = manager.launch("sleeper")
+        assert second["already_running"] and second["pid"] == first["pid"]
+
+    def test_status_and_stop(self, manager):
+        pid = manager.launch("sleeper")["pid"]
+        status = manager.status()
+        assert status["games"]["sleeper"]["pid"] == pid
+        assert not status["games"]["quick"]["running"]
+
+        stopped = manager.stop("sleeper", timeout=2)
+        assert not stopped["running"] and stopped["pid"] == pid and stopped["exitcode"] != 0
+        # Can be started again after stopping
+        assert manager.launch("sleeper")["pid"] != pid
+
+    def test_exit_is_reaped(self, manager):
+        manager.launch("quick")
+        deadline = time.time() + 30
+        while manager.status("quick")["running"] and time.time() < deadline:
+            time.sleep(0.05)
+        status = manager.status("quick")
+        assert not status["running"] and status["exitcode"] == 3
+
+    def test_shutdown_stops_all(self, manager):
+        manager.launch("sleeper")
+        manager.shutdown(timeout=2)
+        assert not manager.status("sleeper")["running"]
+
+    def test_unknown_game(self, manager):
+        with pytest.raises(GameNotFound):
+            manager.launch("chess")
+        with pytest.raises(GameNotFound):
+            manager.stop("chess")
+
+
+class TestGameEndpoints:
+    def test_launch_status_stop(self, manager, monkeypatch):
+        from fastapi.testclient import TestClient
+        import main
+        monkeypatch.setattr(main, "game_manager", manager)
+        manager.games["gesture"] = manager.games["sleeper"]
+        client = TestClient(main.app)
+
+        launched = client.post("/games/gesture").json()
+        assert launched["status"] == "success" and launched["pid"]
+        assert "already running" in client.post("/games/gesture").json()["message"]
+        assert client.get("/games/status").json()["games"]["gesture"]["running"]
+        assert not client.post("/games/gesture/stop").json()["running"]
+        assert client.post("/games/chess/stop").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
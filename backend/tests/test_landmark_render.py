@@ -0,0 +1,87 @@
+"""
+Tests for the vectorized landmark renderer: output must match mediapipe's
+drawing_utils.draw_landmarks for the topologies the streams use.
+"""
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
+
+from games.landmark_render import LandmarkRenderer, landmark_array, to_pixels
+
+draw = mp.solutions.drawing_utils
+styles = mp.solutions.drawing_styles
+
+
+def _landmarks(n, low=0.05, high=0.95, visibility=False, seed=0):
+    rng = np.random.default_rng(seed)
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y in rng.uniform(low, high, (n, 2)):
+        point = landmark_list.landmark.add()
+        point.x, point.y = x, y
+        if visibility:
+            point.visibility = rng.uniform(0.2, 1.0)
+    return landmark_list
+
+
+def _render_both(connections, connection_spec, landmark_spec, landmark_list):
+    expected = np.full((240, 320, 3), 60, dtype=np.uint8)
+    actual = expected.copy()
+    draw.draw_landmarks(expected, landmark_list, connections, landmark_spec, connection_spec)
+    LandmarkRenderer(connections, connection_spec, landmark_spec).draw(actual, landmark_list)
+    return expected, actual
+
+
+class TestCoordinates:
+    def test_visibility_and_bounds_mask(self):
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        for x, y, v in ((0.5, 0.5, 0.9), (0.5, 0.5, 0.1), (1.2, 0.5, 0.9), (0.0, 1.0, 0.9)):
+            point = landmark_list.landmark.add()
+            point.x, point.y, point.visibility = x, y, v
+        _, mask = landmark_array(landmark_list)
+        assert mask.tolist() == [True, False, False, True]
+
+    def test_pixels_are_clamped(self):
+        px = to_pixels(np.array([[0.0, 1.0], [0.5, 0.25]]), 320, 240)
+        assert px.tolist() == [[0, 239], [160, 60]]
+
+
+class TestEquivalence:
+    def test_pose(self):
+        spec = draw.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
+        expected, actual = _render_both(mp.solutions.pose.POSE_CONNECTIONS, spec, spec,
+                                        _landmarks(33, visibility=True))
+        assert np.array_equal(expected, actual)
+
+    def test_face_mesh_tesselation(self):
+        expected, actual = _render_both(mp.solutions.face_mesh.FACEMESH_TESSELATION,
+                                        styles.get_default_face_mesh_tesselation_style(), None,
+                                        _landmarks(468, 0.35, 0.65))
+        assert np.array_equal(expected, actual)
+
+    def test_hand_default_styles(self):
+        # Per-finger styles; points of different styles may overlap in another order
+        expected, actual = _render_both(mp.solutions.hands.HAND_CONNECTIONS,
+                                        styles.get_default_hand_connections_style(),
+                                        styles.get_default_hand_landmarks_style(), _landmarks(21))
+        assert np.any(expected != actual, axis=2).mean() < 0.005
+
+    def test_out_of_range_connection(self):
+        renderer = LandmarkRenderer({(0, 40)}, draw.DrawingSpec())
+        with pytest.raises(ValueError):
+            renderer.draw(np.zeros((10, 10, 3), np.uint8), _landmarks(21))
+
+    def test_empty_list_is_noop(self):
+        image = np.zeros((10, 10, 3), np.uint8)
+        LandmarkRenderer(mp.solutions.hands.HAND_CONNECTIONS).draw(image, None)
+        assert not image.any()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
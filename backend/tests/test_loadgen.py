@@ -0,0 +1,109 @@
+"""
+Tests for the load generator (in-process ASGI target, no network).
+"""
+import pytest
+import asyncio
+import json
+import sys
+import os
+
+import httpx
+from fastapi import FastAPI, UploadFile, File, Form
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.loadgen import (
+    Recorder, StandInRecognizer, _assign_kinds, find_saturation, load_trace, replay, run_step,
+    synthetic_jpeg, synthetic_wav
+)
+
+
+@pytest.fixture
+def transport():
+    app = FastAPI()
+
+    @app.post("/process-frame")
+    async def process_frame(frame: UploadFile = File(...), type: str = Form("gesture")):
+        data = await frame.read()
+        if type == "broken":
+            return {"status": "error", "message": "Invalid frame"}
+        return {"status": "waiting", "bytes": len(data)}
+
+    @app.post("/predict-emotion")
+    async def predict(audio: UploadFile = File(...)):
+        await audio.read()
+        return {"status": "success", "emotion": "calm"}
+
+    return httpx.ASGITransport(app=app)
+
+
+def step(users, throughput, error_rate=0.0, p99=50.0, fps=2.5):
+    return {"users": users, "throughput": throughput, "error_rate": error_rate,
+            "p99_ms": p99, "achieved_fps": fps, "target_fps": 2.5}
+
+
+class TestHelpers:
+    def test_payloads(self):
+        assert synthetic_jpeg(64, 48)[:2] == b"\xff\xd8"
+        assert synthetic_wav(0.1)[:4] == b"RIFF"
+
+    def test_assign_kinds_by_weight(self):
+        kinds = _assign_kinds({"gesture": 3, "predict-emotion": 1}, 8)
+        assert kinds.count("gesture") == 6 and kinds.count("predict-emotion") == 2
+        assert len(_assign_kinds({"gesture": 1, "pose": 1}, 3)) == 3
+
+    def test_stand_in_recognizer(self):
+        assert StandInRecognizer(latency=0, text="hello")(None, language="en-US") == "hello"
+
+    def test_recorder_summary(self):
+        recorder = Recorder()
+        for i in range(10):
+            recorder.add("gesture", 0.0, 0.01 * (i + 1), i != 0, 200)
+        summary = recorder.summary(duration=2.0)
+        assert summary["throughput"] == 5.0
+        assert summary["error_rate"] == 0.1
+        assert summary["by_kind"]["gesture"]["errors"] == 1
+
+
+class TestSaturation:
+    def test_linear_scaling_not_saturated(self):
+        assert find_saturation([step(1, 2.5), step(2, 5.0), step(4, 10.0)]) == (None, None)
+
+    def test_flat_throughput(self):
+        index, reason = find_saturation([step(1, 2.5), step(2, 5.0), step(4, 5.1)])
+        assert index == 2 and "flat" in reason
+
+    def test_errors_and_fps(self):
+        assert find_saturation([step(1, 2.5), step(2, 5.0, error_rate=0.2)])[0] == 1
+        assert find_saturation([step(1, 2.5), step(2, 5.0, fps=1.0)])[0] == 1
+        assert find_saturation([step(1, 2.5, p99=900.0)], max_p99_ms=500)[0] == 0
+
+
+class TestTraffic:
+    def test_run_step(self, transport):
+        summary = asyncio.run(run_step("http://test", {"gesture": 1, "predict-emotion": 1}, users=2,
+                                       duration=0.5, fps=10, audio_interval=0.25, transport=transport))
+        assert summary["requests"] >= 6
+        assert summary["error_rate"] == 0.0
+        assert set(summary["by_kind"]) == {"gesture", "predict-emotion"}
+        assert summary["achieved_fps"] > 5
+
+    def test_replay_trace(self, transport, tmp_path):
+        (tmp_path / "f.jpg").write_bytes(synthetic_jpeg(32, 24))
+        events = [
+            {"t": 0.0, "path": "/process-frame", "form": {"type": "pose"}, "file": {"field": "frame", "path": "f.jpg"}},
+            {"t": 0.05, "path": "/process-frame", "form": {"type": "broken"}, "file": {"synthetic": "jpeg"}},
+            {"t": 0.1, "path": "/predict-emotion", "file": {"field": "audio", "synthetic": "wav"}},
+        ]
+        trace = tmp_path / "trace.jsonl"
+        trace.write_text("\n".join(json.dumps(e) for e in events))
+
+        summary = asyncio.run(replay("http://test", load_trace(str(trace)), speed=0, transport=transport))
+        assert summary["requests"] == 3
+        assert summary["by_kind"]["broken"]["errors"] == 1
+        assert summary["by_kind"]["pose"]["errors"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,141 @@
+"""
+Unit tests for the in-process metrics and Prometheus rendering.
+"""
+import pytest
+import time
+import sys
+import os
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.metrics import (
+    Counter, Gauge, Histogram, Registry, FpsMeter, MetricsMiddleware,
+    REQUESTS, REQUEST_ERRORS, REQUEST_LATENCY, mark_error
+)
+
+
+class TestPrimitives:
+    """Counters, gauges and histograms render valid exposition text."""
+
+    def test_counter(self):
+        counter = Counter("jobs_total", "Jobs.", ("kind",))
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        counter.inc("b")
+        lines = counter.render()
+        assert lines[:2] == ["# HELP jobs_total Jobs.", "# TYPE jobs_total counter"]
+        assert 'jobs_total{kind="a"} 3' in lines
+        assert 'jobs_total{kind="b"} 1' in lines
+
+    def test_label_escaping(self):
+        counter = Counter("x_total", "X.", ("path",))
+        counter.inc('a"b\\c')
+        assert 'x_total{path="a\\"b\\\\c"} 1' in counter.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = Histogram("lat_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            hist.observe(value, "decode")
+        lines = hist.render()
+        assert 'lat_seconds_bucket{stage="decode",le="0.1"} 1' in lines
+        assert 'lat_seconds_bucket{stage="decode",le="1"} 3' in lines
+        assert 'lat_seconds_bucket{stage="decode",le="+Inf"} 4' in lines
+        assert 'lat_seconds_count{stage="decode"} 4' in lines
+        assert hist.count("decode") == 4
+
+    def test_histogram_timer(self):
+        hist = Histogram("t_seconds", "T.", ("stage",))
+        with hist.time("encode"):
+            time.sleep(0.002)
+        assert hist.count("encode") == 1
+
+    def test_gauge_function(self):
+        gauge = Gauge("depth", "Depth.", ("pool",))
+        gauge.set(2, "static")
+        gauge.set_function(lambda: {("dynamic",): 7})
+        lines = gauge.render()
+        assert 'depth{pool="static"} 2' in lines
+        assert 'depth{pool="dynamic"} 7' in lines
+
+    def test_registry_render(self):
+        registry = Registry()
+        registry.register(Counter("a_total", "A.")).inc()
+        text = registry.render()
+        assert text.endswith("\n")
+        assert "a_total 1" in text
+
+    def test_observe_is_cheap(self):
+        hist = Histogram("cheap_seconds", "Cheap.", ("stage",))
+        start = time.perf_counter()
+        for _ in range(10000):
+            hist.observe(0.01, "inference")
+        per_call = (time.perf_counter() - start) / 10000
+        assert per_call < 50e-6
+
+
+class TestFpsMeter:
+    def test_fps_and_idle(self):
+        meter = FpsMeter(alpha=1.0, idle_after=0.2)
+        meter.tick("gesture")
+        time.sleep(0.02)
+        meter.tick("gesture")
+        fps = meter.values()[("gesture",)]
+        assert 10 < fps < 60
+        assert meter.active() == ["gesture"]
+
+        time.sleep(0.25)
+        assert meter.values()[("gesture",)] == 0.0
+        assert meter.active() == []
+
+
+class TestMiddleware:
+    """Per-route counts, errors and latency via the ASGI middleware."""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        def get_item(item_id: int):
+            return {"id": item_id}
+
+        @app.get("/soft-fail")
+        def soft_fail():
+            mark_error()
+            return {"status": "error"}
+
+        @app.get("/boom")
+        def boom():
+            raise HTTPException(status_code=500, detail="boom")
+
+        return TestClient(app)
+
+    def test_route_template_labels(self, client):
+        before = REQUESTS.value("/items/{item_id}", "GET", "200")
+        client.get("/items/1")
+        client.get("/items/2")
+        assert REQUESTS.value("/items/{item_id}", "GET", "200") == before + 2
+        assert REQUEST_LATENCY.count("/items/{item_id}", "GET") >= 2
+
+    def test_errors(self, client):
+        before_soft = REQUEST_ERRORS.value("/soft-fail", "GET")
+        before_500 = REQUEST_ERRORS.value("/boom", "GET")
+        client.get("/soft-fail")
+        client.get("/boom")
+        assert REQUEST_ERRORS.value("/soft-fail", "GET") == before_soft + 1
+        assert REQUEST_ERRORS.value("/boom", "GET") == before_500 + 1
+        assert REQUESTS.value("/boom", "GET", "500") >= 1
+
+    def test_unmatched_route(self, client):
+        before = REQUESTS.value("unmatched", "GET", "404")
+        client.get("/does-not-exist")
+        assert REQUESTS.value("unmatched", "GET", "404") == before + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
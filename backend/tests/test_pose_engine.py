@@ -0,0 +1,54 @@
+"""
+Tests for PoseStream engine selection (Pose-only vs Holistic) and
+on-demand hands / face tracking.
+"""
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.streaming import PoseStream, parse_pose_extras, get_stream_status
+
+
+def _frame():
+    return np.full((240, 320, 3), 80, dtype=np.uint8)
+
+
+class TestExtras:
+    def test_parse(self):
+        assert parse_pose_extras("hands, FACE") == ("hands", "face")
+        assert parse_pose_extras("face,bogus") == ("face",)
+        assert parse_pose_extras("") == ()
+        assert parse_pose_extras(None) == ()
+
+
+class TestPoseStream:
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            PoseStream(engine="bogus")
+
+    def test_pose_engine_processes_frame(self):
+        stream = PoseStream(engine="pose", model_complexity=1)
+        out = stream.process_frame(_frame())
+        assert out.shape == (240, 320, 3)
+        assert get_stream_status("pose")["pose"] == "None"
+        # Hands / face models are only built when asked for and a body is found
+        stream.process_frame(_frame(), extras=("hands", "face"))
+        assert stream._hands is None and stream._face_mesh is None
+
+    def test_extra_models_created_on_demand(self):
+        stream = PoseStream(engine="pose")
+        hands, face = stream._extra_models(("hands",))
+        assert hands is not None and face is None
+        assert stream._extra_models(("hands",))[0] is hands
+
+    def test_holistic_engine(self):
+        stream = PoseStream(engine="holistic")
+        assert stream.process_frame(_frame()).shape == (240, 320, 3)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,90 @@
+"""
+Unit tests for the opt-in request profiling middleware.
+"""
+import pytest
+import json
+import pstats
+import sys
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.profiling import ProfilingConfig, ProfilingMiddleware, annotate
+
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+
+def make_client(config):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, config=config)
+
+    @app.get("/work/{item}")
+    async def work(item: str, size: int = 1):
+        annotate(size=size)
+        return {"item": item, "value": busy_work()}
+
+    return TestClient(app)
+
+
+class TestProfilingMiddleware:
+    def test_disabled_writes_nothing(self, tmp_path):
+        client = make_client(ProfilingConfig(enabled=False, directory=str(tmp_path)))
+        response = client.get("/work/a", headers={"X-Profile": "1"})
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert os.listdir(tmp_path) == []
+
+    def test_unflagged_request_not_profiled(self, tmp_path):
+        client = make_client(ProfilingConfig(enabled=True, directory=str(tmp_path)))
+        assert "x-profile-id" not in client.get("/work/a").headers
+        assert os.listdir(tmp_path) == []
+
+    def test_header_writes_pstats_and_metadata(self, tmp_path):
+        client = make_client(ProfilingConfig(enabled=True, directory=str(tmp_path)))
+        response = client.get("/work/a?size=3", headers={"X-Profile": "1"})
+        profile_id = response.headers["x-profile-id"]
+
+        with open(tmp_path / f"{profile_id}.json") as f:
+            meta = json.load(f)
+        assert meta["route"] == "/work/{item}"
+        assert meta["path_params"] == {"item": "a"}
+        assert meta["query"] == {"size": "3"}
+        assert meta["params"] == {"size": 3}
+        assert meta["status"] == 200
+
+        stats = pstats.Stats(str(tmp_path / f"{profile_id}.prof"))
+        assert any(func[2] == "busy_work" for func in stats.stats)
+
+    def test_query_flag_sampling_profiler(self, tmp_path):
+        client = make_client(ProfilingConfig(enabled=True, directory=str(tmp_path), sample_interval=0.0005))
+        profile_id = client.get("/work/b?profile=sample").headers["x-profile-id"]
+
+        with open(tmp_path / f"{profile_id}.speedscope.json") as f:
+            doc = json.load(f)
+        profile = doc["profiles"][0]
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"])
+        for sample in profile["samples"]:
+            assert all(0 <= i < len(doc["shared"]["frames"]) for i in sample)
+
+    def test_sample_rate(self, tmp_path):
+        client = make_client(ProfilingConfig(sample_rate=1.0, directory=str(tmp_path)))
+        assert "x-profile-id" in client.get("/work/c").headers
+
+    def test_prunes_old_profiles(self, tmp_path):
+        client = make_client(ProfilingConfig(enabled=True, directory=str(tmp_path), max_profiles=2))
+        for _ in range(4):
+            client.get("/work/d", headers={"X-Profile": "cprofile"})
+        sidecars = [n for n in os.listdir(tmp_path) if n.endswith(".json")]
+        assert len(sidecars) == 2
+        assert len([n for n in os.listdir(tmp_path) if n.endswith(".prof")]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
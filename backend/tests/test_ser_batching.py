@@ -0,0 +1,187 @@
+"""
+Unit tests for batched Speech Emotion Recognition.
+Covers SpeechEmotionRecognizer.predict_batch, predict_timeline and the async MicroBatcher.
+"""
+import pytest
+import numpy as np
+import asyncio
+import io
+import sys
+import os
+
+import soundfile as sf
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.batching import MicroBatcher
+from games.ser_pipeline import SpeechEmotionRecognizer
+
+
+def make_wav(freq, sample_rate=16000, seconds=1.0):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    X = (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, X, sample_rate, format="WAV")
+    return buffer.getvalue()
+
+
+class CountingModel:
+    """Wraps a model and counts predict / predict_proba calls."""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.proba_calls = 0
+        self.predict_calls = 0
+
+    def predict_proba(self, X):
+        self.proba_calls += 1
+        return self.model.predict_proba(X)
+
+    def predict(self, X):
+        self.predict_calls += 1
+        return self.model.predict(X)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    recognizer = SpeechEmotionRecognizer()
+    if recognizer.model is None:
+        pytest.skip("SER model not available")
+    return recognizer
+
+
+class TestPredictBatch:
+    """predict_batch should classify all clips with one model call."""
+
+    def test_single_proba_call(self, engine):
+        counting = CountingModel(engine.model)
+        engine.model, original = counting, engine.model
+        try:
+            clips = [make_wav(f) for f in (180, 220, 440, 880)]
+            results = engine.predict_batch(clips)
+        finally:
+            engine.model = original
+
+        assert len(results) == 4
+        assert counting.proba_calls == 1
+        assert counting.predict_calls == 0
+        for result in results:
+            assert result["status"] == "success"
+            assert result["emotion"] in result["probabilities"]
+            assert result["confidence"] == max(result["probabilities"].values())
+
+    def test_matches_single_predict(self, engine):
+        clips = [make_wav(f) for f in (200, 500)]
+        batched = engine.predict_batch(clips)
+        for clip, result in zip(clips, batched):
+            single = engine.predict(clip)
+            assert single["emotion"] == result["emotion"]
+            assert single["confidence"] == pytest.approx(result["confidence"], rel=1e-5)
+
+    def test_bad_clip_does_not_sink_batch(self, engine):
+        results = engine.predict_batch([make_wav(300), b"garbage", make_wav(600)])
+        assert results[0]["status"] == "success"
+        assert results[1]["emotion"] == "error"
+        assert results[2]["status"] == "success"
+
+
+class TestPredictTimeline:
+    """Sliding-window timeline over one spectrogram."""
+
+    def test_timeline_shape(self, engine):
+        clip = make_wav(300, seconds=4.0)
+        timeline = engine.predict_timeline(clip, window_seconds=1.0, hop_seconds=0.5)
+
+        assert timeline["status"] == "success"
+        n_windows = len(timeline["times"])
+        assert n_windows >= 6
+        assert len(timeline["emotions"]) == n_windows
+        assert len(timeline["probabilities"]) == n_windows
+        assert all(len(row) == len(timeline["classes"]) for row in timeline["probabilities"])
+        assert timeline["times"] == sorted(timeline["times"])
+        assert timeline["overall"]["emotion"] in timeline["classes"]
+
+    def test_single_model_call(self, engine):
+        counting = CountingModel(engine.model)
+        engine.model, original = counting, engine.model
+        try:
+            engine.predict_timeline(make_wav(440, seconds=3.0), window_seconds=1.0, hop_seconds=0.25)
+        finally:
+            engine.model = original
+        assert counting.proba_calls == 1
+
+    def test_invalid_window(self, engine):
+        result = engine.predict_timeline(make_wav(440), window_seconds=0, hop_seconds=0.5)
+        assert result["status"] == "error"
+
+    def test_undecodable_audio(self, engine):
+        result = engine.predict_timeline(b"not audio")
+        assert result["status"] == "error" and "message" in result
+
+
+class TestMicroBatcher:
+    """MicroBatcher groups concurrent submissions."""
+
+    def test_concurrent_items_share_a_batch(self):
+        seen = []
+
+        def handler(items):
+            seen.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(handler, max_batch_size=8, max_wait_ms=50)
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        results = asyncio.run(run())
+        assert results == [0, 2, 4, 6, 8]
+        assert len(seen) == 1
+        assert batcher.stats()["items"] == 5
+
+    def test_respects_max_batch_size(self):
+        sizes = []
+
+        def handler(items):
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher(handler, max_batch_size=3, max_wait_ms=20)
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+
+        assert asyncio.run(run()) == list(range(7))
+        assert max(sizes) <= 3
+        assert sum(sizes) == 7
+
+    def test_handler_error_propagates(self):
+        def handler(items):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(handler, max_wait_ms=1)
+
+        async def run():
+            return await batcher.submit(1)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
+
+    def test_short_result_list_fails_every_item(self):
+        def handler(items):
+            return items[:1]
+
+        batcher = MicroBatcher(handler, max_batch_size=8, max_wait_ms=50)
+
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True), 5)
+
+        results = asyncio.run(run())
+        assert len(results) == 3 and all(isinstance(r, RuntimeError) for r in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
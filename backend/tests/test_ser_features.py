@@ -0,0 +1,151 @@
+"""
+Unit tests for the shared-STFT SER feature pipeline.
+The pipeline must produce the same vectors as the original per-feature
+librosa calls that ser_model.pkl was trained on.
+"""
+import pytest
+import numpy as np
+import io
+import sys
+import os
+
+import librosa
+import soundfile as sf
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games import ser_features
+from games.ser_features import compute_frames, window_vectors, seconds_to_frames, N_FEATURES, FEATURE_LAYOUT, SAMPLE_RATE
+from games.ser_pipeline import SpeechEmotionRecognizer
+
+
+def reference_features(X, sample_rate):
+    """Original three-transform extraction (before the shared STFT)."""
+    stft = np.abs(librosa.stft(X))
+    mfccs = np.mean(librosa.feature.mfcc(y=X, sr=sample_rate, n_mfcc=40).T, axis=0)
+    chroma = np.mean(librosa.feature.chroma_stft(S=stft, sr=sample_rate).T, axis=0)
+    mel = np.mean(librosa.feature.melspectrogram(y=X, sr=sample_rate).T, axis=0)
+    return np.hstack((mfccs, chroma, mel))
+
+
+def make_clip(sample_rate=22050, seconds=1.5, seed=0):
+    """Harmonic tone with a little noise, roughly speech-like energy."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    X = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 660 * t)
+    X += 0.02 * rng.standard_normal(len(t))
+    return X.astype(np.float32)
+
+
+class TestSharedSTFTFeatures:
+    """The shared pipeline must match the reference extraction."""
+
+    @pytest.mark.parametrize("sample_rate", [16000, 22050, 48000])
+    def test_matches_reference(self, sample_rate):
+        X = make_clip(sample_rate)
+        expected = reference_features(X, sample_rate)
+        actual = compute_frames(X, sample_rate).mean_vector()
+
+        assert actual.shape == (N_FEATURES,)
+        np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-4)
+
+    def test_feature_layout(self):
+        X = make_clip()
+        vector = compute_frames(X, 22050).mean_vector()
+        for name, (start, stop) in FEATURE_LAYOUT.items():
+            assert vector[start:stop].size == stop - start
+        assert FEATURE_LAYOUT["mel"][1] == N_FEATURES
+
+    def test_partial_features(self):
+        X = make_clip()
+        frames = compute_frames(X, 22050, mfcc=True, chroma=False, mel=False)
+        assert frames.mean_vector(mfcc=True, chroma=False, mel=False).shape == (40,)
+
+    def test_stack_is_per_frame(self):
+        X = make_clip()
+        frames = compute_frames(X, 22050)
+        stacked = frames.stack()
+        assert stacked.shape == (frames.n_frames, N_FEATURES)
+        np.testing.assert_allclose(stacked.mean(axis=0), frames.mean_vector(), rtol=1e-5)
+
+    def test_stereo_is_downmixed(self):
+        X = make_clip()
+        stereo = np.stack([X, X], axis=1)
+        np.testing.assert_allclose(
+            compute_frames(stereo, 22050).mean_vector(),
+            compute_frames(X, 22050).mean_vector(),
+            rtol=1e-5,
+        )
+
+    def test_filterbanks_are_cached(self):
+        ser_features.mel_filterbank.cache_clear()
+        compute_frames(make_clip(seed=1), 22050)
+        compute_frames(make_clip(seed=2), 22050)
+        info = ser_features.mel_filterbank.cache_info()
+        assert info.misses == 1
+        assert info.hits >= 1
+
+
+class TestWindowVectors:
+    """Window-level vectors come from the frame matrix, not the raw audio."""
+
+    def test_matches_brute_force_means(self):
+        frames = compute_frames(make_clip(seconds=3.0), 22050)
+        stacked = frames.stack()
+        vectors, starts = window_vectors(frames, window_frames=20, hop_frames=7)
+
+        assert vectors.shape == (len(starts), N_FEATURES)
+        for vector, start in zip(vectors, starts):
+            np.testing.assert_allclose(vector, stacked[start:start + 20].mean(axis=0), rtol=1e-5, atol=1e-6)
+
+    def test_window_count(self):
+        frames = compute_frames(make_clip(seconds=3.0), 22050)
+        n = frames.n_frames
+        _, starts = window_vectors(frames, window_frames=10, hop_frames=5)
+        assert len(starts) == (n - 10) // 5 + 1
+
+    def test_short_clip_gives_one_window(self):
+        frames = compute_frames(make_clip(seconds=0.2), 22050)
+        vectors, starts = window_vectors(frames, window_frames=1000, hop_frames=10)
+        assert len(starts) == 1
+        np.testing.assert_allclose(vectors[0], frames.mean_vector(), rtol=1e-5)
+
+    def test_seconds_to_frames(self):
+        assert seconds_to_frames(1.0, 22050) == 43
+        assert seconds_to_frames(0.0, 22050) == 1
+
+
+class TestExtractFeature:
+    """extract_feature goes through the shared pipeline."""
+
+    @pytest.fixture
+    def recognizer(self):
+        recognizer = SpeechEmotionRecognizer.__new__(SpeechEmotionRecognizer)
+        recognizer.sample_rate = SAMPLE_RATE
+        return recognizer
+
+    def test_extract_from_wav_bytes(self, recognizer):
+        X = make_clip(SAMPLE_RATE)
+        buffer = io.BytesIO()
+        sf.write(buffer, X, SAMPLE_RATE, format="WAV", subtype="FLOAT")
+
+        features = recognizer.extract_feature(buffer.getvalue())
+
+        assert features.shape == (N_FEATURES,)
+        np.testing.assert_allclose(features, reference_features(X, SAMPLE_RATE), rtol=1e-4, atol=1e-4)
+
+    def test_extract_resamples_to_model_rate(self, recognizer):
+        buffer = io.BytesIO()
+        sf.write(buffer, make_clip(16000), 16000, format="WAV", subtype="FLOAT")
+
+        X, sample_rate = recognizer.load_audio(buffer.getvalue())
+        assert sample_rate == SAMPLE_RATE
+        assert abs(len(X) - 1.5 * SAMPLE_RATE) < 10
+
+    def test_extract_invalid_audio(self, recognizer):
+        assert recognizer.extract_feature(b"not audio") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
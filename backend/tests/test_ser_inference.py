@@ -0,0 +1,128 @@
+"""
+Unit tests for the pure-NumPy SER inference engine.
+"""
+import pytest
+import numpy as np
+import sys
+import os
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.ser_features import N_FEATURES
+from games.ser_inference import NumpyMLPEngine, benchmark, resolve_engine_name
+from games.ser_model import read_pickle
+from games.ser_pipeline import SpeechEmotionRecognizer
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(150, N_FEATURES))
+    y = np.array(["angry", "calm", "happy"])[rng.integers(0, 3, size=150)]
+    return X, y
+
+
+class TestNumpyEngine:
+    """The NumPy forward pass must match sklearn's predict_proba."""
+
+    @pytest.mark.parametrize("activation", ["relu", "tanh", "logistic"])
+    def test_mlp_matches_sklearn(self, data, activation):
+        X, y = data
+        model = MLPClassifier(hidden_layer_sizes=(32, 16), activation=activation,
+                              max_iter=60, random_state=0).fit(X, y)
+        engine = NumpyMLPEngine.from_estimator(model)
+
+        assert engine.validate(model, X) < 1e-4
+        assert (engine.predict(X) == model.predict(X)).all()
+
+    def test_linear_matches_sklearn(self, data):
+        X, y = data
+        model = LogisticRegression(max_iter=300).fit(X, y)
+        engine = NumpyMLPEngine.from_estimator(model)
+        assert engine.validate(model, X) < 1e-4
+
+    def test_binary_mlp(self, data):
+        X, _ = data
+        y = (X[:, 0] > 0).astype(int)
+        model = MLPClassifier(hidden_layer_sizes=(8,), max_iter=60, random_state=0).fit(X, y)
+        engine = NumpyMLPEngine.from_estimator(model)
+        assert engine.predict_proba(X).shape == (len(X), 2)
+        assert engine.validate(model, X) < 1e-4
+
+    def test_other_estimators_rejected(self, data):
+        from sklearn.linear_model import SGDClassifier
+        X, y = data
+        binary = (X[:, 0] > 0).astype(int)
+        for model in (LogisticRegression(max_iter=300).fit(X, binary),
+                      SGDClassifier(loss="log_loss", random_state=0).fit(X, y)):
+            with pytest.raises(ValueError):
+                NumpyMLPEngine.from_estimator(model)
+
+    def test_single_row_input(self, data):
+        X, y = data
+        model = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=0).fit(X, y)
+        engine = NumpyMLPEngine.from_estimator(model)
+        assert engine.predict_proba(X[0]).shape == (1, 3)
+
+    def test_outputs_float32(self, data):
+        X, y = data
+        model = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=0).fit(X, y)
+        probs = NumpyMLPEngine.from_estimator(model).predict_proba(X)
+        assert probs.dtype == np.float32
+        np.testing.assert_allclose(probs.sum(axis=1), 1.0, rtol=1e-5)
+
+    def test_validate_rejects_mismatch(self, data):
+        X, y = data
+        model = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=0).fit(X, y)
+        other = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=1).fit(X, y)
+        with pytest.raises(ValueError):
+            NumpyMLPEngine.from_estimator(other).validate(model, X)
+
+    def test_shipped_model(self):
+        reference = read_pickle(os.path.join(MODELS_DIR, "ser_model.pkl"))
+        engine = NumpyMLPEngine.from_estimator(reference)
+        X = np.random.default_rng(3).normal(scale=10.0, size=(64, N_FEATURES))
+        assert engine.validate(reference, X) < 1e-4
+
+    def test_benchmark_rows(self, data):
+        X, y = data
+        model = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=0).fit(X, y)
+        rows = benchmark(model, NumpyMLPEngine.from_estimator(model), batch_sizes=(1, 4), repeat=3)
+        assert [row["batch"] for row in rows] == [1, 4]
+        assert all(row["max_abs_diff"] < 1e-4 for row in rows)
+
+
+class TestEngineSelection:
+    """The recognizer picks its engine from the argument or SER_ENGINE."""
+
+    def test_resolve_from_env(self, monkeypatch):
+        monkeypatch.setenv("SER_ENGINE", "sklearn")
+        assert resolve_engine_name() == "sklearn"
+        assert resolve_engine_name("numpy") == "numpy"
+
+    def test_unknown_engine_falls_back_to_default(self, monkeypatch):
+        monkeypatch.delenv("SER_ENGINE", raising=False)
+        assert resolve_engine_name("tensorrt") == "numpy"
+
+    def test_switch_at_runtime(self):
+        recognizer = SpeechEmotionRecognizer()
+        assert recognizer.engine_name == "numpy"
+        assert isinstance(recognizer.model, NumpyMLPEngine)
+
+        assert recognizer.set_engine("sklearn") == "sklearn"
+        assert isinstance(recognizer.model, MLPClassifier)
+
+        X = np.random.default_rng(4).normal(scale=10.0, size=(8, N_FEATURES))
+        sklearn_probs = recognizer.model.predict_proba(X)
+        recognizer.set_engine("numpy")
+        np.testing.assert_allclose(recognizer.model.predict_proba(X), sklearn_probs, atol=1e-4)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,165 @@
+"""
+Unit tests for the compact SER model artifact (manifest + raw arrays).
+"""
+import pytest
+import numpy as np
+import json
+import sys
+import os
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.ser_features import N_FEATURES
+from games.ser_model import (
+    ARTIFACT_VERSION,
+    MANIFEST_NAME,
+    ModelArtifactError,
+    SERModelArtifact,
+    convert_pickle,
+    load_artifact,
+    write_artifact,
+)
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, N_FEATURES))
+    y = np.array(["calm", "happy", "fearful", "disgust"])[rng.integers(0, 4, size=120)]
+    return X, y
+
+
+class TestArtifactRoundTrip:
+    """write_artifact -> load_artifact must reproduce predict_proba."""
+
+    def test_mlp_round_trip(self, tmp_path, training_data):
+        X, y = training_data
+        model = MLPClassifier(hidden_layer_sizes=(16,), max_iter=50, random_state=0).fit(X, y)
+
+        write_artifact(model, str(tmp_path))
+        artifact = load_artifact(str(tmp_path))
+
+        assert isinstance(artifact, SERModelArtifact)
+        assert list(artifact.classes_) == list(model.classes_)
+        np.testing.assert_allclose(artifact.predict_proba(X), model.predict_proba(X), atol=1e-5)
+        assert (artifact.predict(X) == model.predict(X)).all()
+
+    def test_linear_round_trip(self, tmp_path, training_data):
+        X, y = training_data
+        model = LogisticRegression(max_iter=200).fit(X, y)
+
+        write_artifact(model, str(tmp_path))
+        artifact = load_artifact(str(tmp_path))
+
+        np.testing.assert_allclose(artifact.predict_proba(X), model.predict_proba(X), atol=1e-5)
+
+    def test_arrays_are_memory_mapped(self, tmp_path, training_data):
+        X, y = training_data
+        model = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=0).fit(X, y)
+        write_artifact(model, str(tmp_path))
+
+        artifact = load_artifact(str(tmp_path))
+        assert all(isinstance(W, np.memmap) for W in artifact.weights)
+        assert not artifact.weights[0].flags.writeable
+
+    def test_manifest_contents(self, tmp_path, training_data):
+        X, y = training_data
+        model = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=0).fit(X, y)
+        write_artifact(model, str(tmp_path))
+
+        with open(tmp_path / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+        assert manifest["version"] == ARTIFACT_VERSION
+        assert manifest["n_features"] == N_FEATURES
+        assert manifest["feature_layout"]["mel"][1] == N_FEATURES
+        assert [layer["shape"] for layer in manifest["layers"]] == [[N_FEATURES, 8], [8, 4]]
+
+    def test_rewrite_swaps_directory(self, tmp_path, training_data):
+        X, y = training_data
+        out = str(tmp_path / "model")
+        deep = MLPClassifier(hidden_layer_sizes=(8, 8), max_iter=20, random_state=0).fit(X, y)
+        write_artifact(deep, out)
+        mapped = load_artifact(out)
+        before = mapped.predict_proba(X)
+
+        shallow = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=1).fit(X, y)
+        write_artifact(shallow, out)
+
+        # A worker still holding the old mapping reads the old weights intact
+        np.testing.assert_array_equal(mapped.predict_proba(X), before)
+        np.testing.assert_allclose(load_artifact(out).predict_proba(X), shallow.predict_proba(X), atol=1e-5)
+        assert "layer2_weights.npy" not in os.listdir(out)
+        assert os.listdir(tmp_path) == ["model"]
+
+    def test_failed_swap_keeps_old_artifact(self, tmp_path, training_data, monkeypatch):
+        X, y = training_data
+        out = str(tmp_path / "model")
+        old = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=0).fit(X, y)
+        write_artifact(old, out)
+
+        replace = os.replace
+
+        def fail_swap_in(src, dst):
+            if dst == out and not src.endswith(".old"):
+                raise OSError("disk full")
+            replace(src, dst)
+
+        monkeypatch.setattr(os, "replace", fail_swap_in)
+        with pytest.raises(OSError):
+            write_artifact(MLPClassifier(max_iter=20, random_state=1).fit(X, y), out)
+        monkeypatch.undo()
+
+        # The old artifact is back in place and nothing is left behind
+        np.testing.assert_allclose(load_artifact(out).predict_proba(X), old.predict_proba(X), atol=1e-5)
+        assert os.listdir(tmp_path) == ["model"]
+
+
+class TestArtifactValidation:
+    """Malformed or incompatible artifacts are rejected."""
+
+    def test_missing_manifest(self, tmp_path):
+        with pytest.raises(ModelArtifactError):
+            load_artifact(str(tmp_path))
+
+    def test_newer_version_rejected(self, tmp_path, training_data):
+        X, y = training_data
+        model = MLPClassifier(hidden_layer_sizes=(8,), max_iter=20, random_state=0).fit(X, y)
+        write_artifact(model, str(tmp_path))
+
+        manifest_path = tmp_path / MANIFEST_NAME
+        manifest = json.loads(manifest_path.read_text())
+        manifest["version"] = ARTIFACT_VERSION + 1
+        manifest_path.write_text(json.dumps(manifest))
+
+        with pytest.raises(ModelArtifactError):
+            load_artifact(str(tmp_path))
+
+    def test_wrong_feature_count_rejected(self, tmp_path):
+        rng = np.random.default_rng(1)
+        model = LogisticRegression().fit(rng.normal(size=(30, 10)), rng.integers(0, 3, size=30))
+        with pytest.raises(ModelArtifactError):
+            write_artifact(model, str(tmp_path))
+
+
+class TestShippedModel:
+    """The committed artifact must agree with the original pickle."""
+
+    def test_converted_pickle_matches_artifact(self, tmp_path):
+        pkl_path = os.path.join(MODELS_DIR, "ser_model.pkl")
+        manifest = convert_pickle(pkl_path, str(tmp_path))
+        assert manifest["source"]["estimator"] == "MLPClassifier"
+
+        fresh = load_artifact(str(tmp_path))
+        shipped = load_artifact(os.path.join(MODELS_DIR, "ser_model"))
+        X = np.random.default_rng(2).normal(size=(10, N_FEATURES)) * 10
+        np.testing.assert_allclose(fresh.predict_proba(X), shipped.predict_proba(X), atol=1e-6)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,116 @@
+"""
+Unit tests for the SER training pipeline (corpus walk, feature store, training).
+"""
+import pytest
+import numpy as np
+import sys
+import os
+
+import soundfile as sf
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.ser_features import N_FEATURES
+from games.ser_model import load_artifact, write_artifact
+from games.ser_train import FeatureStore, build_dataset, collect_corpus, label_for, train_and_evaluate
+
+# Emotion code -> tone frequency for the synthetic corpus
+TONES = {"02": 200.0, "03": 400.0, "06": 800.0, "07": 1600.0}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Tiny RAVDESS-style corpus: one tone per emotion, 6 takes each."""
+    sample_rate = 16000
+    rng = np.random.default_rng(0)
+    for actor in (1, 2):
+        actor_dir = tmp_path / "corpus" / f"Actor_{actor:02d}"
+        actor_dir.mkdir(parents=True)
+        for code, freq in TONES.items():
+            for take in range(3):
+                t = np.arange(sample_rate // 2) / sample_rate
+                X = 0.3 * np.sin(2 * np.pi * freq * t) + 0.01 * rng.standard_normal(len(t))
+                name = f"03-01-{code}-01-01-{take + 1:02d}-{actor:02d}.wav"
+                sf.write(str(actor_dir / name), X.astype(np.float32), sample_rate)
+    (tmp_path / "corpus" / "README.txt").write_text("not audio")
+    return str(tmp_path / "corpus")
+
+
+class TestCorpus:
+    """Corpus walking and labeling."""
+
+    def test_label_from_ravdess_code(self):
+        assert label_for("/data/Actor_01/03-01-05-01-02-01-01.wav") == "angry"
+
+    def test_label_from_directory(self):
+        assert label_for("/data/happy/clip.webm") == "happy"
+
+    def test_unlabeled(self):
+        assert label_for("/data/misc/recording.wav") is None
+
+    def test_collect_corpus(self, corpus):
+        items = collect_corpus(corpus)
+        assert len(items) == 24
+        assert {label for _, label in items} == {"calm", "happy", "fearful", "disgust"}
+
+    def test_collect_subset(self, corpus):
+        items = collect_corpus(corpus, emotions=["calm", "happy"])
+        assert {label for _, label in items} == {"calm", "happy"}
+
+
+class TestFeatureStore:
+    """Process-pool extraction into the hash-keyed store."""
+
+    def test_rerun_uses_cache(self, corpus, tmp_path):
+        items = collect_corpus(corpus)
+        cache_dir = str(tmp_path / "cache")
+
+        X, y, stats = build_dataset(items, FeatureStore(cache_dir), workers=2)
+        assert X.shape == (24, N_FEATURES)
+        assert stats["extracted"] == 24
+        assert stats["files_per_second"] > 0
+
+        X2, y2, stats2 = build_dataset(items, FeatureStore(cache_dir), workers=2)
+        assert stats2["extracted"] == 0
+        assert stats2["cached"] == 24
+        np.testing.assert_array_equal(X, X2)
+        assert list(y) == list(y2)
+
+    def test_new_file_only_extracts_new(self, corpus, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        build_dataset(collect_corpus(corpus), FeatureStore(cache_dir), workers=1)
+
+        extra = os.path.join(corpus, "Actor_01", "03-01-02-01-01-09-01.wav")
+        sf.write(extra, np.zeros(8000, dtype=np.float32) + 0.1, 16000)
+        _, _, stats = build_dataset(collect_corpus(corpus), FeatureStore(cache_dir), workers=1)
+        assert stats["extracted"] == 1
+
+    def test_params_change_invalidates(self, corpus, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        build_dataset(collect_corpus(corpus)[:4], FeatureStore(cache_dir), workers=1)
+        store = FeatureStore(cache_dir, params={"n_features": N_FEATURES, "sample_rate": 1})
+        assert len(store) == 0
+
+
+class TestTraining:
+    """Training, evaluation and artifact output."""
+
+    def test_train_and_write_artifact(self, corpus, tmp_path):
+        X, y, _ = build_dataset(collect_corpus(corpus), FeatureStore(str(tmp_path / "cache")), workers=2)
+        model, metrics = train_and_evaluate(X, y, test_size=0.5, seed=0,
+                                            mlp_params={"hidden_layer_sizes": (16,), "max_iter": 200})
+
+        assert set(metrics["per_class"]) == {"calm", "happy", "fearful", "disgust"}
+        assert metrics["n_train"] + metrics["n_test"] == 24
+        assert 0.0 <= metrics["accuracy"] <= 1.0
+
+        out_dir = str(tmp_path / "artifact")
+        write_artifact(model, out_dir, training={"metrics": metrics})
+        artifact = load_artifact(out_dir)
+        assert artifact.manifest["training"]["metrics"]["n_test"] == metrics["n_test"]
+        np.testing.assert_allclose(artifact.predict_proba(X), model.predict_proba(X), atol=1e-4)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,228 @@
+"""
+Tests for session recording: the chunked container, live recording through
+/process-frame, replay and output comparison.
+"""
+import pytest
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+pytest.importorskip("mediapipe")
+
+from games.frame_bench import synthetic_frames
+from games.session_recorder import (
+    Recording, RecordingError, SessionRecorder, compare, load_outputs, replay, save_outputs
+)
+
+
+def _jpegs(count, width=160, height=120):
+    return [cv2.imencode(".jpg", frame)[1].tobytes() for frame in synthetic_frames(width, height, count)]
+
+
+class TestContainer:
+    def test_chunks_round_trip(self, tmp_path):
+        recorder = SessionRecorder(str(tmp_path / "rec"), "pose", chunk_frames=4)
+        frames = _jpegs(10)
+        for i, data in enumerate(frames):
+            landmarks = np.full((33, 4), i, dtype=np.float32)
+            recorder.append(data, f"pose-{i}", i % 2 == 0, landmarks, client_ts=i / 30)
+        manifest = recorder.close()
+        assert manifest["frames"] == 10 and [c["frames"] for c in manifest["chunks"]] == [4, 4, 2]
+
+        recording = Recording(str(tmp_path / "rec"))
+        assert len(recording) == 10 and recording.stream == "pose"
+        assert [bytes(data) for _, data in recording.frames()] == frames
+        outputs = recording.outputs()
+        assert outputs["landmarks"].shape == (10, 33, 4) and outputs["landmarks"][7, 0, 0] == 7
+        assert outputs["label"][3] == "pose-3" and outputs["detected"].tolist() == [i % 2 == 0 for i in range(10)]
+        assert recording.index["client_ts"][9] == pytest.approx(9 / 30)
+
+    def test_open_chunk_is_not_visible_until_closed(self, tmp_path):
+        path = str(tmp_path / "rec")
+        recorder = SessionRecorder(path, "gesture", chunk_frames=4)
+        for data in _jpegs(5):
+            recorder.append(data, "None", False, np.full((2, 21, 3), np.nan))
+        assert len(Recording(path)) == 4
+        recorder.close()
+        assert len(Recording(path)) == 5
+
+    def test_max_frames(self, tmp_path):
+        recorder = SessionRecorder(str(tmp_path / "rec"), "emotion", max_frames=2)
+        landmarks = np.zeros((478, 3))
+        assert recorder.append(b"a", "neutral", True, landmarks)
+        assert recorder.append(b"b", "neutral", True, landmarks)
+        assert not recorder.append(b"c", "neutral", True, landmarks) and recorder.full
+
+    def test_rejects_other_directories(self, tmp_path):
+        with pytest.raises(RecordingError):
+            Recording(str(tmp_path))
+        with open(tmp_path / "manifest.json", "w") as f:
+            json.dump({"format": "session-recording", "version": 99}, f)
+        with pytest.raises(RecordingError):
+            Recording(str(tmp_path))
+        with pytest.raises(ValueError):
+            SessionRecorder(str(tmp_path / "rec"), "filter")
+
+
+class TestReplay:
+    def test_replay_matches_recording(self, tmp_path):
+        from games.video_batch import processor_runner
+        run = processor_runner("pose")
+        recorder = SessionRecorder(str(tmp_path / "rec"), "pose")
+        for data in _jpegs(6):
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            _, label, detected, landmarks = run(frame)
+            recorder.append(data, label, detected, landmarks)
+        recorder.close()
+
+        from games.session_state import get_store
+        get_store().delete("stream:pose")
+        annotated = []
+        outputs = replay(str(tmp_path / "rec"), on_frame=lambda i, frame: annotated.append(i))
+        assert outputs["frames"] == 6 and annotated == list(range(6))
+        # Replays don't publish to the live store
+        assert get_store().get("stream:pose") is None
+        assert compare(Recording(str(tmp_path / "rec")).outputs(), outputs)["identical"]
+
+        save_outputs(str(tmp_path / "out.npz"), outputs)
+        assert compare(load_outputs(str(tmp_path / "rec")), load_outputs(str(tmp_path / "out.npz")))["identical"]
+
+    def test_realtime_follows_client_timeline(self, tmp_path):
+        recorder = SessionRecorder(str(tmp_path / "rec"), "gesture")
+        for i, data in enumerate(_jpegs(3)):
+            recorder.append(data, "None", False, np.full((2, 21, 3), np.nan), client_ts=100 + i * 0.2)
+        recorder.close()
+        outputs = replay(str(tmp_path / "rec"), realtime=True)
+        assert outputs["seconds"] >= 0.4
+        assert replay(str(tmp_path / "rec"), realtime=True, speed=4)["seconds"] < 0.4
+
+    def test_labels_do_not_depend_on_pacing(self, tmp_path, monkeypatch):
+        from mediapipe.framework.formats import classification_pb2, landmark_pb2
+        from games.streaming import HandGestureStream
+
+        class SweepingHand:
+            """A right hand whose index finger crosses the frame and back, 8 frames each way."""
+
+            def __init__(self):
+                self.frames = 0
+
+            def process(self, image):
+                hand = landmark_pb2.NormalizedLandmarkList()
+                for _ in range(21):
+                    hand.landmark.add(x=0.5, y=0.9)
+                step = self.frames % 16
+                hand.landmark[8].x = 0.1 + 0.1 * (step if step < 8 else 15 - step)
+                hand.landmark[8].y = 0.2
+                self.frames += 1
+                side = classification_pb2.ClassificationList()
+                side.classification.add(label="Right", score=1.0)
+                return type("Results", (), {"multi_hand_landmarks": [hand], "multi_handedness": [side]})()
+
+        monkeypatch.setattr(HandGestureStream, "_build_hands", lambda self, **config: SweepingHand())
+        recorder = SessionRecorder(str(tmp_path / "rec"), "gesture")
+        # 8 frames = 1.2 s apart, so every sweep clears the 1 s swipe cooldown
+        for i, data in enumerate(_jpegs(17)):
+            recorder.append(data, "None", True, np.full((2, 21, 3), np.nan), client_ts=i * 0.15)
+        recorder.close()
+
+        realtime = replay(str(tmp_path / "rec"), realtime=True)["label"].tolist()
+        assert realtime.count("Swipe_Left") == 1 and realtime.count("Swipe_Right") == 1
+        assert replay(str(tmp_path / "rec"), realtime=True, speed=float("inf"))["label"].tolist() == realtime
+
+
+    def test_replays_the_recorded_tracker_level(self, tmp_path, monkeypatch):
+        from games.session_recorder import INDEX_DTYPE, _upgrade_index
+        from games.streaming import HandGestureStream
+        built = []
+        original = HandGestureStream._build_hands
+
+        def build(self, **config):
+            built.append(config)
+            return original(self, **config)
+
+        monkeypatch.setattr(HandGestureStream, "_build_hands", build)
+        live = HandGestureStream(autotune=False)
+        recorder = SessionRecorder(str(tmp_path / "rec"), "gesture")
+        frames = [cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) for data in _jpegs(4)]
+        for i, (data, frame) in enumerate(zip(_jpegs(4), frames)):
+            # The live tuner stepped down after two frames
+            live.tuner.level = 0 if i < 2 else 1
+            recorder.process(live, frame, data, publish=False)
+        recorder.close()
+
+        recording = Recording(str(tmp_path / "rec"))
+        assert recording.trackers == [dict(level) for level in live.tuner.levels]
+        assert recording.index["tracker"].tolist() == [0, 0, 1, 1]
+        built.clear()
+        outputs = replay(recording)
+        assert [config["model_complexity"] for config in built] == [1, 0]
+        assert compare(recording.outputs(), outputs)["identical"]
+
+        # Version 1 indexes (no tracker column) still load
+        old = np.zeros(2, dtype=[(name, INDEX_DTYPE[name]) for name in INDEX_DTYPE.names if name != "tracker"])
+        assert _upgrade_index(old)["tracker"].tolist() == [-1, -1]
+
+
+class TestCompare:
+    def _outputs(self, count=5):
+        landmarks = np.zeros((count, 33, 4), dtype=np.float32)
+        landmarks[1] = np.nan
+        return {"label": np.array(["a"] * count), "detected": np.ones(count, bool), "landmarks": landmarks}
+
+    def test_reports_changes(self):
+        baseline, candidate = self._outputs(), self._outputs()
+        candidate["label"][2] = "b"
+        candidate["landmarks"][4, 0, 0] = 0.01
+        candidate["landmarks"][3, 0, 0] = 1e-6
+        report = compare(baseline, candidate)
+        assert not report["identical"] and report["first_changes"] == [2, 4]
+        assert report["label_changes"] == 1 and report["landmark_changes"] == 1
+        assert report["max_landmark_error"] == pytest.approx(0.01)
+
+    def test_nan_frames_compare_equal(self):
+        assert compare(self._outputs(), self._outputs())["identical"]
+
+    def test_frame_count_mismatch(self):
+        with pytest.raises(ValueError):
+            compare(self._outputs(5), self._outputs(4))
+
+
+class TestEndpoints:
+    def test_record_live_session(self, tmp_path):
+        from fastapi.testclient import TestClient
+        import main
+        from games.session_recorder import RecordingSessions
+        main.recording_sessions = RecordingSessions(str(tmp_path))
+        try:
+            client = TestClient(main.app)
+            headers = {"X-Session-Id": "rec-test"}
+            assert client.post("/recordings/stop", headers=headers).status_code == 404
+            assert client.post("/recordings/start", data={"type": "gesture"}).status_code == 400
+            started = client.post("/recordings/start", data={"type": "gesture"}, headers=headers).json()
+
+            frames = _jpegs(3)
+            for i, data in enumerate(frames):
+                response = client.post("/process-frame", headers=headers,
+                                       data={"type": "gesture", "timestamp": str(1000 + i * 33)},
+                                       files={"frame": ("frame.jpg", data, "image/jpeg")})
+                assert "image" in response.json()
+            stopped = client.post("/recordings/stop", headers=headers).json()
+            assert stopped["recording"] == started["recording"] and stopped["frames"] == 3
+
+            recording = Recording(str(tmp_path / started["recording"]))
+            assert [bytes(data) for _, data in recording.frames()] == frames
+            assert recording.index["client_ts"].tolist() == pytest.approx([1.0, 1.033, 1.066])
+            assert client.get("/recordings").json()["recordings"][0]["frames"] == 3
+            assert compare(recording.outputs(), replay(recording))["identical"]
+        finally:
+            main.recording_sessions = None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,197 @@
+"""
+Tests for the session state stores and affinity headers.
+"""
+import pytest
+import subprocess
+import sys
+import os
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.session_state import (
+    InProcessStore, SharedMemoryStore, RedisStore, StandInServer, StateWriter, RespError,
+    create_store, get_store, set_store, instance_id
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def stand_in():
+    server = StandInServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def _roundtrip(store):
+    assert store.get("missing", {"status": "unknown"}) == {"status": "unknown"}
+    store.set("stream:pose", {"status": "active", "pose": "T-Pose"})
+    assert store.get("stream:pose") == {"status": "active", "pose": "T-Pose"}
+    store.delete("stream:pose")
+    assert store.get("stream:pose") is None
+
+
+class TestStores:
+    def test_in_process(self):
+        _roundtrip(InProcessStore())
+
+    def test_shared_memory(self, tmp_path):
+        _roundtrip(SharedMemoryStore(str(tmp_path)))
+
+    def test_shared_memory_across_processes(self, tmp_path):
+        SharedMemoryStore(str(tmp_path)).set("stream:gesture", {"gesture": "Victory"})
+        code = ("import json; from games.session_state import SharedMemoryStore; "
+                f"print(json.dumps(SharedMemoryStore({str(tmp_path)!r}).get('stream:gesture')))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, timeout=60)
+        assert result.stdout.strip() == '{"gesture": "Victory"}'
+
+    def test_redis_stand_in(self, stand_in):
+        store = RedisStore(stand_in)
+        _roundtrip(store)
+        assert store.client.execute("PING") == "PONG"
+        with pytest.raises(RespError):
+            store.client.execute("HGETALL", "x")
+        # A second client (another worker) sees the same state
+        store.set("stream:emotion", {"emotion": "happy"})
+        assert RedisStore(stand_in).get("stream:emotion") == {"emotion": "happy"}
+
+    def test_create_store(self, tmp_path):
+        assert isinstance(create_store(None), InProcessStore)
+        assert isinstance(create_store("memory"), InProcessStore)
+        store = create_store(f"shm://{tmp_path}")
+        assert isinstance(store, SharedMemoryStore) and store.directory == str(tmp_path)
+        assert isinstance(create_store("redis://localhost:6390/2"), RedisStore)
+        with pytest.raises(ValueError):
+            create_store("memcached://localhost")
+
+
+class TestStateWriter:
+    def test_skips_unchanged_values(self):
+        store = InProcessStore()
+        writer = StateWriter(store, refresh_interval=60)
+        assert writer.write("k", {"a": 1})
+        assert not writer.write("k", {"a": 1})
+        assert writer.write("k", {"a": 2})
+        assert store.get("k") == {"a": 2}
+
+    def test_refreshes_after_interval(self):
+        store = InProcessStore()
+        writer = StateWriter(store, refresh_interval=0)
+        writer.write("k", {"a": 1})
+        store.set("k", {"a": "other worker"})
+        assert writer.write("k", {"a": 1})
+        assert store.get("k") == {"a": 1}
+
+
+class TestStreamStatus:
+    def test_status_reads_from_store(self, tmp_path):
+        pytest.importorskip("mediapipe")
+        from games import streaming
+        previous = get_store()
+        set_store(SharedMemoryStore(str(tmp_path)))
+        try:
+            assert streaming.get_stream_status("pose")["status"] == "waiting"
+            # Written by another worker
+            SharedMemoryStore(str(tmp_path)).set("stream:pose", {"status": "active", "pose": "T-Pose"})
+            assert streaming.get_stream_status("pose")["pose"] == "T-Pose"
+            assert streaming.get_stream_status("nope") == {"status": "unknown"}
+        finally:
+            set_store(previous)
+
+    def test_sessions_keep_their_own_state(self, tmp_path):
+        pytest.importorskip("mediapipe")
+        from games.streaming import get_stream_status, stream_state_key
+        # Two workers' writers on one shared store, one session each
+        writer_a = StateWriter(SharedMemoryStore(str(tmp_path)))
+        writer_b = StateWriter(SharedMemoryStore(str(tmp_path)))
+        writer_a.write(stream_state_key("gesture", "user-1"), {"gesture": "None"})
+        writer_b.write(stream_state_key("gesture", "user-2"), {"gesture": "Swipe_Left"})
+        # Unchanged, so skipped; must not read back user 2's swipe
+        assert not writer_a.write(stream_state_key("gesture", "user-1"), {"gesture": "None"})
+        previous = get_store()
+        set_store(SharedMemoryStore(str(tmp_path)))
+        try:
+            assert get_stream_status("gesture", "user-1")["gesture"] == "None"
+            assert get_stream_status("gesture", "user-2")["gesture"] == "Swipe_Left"
+        finally:
+            set_store(previous)
+
+    def test_process_frame_returns_its_own_result(self):
+        pytest.importorskip("mediapipe")
+        import cv2
+        import numpy as np
+        from fastapi.testclient import TestClient
+        import main
+        from games.streaming import stream_state_key
+        # Another worker / session left a swipe in the store
+        get_store().set(stream_state_key("gesture", "user-1"), {"status": "active", "gesture": "Swipe_Left"})
+        get_store().set(stream_state_key("gesture"), {"status": "active", "gesture": "Swipe_Left"})
+        frame = cv2.imencode(".jpg", np.zeros((120, 160, 3), np.uint8))[1].tobytes()
+        client = TestClient(main.app)
+        for headers in ({"X-Session-Id": "user-1"}, {}):
+            response = client.post("/process-frame", data={"type": "gesture"}, headers=headers,
+                                   files={"frame": ("frame.jpg", frame, "image/jpeg")})
+            assert response.json()["gesture"] == "None"
+        assert client.get("/stream/gesture/status?session=user-1").json()["gesture"] == "None"
+
+    def test_warmup_does_not_publish(self):
+        pytest.importorskip("mediapipe")
+        import main
+        from games.streaming import stream_state_key
+        get_store().set(stream_state_key("gesture"), {"status": "active", "gesture": "Victory"})
+        main._warm_frame_processor("gesture", main.get_frame_processor("gesture"))
+        assert get_store().get(stream_state_key("gesture"))["gesture"] == "Victory"
+        # And it waited for (then released) the processor's lock
+        assert not main.processor_busy["gesture"].locked()
+
+    def test_waiting_for_a_processor_does_not_block_the_loop(self):
+        import asyncio
+        import time
+        import main
+        lock = main.processor_busy["gaze"]
+        lock.acquire()
+        # Warm-up holding the processor for a slow first inference
+        threading.Timer(0.3, lock.release).start()
+
+        async def run():
+            ticks = []
+
+            async def ticker():
+                while len(ticks) < 5:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.02)
+
+            async def request():
+                async with main.hold_processor("gaze"):
+                    return len(ticks)
+
+            waited, _ = await asyncio.gather(request(), ticker())
+            return waited
+
+        # The loop kept running while the request waited for the lock
+        assert asyncio.run(run()) >= 5
+        assert not lock.locked()
+
+
+class TestAffinity:
+    def test_headers(self):
+        from fastapi.testclient import TestClient
+        import main
+        client = TestClient(main.app)
+        response = client.get("/health")
+        assert response.headers["x-instance-id"] == instance_id()
+        assert "x-session-affinity" not in response.headers
+        assert response.json()["instance"] == instance_id()
+
+        response = client.post("/process-frame", data={"type": "gesture"})
+        assert response.headers["x-session-affinity"] == "required"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
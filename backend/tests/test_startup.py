@@ -0,0 +1,69 @@
+"""
+Tests for lazy imports, route families and the startup profiler.
+"""
+import pytest
+import json
+import subprocess
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.startup_profile import (
+    BACKEND_DIR, BUDGET_PATH, parse_importtime, by_package, direct_imports, check_budget,
+    import_profile, load_budget
+)
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       200 |        200 |     numpy.core
+import time:      1000 |       1200 |   numpy
+import time:       300 |        300 |   fastapi
+import time:        50 |       1550 | main
+"""
+
+
+class TestProfiler:
+    def test_parse_importtime(self):
+        rows = parse_importtime(SAMPLE)
+        assert rows[0] == ("numpy.core", 200, 200, 2)
+        assert rows[-1] == ("main", 50, 1550, 0)
+
+    def test_by_package_and_direct_imports(self):
+        rows = parse_importtime(SAMPLE)
+        assert by_package(rows) == {"numpy": 1.2, "fastapi": 0.3, "main": 0.05}
+        assert direct_imports(rows) == {"numpy": 1.2, "fastapi": 0.3}
+
+    def test_check_budget(self):
+        budget = {"import_ms": 100, "forbidden": ["numpy"], "modules_ms": {"fastapi": 0.1}}
+        failures = check_budget({"numpy": 1.2, "fastapi": 0.3}, {"import_ms": 150}, budget)
+        assert len(failures) == 3
+        assert check_budget({"fastapi": 0.05}, {"import_ms": 50}, budget) == []
+
+
+class TestLazyStartup:
+    def test_heavy_modules_not_imported(self):
+        """Importing main must not load any module the budget forbids."""
+        packages = by_package(import_profile())
+        forbidden = load_budget(BUDGET_PATH)["forbidden"]
+        assert [name for name in forbidden if name in packages] == []
+
+    def test_route_families(self):
+        snippet = "import json, main; print(json.dumps(sorted(r.path for r in main.app.routes)))"
+        env = dict(os.environ, ROUTE_FAMILIES="speech")
+        result = subprocess.run([sys.executable, "-c", snippet], cwd=BACKEND_DIR, env=env,
+                                capture_output=True, text=True, timeout=120)
+        paths = json.loads(result.stdout.strip().splitlines()[-1])
+        assert "/transcribe" in paths and "/health" in paths and "/metrics" in paths
+        assert "/process-frame" not in paths
+        assert not any(p.startswith("/predict-emotion") for p in paths)
+
+    def test_parse_route_families(self):
+        import main
+        assert main.parse_route_families("") == set(main.ROUTE_FAMILIES)
+        assert main.parse_route_families("all") == set(main.ROUTE_FAMILIES)
+        assert main.parse_route_families("SER, vision,bogus") == {"ser", "vision"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,115 @@
+"""
+Tests for the Server-Sent Events status stream.
+"""
+import pytest
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.session_state import InProcessStore, SharedMemoryStore, StateWriter
+from games.status_events import status_events, format_event
+
+
+def _parse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines() if not line.startswith(":"))
+    return json.loads(fields["data"]) if "data" in fields else None
+
+
+async def _collect(store, updates, **kwargs):
+    """Run the stream while `updates` are written; returns the messages sent."""
+    writer = StateWriter(store)
+    messages = []
+
+    async def consume():
+        async for message in status_events("stream:test", lambda: store.get("stream:test", {"status": "waiting"}),
+                                           store=store, **kwargs):
+            messages.append(message)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.05)
+    for delay, state in updates:
+        await asyncio.sleep(delay)
+        # Processors write from worker threads
+        await asyncio.to_thread(writer.write, "stream:test", state)
+    await asyncio.sleep(0.3)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    return messages
+
+
+class TestStatusEvents:
+    def test_format(self):
+        assert format_event({"a": 1}, event_id=3) == 'event: status\nid: 3\ndata: {"a":1}\n\n'
+
+    def test_pushes_only_changes(self):
+        store = InProcessStore()
+        frames = [
+            (0.0, {"status": "active", "gesture": "Open_Palm", "message": "hi"}),
+            (0.2, {"status": "active", "gesture": "Open_Palm", "message": "hi"}),
+            (0.0, {"status": "active", "gesture": "Victory", "message": "hi"}),
+        ]
+        messages = asyncio.run(_collect(store, frames, coalesce=0.01))
+        assert messages[0].startswith("retry:")
+        states = [_parse(m) for m in messages[1:] if m.startswith("event:")]
+        assert [s.get("gesture") for s in states] == [None, "Open_Palm", "Victory"]
+
+    def test_scores_alone_are_not_a_change(self):
+        store = InProcessStore()
+        frames = [(0.1, {"status": "active", "emotion": "happy", "scores": {"happy": score}})
+                  for score in (50.0, 60.0, 70.0)]
+        messages = asyncio.run(_collect(store, frames, coalesce=0.01))
+        states = [_parse(m) for m in messages if m.startswith("event:")]
+        assert len(states) == 2 and states[1]["emotion"] == "happy"
+
+    def test_burst_is_coalesced(self):
+        store = InProcessStore()
+        frames = [(0.0, {"status": "active", "pose": name}) for name in ("A", "B", "C", "D")]
+        messages = asyncio.run(_collect(store, frames, coalesce=0.2))
+        states = [_parse(m) for m in messages if m.startswith("event:")]
+        assert states[-1]["pose"] == "D"
+        assert len(states) < 5
+
+    def test_heartbeat(self):
+        messages = asyncio.run(_collect(InProcessStore(), [], heartbeat=0.1))
+        assert ": heartbeat\n\n" in messages
+
+    def test_shared_store_change_from_another_worker(self, tmp_path):
+        store = SharedMemoryStore(str(tmp_path))
+
+        async def run():
+            messages = []
+
+            async def consume():
+                async for message in status_events("stream:test", lambda: store.get("stream:test", {}),
+                                                   store=store, poll_interval=0.05):
+                    messages.append(message)
+
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.1)
+            # Written directly to the store: no local notification
+            SharedMemoryStore(str(tmp_path)).set("stream:test", {"status": "active", "pose": "T-Pose"})
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return messages
+
+        states = [_parse(m) for m in asyncio.run(run()) if m.startswith("event:")]
+        assert states[-1]["pose"] == "T-Pose"
+
+
+class TestEventsEndpoint:
+    def test_unknown_stream_type(self):
+        pytest.importorskip("mediapipe")
+        from fastapi.testclient import TestClient
+        import main
+        assert TestClient(main.app).get("/stream/nope/events").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
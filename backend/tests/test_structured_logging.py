@@ -0,0 +1,150 @@
+"""
+Tests for structured logging: JSON records, request context, rate limiting
+and the non-blocking queue handler.
+"""
+import pytest
+import json
+import logging
+import queue
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games import structured_logging
+from games.structured_logging import (
+    JsonFormatter, RateLimitFilter, DroppingQueueHandler, RequestLogMiddleware, ContextFilter, bind
+)
+
+
+def _record(msg="hello", lineno=10, **extra):
+    record = logging.LogRecord("test", logging.INFO, "/x.py", lineno, msg, (), None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestFormatting:
+    def test_json_includes_extra_fields(self):
+        doc = json.loads(JsonFormatter().format(_record(route="/transcribe", latency_ms=12.5, _private=1)))
+        assert doc["msg"] == "hello" and doc["level"] == "INFO"
+        assert doc["route"] == "/transcribe" and doc["latency_ms"] == 12.5
+        assert "_private" not in doc and "lineno" not in doc
+
+    def test_exception_rendered_before_queueing(self):
+        handler = DroppingQueueHandler(queue.Queue())
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("test", logging.ERROR, "/x.py", 1, "failed %s", ("x",), sys.exc_info())
+        prepared = handler.prepare(record)
+        assert prepared.exc_info is None and "ValueError: boom" in prepared.exc_text
+        doc = json.loads(JsonFormatter().format(prepared))
+        assert doc["msg"] == "failed x" and "ValueError" in doc["exc"]
+
+
+class TestRateLimit:
+    def test_suppresses_per_call_site(self):
+        limiter = RateLimitFilter(rate=0.001, burst=3)
+        passed = [limiter.filter(_record(lineno=1)) for _ in range(10)]
+        assert passed.count(True) == 3
+        # Another call site has its own budget
+        assert limiter.filter(_record(lineno=2))
+
+    def test_reports_suppressed_count(self):
+        limiter = RateLimitFilter(rate=1000, burst=1)
+        assert limiter.filter(_record())
+        assert not limiter.filter(_record())
+        limiter._buckets[("/x.py", 10)][0] = 1.0  # refill
+        record = _record()
+        assert limiter.filter(record) and record.suppressed == 1
+
+    def test_opt_out(self):
+        limiter = RateLimitFilter(rate=0.001, burst=1)
+        assert all(limiter.filter(_record(_rate_limit=False)) for _ in range(5))
+
+
+class TestQueueHandler:
+    def test_drops_instead_of_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        for _ in range(5):
+            handler.handle(_record())
+        assert handler.queue.qsize() == 2 and handler.dropped == 3
+
+    def test_configure_writes_json_lines(self, tmp_path):
+        path = tmp_path / "app.log"
+        root = logging.getLogger()
+        previous_handlers, previous_level = list(root.handlers), root.level
+        try:
+            structured_logging.configure_logging(level="INFO", fmt="json", filename=str(path))
+            logging.getLogger("test.configure").info("ready", extra={"models": 3})
+            structured_logging.shutdown_logging()
+        finally:
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            for handler in previous_handlers:
+                root.addHandler(handler)
+            root.setLevel(previous_level)
+        doc = json.loads(path.read_text().strip().splitlines()[-1])
+        assert doc["msg"] == "ready" and doc["models"] == 3
+
+
+class TestRequestContext:
+    @pytest.fixture
+    def app(self):
+        from fastapi import FastAPI
+        app = FastAPI()
+        records = []
+
+        class Capture(logging.Handler):
+            def emit(self, record):
+                records.append(record)
+
+        capture = Capture()
+        capture.addFilter(ContextFilter())
+        logger = logging.getLogger("test.request")
+        logger.addHandler(capture)
+        logger.setLevel(logging.INFO)
+        access = logging.getLogger("test.access")
+        access.addHandler(capture)
+        access.setLevel(logging.INFO)
+
+        @app.get("/items/{item}")
+        def item(item: str):
+            bind(item_kind="widget")
+            logger.info("looking up")
+            return {"item": item}
+
+        @app.get("/hot")
+        def hot():
+            return {}
+
+        app.add_middleware(RequestLogMiddleware, sample_rates={"/hot": 0.0}, logger_name="test.access")
+        yield app, records
+        logger.removeHandler(capture)
+        access.removeHandler(capture)
+
+    def test_fields_on_every_record(self, app):
+        from fastapi.testclient import TestClient
+        app, records = app
+        response = TestClient(app).get("/items/7", headers={"X-Request-Id": "abc", "X-Session-Id": "s1"})
+        assert response.headers["x-request-id"] == "abc"
+        inner, access = records
+        assert inner.getMessage() == "looking up"
+        assert (inner.request_id, inner.session, inner.route, inner.item_kind) == ("abc", "s1", "/items/{item}", "widget")
+        assert access.status == 200 and access.route == "/items/{item}" and access.item_kind == "widget"
+        assert access.latency_ms >= 0
+
+    def test_hot_routes_are_sampled(self, app):
+        from fastapi.testclient import TestClient
+        app, records = app
+        client = TestClient(app)
+        for _ in range(5):
+            assert client.get("/hot").status_code == 200
+        assert records == []
+        assert "x-request-id" in client.get("/hot").headers
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,136 @@
+"""
+Tests for offline video processing: the decode / inference / encode
+pipeline, the results file and the /process-video job endpoints.
+"""
+import pytest
+import time
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+pytest.importorskip("mediapipe")
+
+from games.frame_bench import synthetic_frames
+from games.video_batch import (
+    VideoJobs, VideoProcessingError, check_processor, load_results, process_video
+)
+
+FRAMES = 24
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "input.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (160, 120))
+    for frame in synthetic_frames(160, 120, FRAMES):
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def _frame_count(path):
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return count
+
+
+class TestPipeline:
+    def test_inline_pose(self, video, tmp_path):
+        output, results = str(tmp_path / "out.mp4"), str(tmp_path / "out.npz")
+        summary = process_video(video, "pose", output, results, workers=0, chunk_size=5)
+        assert summary["frames"] == FRAMES and summary["width"] == 160
+        assert _frame_count(output) == FRAMES
+
+        doc = load_results(results)
+        assert doc["processor"] == "pose" and doc["fps"] == 30.0
+        assert doc["landmarks"].shape == (FRAMES, 33, 4) and doc["landmarks"].dtype == np.float32
+        assert doc["label"].shape == (FRAMES,) and doc["frame"].tolist() == list(range(FRAMES))
+        # Nothing to detect in synthetic frames: NaN landmarks
+        assert not doc["detected"].any() and np.isnan(doc["landmarks"]).all()
+
+    def test_process_pool_keeps_order(self, video, tmp_path):
+        results = str(tmp_path / "out.npz")
+        progress = []
+        summary = process_video(video, "gesture", None, results, workers=1, chunk_size=4,
+                                progress=lambda done, total: progress.append(done))
+        assert summary["frames"] == FRAMES
+        assert progress == sorted(progress) and progress[-1] == FRAMES
+        doc = load_results(results)
+        assert doc["landmarks"].shape == (FRAMES, 2, 21, 3)
+        assert doc["time"][1] == pytest.approx(1 / 30)
+
+    def test_inline_leaves_live_store_alone(self, video):
+        from games.session_state import get_store
+        store = get_store()
+        store.delete("stream:emotion")
+        seen = []
+        process_video(video, "emotion", workers=0, progress=lambda done, total: seen.append(get_store()))
+        # Live status writes keep landing in the live store while the job runs,
+        # and the job itself publishes nothing
+        assert seen and all(current is store for current in seen)
+        assert store.get("stream:emotion") is None
+
+    def test_default_workers(self, monkeypatch):
+        from games import video_batch
+        for cpus, workers in ((1, 0), (2, 0), (4, 3), (None, 0)):
+            monkeypatch.setattr(video_batch.os, "cpu_count", lambda: cpus)
+            assert video_batch.default_workers() == workers
+
+    def test_chunks_run_on_the_video_clock(self, monkeypatch):
+        from games import video_batch
+        seen = []
+        monkeypatch.setattr(video_batch, "_worker", lambda frame, now=None: seen.append(now))
+        video_batch._process_chunk([None] * 3, 30, 30.0)
+        assert seen == [1.0, 31 / 30, 32 / 30]
+
+    def test_errors(self, tmp_path):
+        with pytest.raises(VideoProcessingError):
+            check_processor("bogus")
+        with pytest.raises(VideoProcessingError):
+            process_video(str(tmp_path / "missing.mp4"), "pose", workers=0)
+
+
+class TestEndpoints:
+    def test_job_lifecycle(self, video, tmp_path):
+        from fastapi.testclient import TestClient
+        import main
+        main.video_jobs = VideoJobs(directory=str(tmp_path / "jobs"), workers=0)
+        try:
+            client = TestClient(main.app)
+            with open(video, "rb") as f:
+                response = client.post("/process-video", data={"processor": "filter"},
+                                       files={"video": ("clip.mp4", f, "video/mp4")})
+            assert response.status_code == 202
+            job = response.json()["job"]
+
+            deadline = time.time() + 60
+            while time.time() < deadline:
+                status = client.get(f"/process-video/{job}").json()
+                if status["state"] in ("done", "failed"):
+                    break
+                time.sleep(0.1)
+            assert status["state"] == "done", status
+            assert status["summary"]["frames"] == FRAMES
+
+            assert client.get(f"/process-video/{job}/video").headers["content-type"] == "video/mp4"
+            results = client.get(f"/process-video/{job}/results")
+            assert results.status_code == 200 and results.content[:2] == b"PK"
+            assert client.get("/process-video/nope").status_code == 404
+            bad = client.post("/process-video", data={"processor": "bogus"},
+                              files={"video": ("clip.mp4", b"x", "video/mp4")})
+            assert bad.status_code == 400
+        finally:
+            main.video_jobs.shutdown()
+            main.video_jobs = None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,101 @@
+"""
+Tests for model warm-up and the /ready endpoint.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games.warmup import WarmupManager, READY, FAILED, PENDING, dummy_frame, dummy_audio
+
+
+def _manager(calls=None):
+    calls = calls if calls is not None else []
+    manager = WarmupManager()
+    manager.register("a", "vision", lambda: calls.append("load a") or "model-a",
+                     lambda model: calls.append(f"warm {model}"))
+    manager.register("b", "speech", lambda: "model-b")
+    manager.register("broken", "vision", lambda: (_ for _ in ()).throw(RuntimeError("no weights")))
+    return manager
+
+
+class TestWarmupManager:
+    def test_selection(self):
+        manager = _manager()
+        assert manager.configure("all") == ["a", "b", "broken"]
+        assert manager.configure("none") == []
+        assert manager.configure("b, a") == ["b", "a"]
+        assert manager.configure("a,unknown") == ["a"]
+
+    def test_opt_in_needs_naming(self):
+        manager = _manager()
+        manager.register("games", "games", lambda: None, opt_in=True)
+        assert "games" not in manager.configure("all")
+        assert manager.configure("a,games") == ["a", "games"]
+
+    def test_family_filter(self):
+        manager = _manager()
+        assert manager.configure("all", enabled_families=("speech",)) == ["b"]
+        assert manager.configure("a,b", enabled_families=("speech",)) == ["b"]
+
+    def test_run_records_states(self):
+        calls = []
+        manager = _manager(calls)
+        manager.configure("all")
+        assert not manager.ready
+        assert manager.status()["models"]["a"]["state"] == PENDING
+
+        manager.run()
+        status = manager.status()
+        assert calls == ["load a", "warm model-a"]
+        assert status["models"]["a"]["state"] == READY
+        assert status["models"]["a"]["warmup_ms"] is not None
+        assert status["models"]["b"]["warmup_ms"] is None
+        assert status["models"]["broken"]["state"] == FAILED
+        assert "no weights" in status["models"]["broken"]["error"]
+        # A failed model degrades the instance but doesn't block readiness
+        assert status["ready"] and status["degraded"]
+        assert manager.ready
+
+    def test_nothing_selected_is_ready(self):
+        manager = _manager()
+        manager.configure("none")
+        assert manager.ready
+        assert not manager.status()["degraded"]
+
+    def test_background_start(self):
+        manager = _manager()
+        manager.configure("a")
+        manager.start(background=True)
+        manager.join(timeout=10)
+        assert manager.ready
+        assert manager.status()["warmup_ms"] is not None
+
+    def test_dummy_inputs(self):
+        frame = dummy_frame(64, 48)
+        assert frame.shape == (48, 64, 3) and frame.std() > 0
+        samples, sample_rate = dummy_audio(0.5, 8000)
+        assert samples.shape == (4000,) and sample_rate == 8000
+
+
+class TestReadyEndpoint:
+    @pytest.fixture
+    def client(self):
+        from fastapi.testclient import TestClient
+        import main
+        # No context manager: the lifespan (full warm-up) doesn't run
+        return TestClient(main.app), main
+
+    def test_not_ready_until_warm(self, client):
+        client, main = client
+        main.warmup.configure("filter", main.ENABLED_FAMILIES)
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["models"]["filter"]["state"] == PENDING
+
+        main.warmup.run()
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["models"]["filter"]["state"] == READY
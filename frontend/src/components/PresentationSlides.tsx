@@ -5,6 +5,8 @@ import axios from 'axios'
 import './PresentationSlides.css'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
+// Keys this tab's detection state on the server (see /process-frame)
+const SESSION_HEADERS = { 'X-Session-Id': Math.random().toString(36).slice(2) }
 
 interface Slide {
     id: number
@@ -492,7 +494,7 @@ export default function PresentationSlides({ onClose }: PresentationSlidesProps)
                         const formData = new FormData()
                         formData.append('frame', blob, 'frame.jpg')
                         formData.append('type', 'gesture')
-                        const response = await axios.post(`${API_URL}/process-frame`, formData)
+                        const response = await axios.post(`${API_URL}/process-frame`, formData, { headers: SESSION_HEADERS })
 
                         if (response.data && response.data.gesture) {
                             const g = response.data.gesture
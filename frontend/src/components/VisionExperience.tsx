@@ -5,6 +5,8 @@ import { motion, AnimatePresence } from 'framer-motion'
 import axios from 'axios'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
+// Keys this tab's detection state on the server (see /process-frame)
+const SESSION_HEADERS = { 'X-Session-Id': Math.random().toString(36).slice(2) }
 
 interface VisionExperienceProps {
     title: string
@@ -87,7 +89,7 @@ const VisionExperience = ({
     const canvasRef = useRef<HTMLCanvasElement>(null)
     const streamRef = useRef<MediaStream | null>(null)
     const processingRef = useRef<ReturnType<typeof setInterval> | null>(null)
-    const pollingRef = useRef<ReturnType<typeof setInterval> | null>(null)
+    const eventsRef = useRef<EventSource | null>(null)
     const [processedImage, setProcessedImage] = useState<string | null>(null)
 
     // ========== MJPEG STREAM MODE (gesture/pose) ==========
@@ -97,21 +99,23 @@ const VisionExperience = ({
         // The <img> tag will automatically start streaming
         setTimeout(() => {
             setLoading(false)
-            startPolling()
+            startStatusEvents()
         }, 1000)
     }
 
-    const startPolling = () => {
-        pollingRef.current = setInterval(async () => {
+    // Server pushes a status event whenever the detection changes (SSE)
+    const startStatusEvents = () => {
+        eventsRef.current?.close()
+        const events = new EventSource(`${API_URL}/stream/${statusKey}/events`)
+        events.addEventListener('status', (event) => {
             try {
-                const response = await axios.get(`${API_URL}/stream/${statusKey}/status`)
-                if (response.data) {
-                    setStatus(response.data)
-                }
+                setStatus(JSON.parse((event as MessageEvent).data))
             } catch {
                 // Silently handle
             }
-        }, 300)
+        })
+        // EventSource reconnects by itself after errors
+        eventsRef.current = events
     }
 
     // ========== NATIVE CAMERA MODE (emotion) ==========
@@ -153,7 +157,7 @@ const VisionExperience = ({
                     const formData = new FormData()
                     formData.append('frame', blob, 'frame.jpg')
                     formData.append('type', statusKey)
-                    const response = await axios.post(`${API_URL}/process-frame`, formData, { timeout: 2000 })
+                    const response = await axios.post(`${API_URL}/process-frame`, formData, { timeout: 2000, headers: SESSION_HEADERS })
                     if (response.data && response.data.status !== 'error') {
                         setStatus(response.data)
                         if (response.data.image) {
@@ -194,7 +198,10 @@ const VisionExperience = ({
             streamRef.current = null
         }
         if (processingRef.current) clearInterval(processingRef.current)
-        if (pollingRef.current) clearInterval(pollingRef.current)
+        if (eventsRef.current) {
+            eventsRef.current.close()
+            eventsRef.current = null
+        }
     }
 
     useEffect(() => {